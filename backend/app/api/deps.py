@@ -1,6 +1,10 @@
-from fastapi import Depends
+import hmac
+from typing import Optional
+from fastapi import Depends, Header, HTTPException
 from sqlalchemy.orm import Session
-from app.db.database import get_db
+from app.db.database import get_db, SessionLocal, AsyncSessionLocal
+from app.core.config import settings
+from app.db.replicas import replica_router, has_recent_write, has_recent_write_sync
 
 
 def get_current_user():
@@ -9,4 +13,40 @@ def get_current_user():
 
 
 def get_current_user_id(current_user: dict = Depends(get_current_user)) -> int:
-    return current_user["id"]
\ No newline at end of file
+    return current_user["id"]
+
+
+async def get_async_read_db(current_user_id: int = Depends(get_current_user_id)):
+    """
+    Сессия для аналитических чтений: реплика с допустимым отставанием,
+    либо primary, если реплик нет или пользователь только что писал
+    """
+    engine = None
+    if replica_router.enabled and not await has_recent_write(current_user_id):
+        engine = await replica_router.choose_async_engine()
+    
+    session_kwargs = {"bind": engine} if engine is not None else {}
+    async with AsyncSessionLocal(**session_kwargs) as db:
+        yield db
+
+
+def get_read_db(current_user_id: int = Depends(get_current_user_id)):
+    """Синхронный вариант get_async_read_db (для crud.get_stats)"""
+    engine = None
+    if replica_router.enabled and not has_recent_write_sync(current_user_id):
+        engine = replica_router.choose_sync_engine()
+    
+    session_kwargs = {"bind": engine} if engine is not None else {}
+    db = SessionLocal(**session_kwargs)
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def require_profiling_access(x_profiling_token: Optional[str] = Header(None)):
+    """Доступ к профайлеру: включен в настройках и передан токен администратора"""
+    if not settings.profiling_enabled or not settings.profiling_token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_profiling_token or not hmac.compare_digest(x_profiling_token, settings.profiling_token):
+        raise HTTPException(status_code=403, detail="Недостаточно прав")
\ No newline at end of file
@@ -0,0 +1,81 @@
+import asyncio
+import json
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+import redis.asyncio as aioredis
+from app.api.deps import require_profiling_access
+from app.core.config import settings
+from app.core.profiling import (
+    WORKER_PROFILE_CHANNEL, sampling, worker_result_key, request_document_profile, get_document_profiles
+)
+
+router = APIRouter(dependencies=[Depends(require_profiling_access)])
+
+
+@router.get("/profile/api", response_class=PlainTextResponse)
+async def profile_api_process(
+    duration: float = Query(10.0, gt=0),
+    interval_ms: float = Query(settings.profiling_interval_ms, ge=1)
+):
+    """Профиль процесса API за duration секунд в формате collapsed stacks"""
+    duration = min(duration, settings.profiling_max_duration)
+    with sampling(interval_ms / 1000) as profiler:
+        await asyncio.sleep(duration)
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"X-Profile-Samples": str(profiler.samples), "X-Profile-Pid": str(profiler.to_dict()["pid"])}
+    )
+
+
+@router.post("/profile/workers")
+async def profile_worker_processes(
+    duration: float = Query(10.0, gt=0),
+    interval_ms: float = Query(settings.profiling_interval_ms, ge=1)
+):
+    """Профили всех процессов воркеров, подписанных на запросы профилирования"""
+    duration = min(duration, settings.profiling_max_duration)
+    request_id = uuid.uuid4().hex
+    client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    try:
+        receivers = await client.publish(WORKER_PROFILE_CHANNEL, json.dumps({
+            "request_id": request_id,
+            "duration": duration,
+            "interval_ms": interval_ms
+        }))
+        if not receivers:
+            raise HTTPException(status_code=503, detail="Нет воркеров с включенным профилированием")
+        
+        # Ждем профили от всех получателей, но не дольше duration + 10 сек
+        deadline = asyncio.get_running_loop().time() + duration + 10
+        await asyncio.sleep(duration)
+        profiles = {}
+        while asyncio.get_running_loop().time() < deadline:
+            profiles = await client.hgetall(worker_result_key(request_id))
+            if len(profiles) >= receivers:
+                break
+            await asyncio.sleep(0.5)
+    finally:
+        await client.aclose()
+    
+    return {
+        "request_id": request_id,
+        "receivers": receivers,
+        "profiles": {worker: json.loads(profile) for worker, profile in profiles.items()}
+    }
+
+
+@router.post("/profile/documents/{document_id}")
+def request_document_profiling(document_id: int, reprocess: bool = False):
+    """Следующие задачи обработки документа выполнятся под профайлером"""
+    request_document_profile(document_id)
+    if reprocess:
+        from app.core.tasks import reprocess_document
+        reprocess_document.delay(document_id)
+    return {"document_id": document_id, "requested": True, "reprocess": reprocess}
+
+
+@router.get("/profile/documents/{document_id}")
+def get_document_profiling(document_id: int):
+    """Профили задач документа (collapsed stacks по каждой задаче)"""
+    return {"document_id": document_id, "profiles": get_document_profiles(document_id)}
\ No newline at end of file
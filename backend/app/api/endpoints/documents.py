@@ -1,90 +1,275 @@
-from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form
-from sqlalchemy.orm import Session
+import uuid
+from fastapi import APIRouter, Depends, HTTPException, File, UploadFile, Form, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
-from app.db.database import get_db
+from app.db.database import get_async_db
 from app.api.deps import get_current_user_id
 from app.models.document import Document
-from app.schemas.base import DocumentCreate, DocumentUpdate, Document as DocumentSchema, DocumentWithResults
-from app.services.document_service import DocumentService
+from app.schemas.base import (
+    DocumentCreate, DocumentUpdate, Document as DocumentSchema, DocumentWithResults, DocumentRawExtraction,
+    DocumentUploadRequest, DocumentUploadTicket, DocumentUploadComplete, DocumentBatch, DocumentBatchStatus
+)
+from app.services.document_service import DocumentService, DOCUMENT_LIST_FIELDS
+from app.services.batch_upload_service import BatchCollector, BatchStorageError, BatchUploadError
 from app.services.file_service import FileService
-from app.core.tasks import process_document, reprocess_document as reprocess_task
+from app.services.upload_service import UploadError, create_upload, complete_upload
+from app.db.replicas import mark_user_write
+from app.core.events import subscribe_document_events, format_sse, is_terminal_event
+from app.core.tracing import tag_document
 
 router = APIRouter()
 
 
+def _tasks():
+    """
+    Задачи Celery импортируются при первой постановке в очередь:
+    app.core.tasks тянет Celery, openai и pint, которые API при старте не нужны
+    """
+    from app.core import tasks
+    return tasks
+
+
 @router.post("/upload", response_model=DocumentSchema)
 async def upload_document(
     file: UploadFile = File(...),
     lab_name: Optional[str] = Form(None),
     report_date: Optional[str] = Form(None),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     file_service = FileService()
     document_service = DocumentService(db)
     
-    # Валидация файла
+    # Валидация файла: расширение и размер, затем сигнатура содержимого
     if not file_service.validate_file(file):
         raise HTTPException(status_code=400, detail="Недопустимый тип файла")
+    inspection = await file_service.inspect_upload(file)
+    if inspection.error:
+        raise HTTPException(status_code=400, detail=inspection.error)
     
     # Сохранение файла в S3
     file_path = await file_service.save_file(file, current_user_id)
     
-    # Создание записи в БД
-    document_data = DocumentCreate(
+    return await _register_document(
+        document_service, current_user_id,
         filename=file.filename,
+        file_path=file_path,
+        file_size=file.size,
+        mime_type=inspection.detected_mime,
         lab_name=lab_name,
         report_date=report_date
     )
+
+
+@router.post("/upload-url", response_model=DocumentUploadTicket)
+async def create_upload_url(
+    upload_request: DocumentUploadRequest,
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Шаг 1 прямой загрузки: форма presigned POST для отправки файла в S3"""
+    try:
+        return await create_upload(current_user_id, upload_request)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.post("/upload-complete", response_model=DocumentSchema)
+async def complete_direct_upload(
+    upload: DocumentUploadComplete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Шаг 2 прямой загрузки: проверка файла в S3, создание документа и запуск обработки"""
+    try:
+        ticket = await complete_upload(current_user_id, upload.upload_id)
+    except UploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    document = document_service.create_document(
-        document_data, 
+    return await _register_document(
+        DocumentService(db), current_user_id,
+        filename=ticket["filename"],
+        file_path=ticket["file_key"],
+        file_size=ticket["size"],
+        mime_type=ticket["content_type"],
+        lab_name=upload.lab_name,
+        report_date=upload.report_date
+    )
+
+
+@router.post("/batch", response_model=DocumentBatch)
+async def upload_batch(
+    files: List[UploadFile] = File(...),
+    lab_name: Optional[str] = Form(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Пакетная загрузка: несколько файлов и/или ZIP-архивы"""
+    collector = BatchCollector(current_user_id)
+    try:
+        stored, skipped = await collector.collect(files)
+    except BatchUploadError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except BatchStorageError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    if not stored:
+        raise HTTPException(status_code=400, detail="В пакете нет допустимых файлов")
+    
+    batch_id = uuid.uuid4().hex
+    try:
+        documents = await DocumentService(db).create_documents_bulk(
+            [{**file, "lab_name": lab_name} for file in stored], current_user_id, batch_id
+        )
+    except Exception:
+        await collector.discard()
+        raise
+    
+    await mark_user_write(current_user_id)
+    _tasks().enqueue_document_batch([document.id for document in documents])
+    return {"batch_id": batch_id, "documents": documents, "skipped": skipped}
+
+
+@router.get("/batches/{batch_id}", response_model=DocumentBatchStatus)
+async def get_batch_status(
+    batch_id: str,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Сводный прогресс пакетной загрузки"""
+    status = await DocumentService(db).get_batch_status(batch_id, current_user_id)
+    if not status:
+        raise HTTPException(status_code=404, detail="Пакет не найден")
+    return status
+
+
+async def _register_document(
+    document_service: DocumentService,
+    user_id: int,
+    filename: str,
+    file_path: str,
+    file_size: Optional[int],
+    mime_type: Optional[str],
+    lab_name: Optional[str],
+    report_date: Optional[str]
+) -> Document:
+    """Создает документ для сохраненного в S3 файла и ставит его в обработку"""
+    document_data = DocumentCreate(
+        filename=filename,
+        lab_name=lab_name,
+        report_date=report_date
+    )
+    
+    document = await document_service.create_document(
+        document_data,
         file_path=file_path,
-        file_size=file.size,
-        mime_type=file.content_type,
-        user_id=current_user_id
+        file_size=file_size,
+        mime_type=mime_type,
+        user_id=user_id
     )
     
+    await mark_user_write(user_id)
+    tag_document(document.id)
+    
     # Запуск обработки в фоне
-    process_document.delay(document.id)
+    _tasks().process_document.delay(document.id)
     
     return document
 
 
 @router.get("/{document_id}", response_model=DocumentSchema)
-def get_document(
+async def get_document(
+    document_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    document_service = DocumentService(db)
+    document = await document_service.get_document(document_id, current_user_id)
+    if not document:
+        raise HTTPException(status_code=404, detail="Документ не найден")
+    return document
+
+
+@router.get("/{document_id}/raw-extraction", response_model=DocumentRawExtraction)
+async def get_document_raw_extraction(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
+    """Сырые данные LLM-экстракции (не входят в обычные ответы по документам)"""
     document_service = DocumentService(db)
-    document = document_service.get_document(document_id, current_user_id)
+    document = await document_service.get_document_raw_extraction(document_id, current_user_id)
     if not document:
         raise HTTPException(status_code=404, detail="Документ не найден")
     return document
 
 
+@router.get("/{document_id}/events")
+async def stream_document_events(
+    document_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user_id: int = Depends(get_current_user_id)
+):
+    """Поток событий обработки документа (Server-Sent Events) вместо polling"""
+    document_service = DocumentService(db)
+    initial_event = await document_service.get_document_status(document_id, current_user_id)
+    # Соединение с БД не должно удерживаться на время жизни потока
+    await db.close()
+    if not initial_event:
+        raise HTTPException(status_code=404, detail="Документ не найден")
+    
+    initial_event["stage"] = initial_event["status"]
+    if initial_event["status"] == "completed":
+        initial_event["stage"] = "normalized"
+    
+    async def event_stream():
+        async for event in subscribe_document_events(document_id, initial_event):
+            if event is None:
+                yield ": keepalive\n\n"
+                continue
+            yield format_sse(event)
+            if is_terminal_event(event):
+                break
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.get("/", response_model=List[dict])
-def get_documents(
+async def get_documents(
     skip: int = 0,
     limit: int = 100,
     status: Optional[str] = None,
     with_results_count: bool = True,
-    db: Session = Depends(get_db),
+    fields: Optional[str] = Query(None, description="Список полей через запятую, например id,filename,status"),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     document_service = DocumentService(db)
     
+    selected_fields = None
+    if fields:
+        selected_fields = [field.strip() for field in fields.split(',') if field.strip()]
+        unknown_fields = set(selected_fields) - set(DOCUMENT_LIST_FIELDS)
+        if unknown_fields:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Недопустимые поля: {', '.join(sorted(unknown_fields))}"
+            )
+    
     if with_results_count:
-        documents = document_service.get_documents_with_results_count(
+        documents = await document_service.get_documents_with_results_count(
             user_id=current_user_id,
             skip=skip,
             limit=limit,
-            status=status
+            status=status,
+            fields=selected_fields
         )
         return documents
     else:
-        documents = document_service.get_documents(
+        documents = await document_service.get_documents(
             user_id=current_user_id,
             skip=skip,
             limit=limit,
@@ -94,43 +279,46 @@ def get_documents(
 
 
 @router.put("/{document_id}", response_model=DocumentSchema)
-def update_document(
+async def update_document(
     document_id: int,
     document_update: DocumentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     document_service = DocumentService(db)
-    document = document_service.update_document(document_id, document_update, current_user_id)
+    document = await document_service.update_document(document_id, document_update, current_user_id)
     if not document:
         raise HTTPException(status_code=404, detail="Документ не найден")
+    await mark_user_write(current_user_id)
     return document
 
 
 @router.delete("/{document_id}")
-def delete_document(
+async def delete_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     document_service = DocumentService(db)
-    if not document_service.delete_document(document_id, current_user_id):
+    if not await document_service.delete_document(document_id, current_user_id):
         raise HTTPException(status_code=404, detail="Документ не найден")
+    await mark_user_write(current_user_id)
     return {"message": "Документ удален"}
 
 
 @router.post("/{document_id}/reprocess")
-def reprocess_document(
+async def reprocess_document(
     document_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     document_service = DocumentService(db)
-    document = document_service.get_document(document_id, current_user_id)
+    document = await document_service.get_document(document_id, current_user_id)
     if not document:
         raise HTTPException(status_code=404, detail="Документ не найден")
     
     # Запуск повторной обработки через Celery
-    reprocess_task.delay(document_id)
+    _tasks().reprocess_document.delay(document_id)
+    await mark_user_write(current_user_id)
     
     return {"message": "Повторная обработка запущена"}
\ No newline at end of file
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime, date
-from app.db.database import get_db
-from app.api.deps import get_current_user_id
+from app.db.database import get_async_db
+from app.api.deps import get_current_user_id, get_async_read_db
+from app.db.replicas import mark_user_write
 from app.schemas.base import Result, ResultCreate, ResultUpdate, ResultWithAnalyte
 from app.services.result_service import ResultService
 
@@ -11,7 +12,7 @@ router = APIRouter()
 
 
 @router.get("/", response_model=List[ResultWithAnalyte])
-def get_results(
+async def get_results(
     skip: int = 0,
     limit: int = 100,
     analyte_id: Optional[int] = None,
@@ -20,11 +21,12 @@ def get_results(
     date_to: Optional[date] = None,
     out_of_range: Optional[bool] = None,
     suspect: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    order_by: str = Query("date", pattern="^(date|deviation)$"),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    results = result_service.get_results(
+    results = await result_service.get_results(
         user_id=current_user_id,
         skip=skip,
         limit=limit,
@@ -33,24 +35,25 @@ def get_results(
         date_from=date_from,
         date_to=date_to,
         out_of_range=out_of_range,
-        suspect=suspect
+        suspect=suspect,
+        order_by=order_by
     )
     return results
 
 
 @router.get("/summary")
-def get_results_summary(
+async def get_results_summary(
     date_from: Optional[date] = None,
     date_to: Optional[date] = None,
     search: Optional[str] = None,
     lab_name: Optional[str] = None,
     out_of_range_only: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     """Получить сводку последних результатов для главного экрана"""
     result_service = ResultService(db)
-    summary = result_service.get_results_summary(
+    summary = await result_service.get_results_summary(
         user_id=current_user_id,
         date_from=date_from,
         date_to=date_to,
@@ -62,15 +65,15 @@ def get_results_summary(
 
 
 @router.get("/analyte/{analyte_id}/history", response_model=List[ResultWithAnalyte])
-def get_analyte_history(
+async def get_analyte_history(
     analyte_id: int,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    results = result_service.get_analyte_history(
+    results = await result_service.get_analyte_history(
         analyte_id=analyte_id,
         user_id=current_user_id,
         skip=skip,
@@ -80,15 +83,15 @@ def get_analyte_history(
 
 
 @router.get("/source-label/{source_label}/history", response_model=List[ResultWithAnalyte])
-def get_source_label_history(
+async def get_source_label_history(
     source_label: str,
     skip: int = 0,
     limit: int = 50,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    results = result_service.get_source_label_history(
+    results = await result_service.get_source_label_history(
         source_label=source_label,
         user_id=current_user_id,
         skip=skip,
@@ -98,41 +101,42 @@ def get_source_label_history(
 
 
 @router.get("/{result_id}", response_model=ResultWithAnalyte)
-def get_result(
+async def get_result(
     result_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    result = result_service.get_result(result_id, current_user_id)
+    result = await result_service.get_result(result_id, current_user_id)
     if not result:
         raise HTTPException(status_code=404, detail="Результат не найден")
     return result
 
 
 @router.put("/{result_id}", response_model=ResultWithAnalyte)
-def update_result(
+async def update_result(
     result_id: int,
     result_update: ResultUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    result = result_service.update_result(result_id, result_update, current_user_id)
+    result = await result_service.update_result(result_id, result_update, current_user_id)
     if not result:
         raise HTTPException(status_code=404, detail="Результат не найден")
+    await mark_user_write(current_user_id)
     return result
 
 
 @router.get("/trends/summary")
-def get_trends_summary(
+async def get_trends_summary(
     analyte_ids: List[int] = Query([]),
     days: int = 30,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_read_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    trends = result_service.get_trends_summary(
+    trends = await result_service.get_trends_summary(
         user_id=current_user_id,
         analyte_ids=analyte_ids,
         days=days
@@ -141,11 +145,12 @@ def get_trends_summary(
 
 
 @router.post("/manual", response_model=ResultWithAnalyte)
-def create_manual_result(
+async def create_manual_result(
     result_data: ResultCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user_id: int = Depends(get_current_user_id)
 ):
     result_service = ResultService(db)
-    result = result_service.create_manual_result(result_data, current_user_id)
+    result = await result_service.create_manual_result(result_data, current_user_id)
+    await mark_user_write(current_user_id)
     return result
\ No newline at end of file
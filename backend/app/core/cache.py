@@ -0,0 +1,259 @@
+"""
+Кэш ответов для справочных данных (словарь аналитов).
+
+Тело ответа хранится в Redis под ключом с номером версии пространства
+имен и дублируется во внутрипроцессном LRU с коротким TTL. Запись в
+справочник увеличивает версию - старые ключи просто перестают
+использоваться. Сама версия запоминается в процессе и сверяется с Redis
+не чаще reference_cache_version_check_interval, так что попадание в
+локальный LRU обходится без сетевых вызовов. Версия при отсутствии ключа (новый или очищенный Redis)
+начинается со значения от текущего времени, а не с 0, поэтому старые
+номера не переиспользуются. ETag - хэш тела ответа: 304 отдается только
+при совпадении содержимого, на попадании в кэш без обращения к БД.
+"""
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class ReferenceDataCache:
+    def __init__(self, namespace: str):
+        self.namespace = namespace
+        # (версия, ключ) -> (тело, момент устаревания по time.monotonic)
+        self._local: "OrderedDict[Tuple[int, str], Tuple[bytes, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._sync_client: Optional[redis.Redis] = None
+        self._async_client: Optional[aioredis.Redis] = None
+    
+    @property
+    def _version_key(self) -> str:
+        return f"labtrack:cache:{self.namespace}:version"
+    
+    def _body_key(self, version: int, key: str) -> str:
+        return f"labtrack:cache:{self.namespace}:v{version}:{key}"
+    
+    def etag(self, body: bytes) -> str:
+        digest = hashlib.sha1(body).hexdigest()[:16]
+        return f'"{self.namespace}-{digest}"'
+    
+    @staticmethod
+    def _seed_version() -> int:
+        """Начальная версия: после очистки Redis не совпадает с прежними"""
+        return int(time.time() * 1000)
+    
+    # Версия, запомненная в процессе
+    
+    def _known_version(self) -> Optional[int]:
+        if time.monotonic() - self._version_checked_at < settings.reference_cache_version_check_interval:
+            return self._version
+        return None
+    
+    def _remember_version(self, version: int) -> int:
+        self._version = version
+        self._version_checked_at = time.monotonic()
+        return version
+    
+    # Внутрипроцессный LRU
+    
+    def _local_get(self, version: int, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._local.get((version, key))
+            if entry is None:
+                return None
+            body, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._local[(version, key)]
+                return None
+            self._local.move_to_end((version, key))
+            return body
+    
+    def _local_put(self, version: int, key: str, body: bytes):
+        with self._lock:
+            self._local[(version, key)] = (body, time.monotonic() + settings.reference_cache_local_ttl)
+            self._local.move_to_end((version, key))
+            while len(self._local) > settings.reference_cache_local_size:
+                self._local.popitem(last=False)
+    
+    # Синхронный доступ (sync-обработчики, Celery)
+    
+    def _sync_redis(self) -> redis.Redis:
+        if self._sync_client is None:
+            self._sync_client = redis.Redis.from_url(settings.redis_url)
+        return self._sync_client
+    
+    def get_version_sync(self) -> Optional[int]:
+        """Текущая версия или None, если Redis недоступен"""
+        version = self._known_version()
+        if version is not None:
+            return version
+        try:
+            client = self._sync_redis()
+            version = client.get(self._version_key)
+            if version is None:
+                client.set(self._version_key, self._seed_version(), nx=True)
+                version = client.get(self._version_key)
+            return self._remember_version(int(version))
+        except redis.RedisError as e:
+            logger.warning(f"Cache {self.namespace} unavailable: {str(e)}")
+            return None
+    
+    def get_sync(self, version: int, key: str) -> Optional[bytes]:
+        body = self._local_get(version, key)
+        if body is not None:
+            return body
+        try:
+            body = self._sync_redis().get(self._body_key(version, key))
+        except redis.RedisError:
+            return None
+        if body is not None:
+            self._local_put(version, key, body)
+        return body
+    
+    def set_sync(self, version: int, key: str, body: bytes):
+        self._local_put(version, key, body)
+        try:
+            self._sync_redis().set(self._body_key(version, key), body, ex=settings.reference_cache_ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to store {self.namespace}/{key} in cache: {str(e)}")
+    
+    def invalidate_sync(self):
+        try:
+            pipe = self._sync_redis().pipeline()
+            pipe.set(self._version_key, self._seed_version(), nx=True)
+            pipe.incr(self._version_key)
+            # Свой процесс видит новую версию сразу, остальные - после очередной сверки
+            self._remember_version(pipe.execute()[-1])
+        except redis.RedisError as e:
+            logger.error(f"Failed to invalidate cache {self.namespace}: {str(e)}")
+    
+    # Асинхронный доступ (async-обработчики API)
+    
+    def _async_redis(self) -> aioredis.Redis:
+        if self._async_client is None:
+            self._async_client = aioredis.from_url(settings.redis_url)
+        return self._async_client
+    
+    async def get_version(self) -> Optional[int]:
+        version = self._known_version()
+        if version is not None:
+            return version
+        try:
+            client = self._async_redis()
+            version = await client.get(self._version_key)
+            if version is None:
+                await client.set(self._version_key, self._seed_version(), nx=True)
+                version = await client.get(self._version_key)
+            return self._remember_version(int(version))
+        except redis.RedisError as e:
+            logger.warning(f"Cache {self.namespace} unavailable: {str(e)}")
+            return None
+    
+    async def get(self, version: int, key: str) -> Optional[bytes]:
+        body = self._local_get(version, key)
+        if body is not None:
+            return body
+        try:
+            body = await self._async_redis().get(self._body_key(version, key))
+        except redis.RedisError:
+            return None
+        if body is not None:
+            self._local_put(version, key, body)
+        return body
+    
+    async def set(self, version: int, key: str, body: bytes):
+        self._local_put(version, key, body)
+        try:
+            await self._async_redis().set(self._body_key(version, key), body, ex=settings.reference_cache_ttl)
+        except redis.RedisError as e:
+            logger.warning(f"Failed to store {self.namespace}/{key} in cache: {str(e)}")
+    
+    async def invalidate(self):
+        try:
+            pipe = self._async_redis().pipeline()
+            pipe.set(self._version_key, self._seed_version(), nx=True)
+            pipe.incr(self._version_key)
+            self._remember_version((await pipe.execute())[-1])
+        except redis.RedisError as e:
+            logger.error(f"Failed to invalidate cache {self.namespace}: {str(e)}")
+
+
+analyte_cache = ReferenceDataCache("analytes")
+unit_rules_cache = ReferenceDataCache("unit_rules")
+
+
+def _encode(data: Any) -> bytes:
+    return json.dumps(jsonable_encoder(data), ensure_ascii=False).encode("utf-8")
+
+
+def _cache_headers(etag: str) -> dict:
+    return {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={settings.reference_cache_max_age}, must-revalidate"
+    }
+
+
+def _not_modified(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _cached_response(request: Request, etag: str, body: bytes) -> Response:
+    headers = _cache_headers(etag)
+    if _not_modified(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def cached_json_response(
+    cache: ReferenceDataCache,
+    request: Request,
+    key: str,
+    loader: Callable[[], Awaitable[Any]]
+) -> Response:
+    """Read-through кэш JSON-ответа с поддержкой ETag/If-None-Match"""
+    version = await cache.get_version()
+    if version is None:
+        # Redis недоступен - отдаем ответ из БД без кэширования
+        return Response(content=_encode(await loader()), media_type="application/json")
+    
+    body = await cache.get(version, key)
+    if body is None:
+        body = _encode(await loader())
+        await cache.set(version, key, body)
+    return _cached_response(request, cache.etag(body), body)
+
+
+def cached_json_response_sync(
+    cache: ReferenceDataCache,
+    request: Request,
+    key: str,
+    loader: Callable[[], Any]
+) -> Response:
+    """Синхронный вариант cached_json_response"""
+    version = cache.get_version_sync()
+    if version is None:
+        return Response(content=_encode(loader()), media_type="application/json")
+    
+    body = cache.get_sync(version, key)
+    if body is None:
+        body = _encode(loader())
+        cache.set_sync(version, key, body)
+    return _cached_response(request, cache.etag(body), body)
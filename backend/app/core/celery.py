@@ -1,6 +1,10 @@
+import logging
 from celery import Celery
+from celery.signals import worker_process_init
 from app.core.config import settings
 
+logger = logging.getLogger(__name__)
+
 # Создание экземпляра Celery
 celery_app = Celery(
     "labtrack",
@@ -23,4 +27,40 @@ celery_app.conf.update(
     worker_prefetch_multiplier=1,
     task_acks_late=True,
     worker_max_tasks_per_child=1000,
-)
\ No newline at end of file
+    beat_schedule={
+        # Сверка инкрементальных счетчиков /stats с фактическими данными
+        "rebuild-user-stats": {
+            "task": "app.core.tasks.rebuild_all_stats",
+            "schedule": settings.stats_rebuild_interval,
+        },
+    },
+)
+
+
+@worker_process_init.connect
+def init_worker_process(**kwargs):
+    """Инициализация ресурсов в каждом дочернем процессе воркера"""
+    from app.db.database import SessionLocal, configure_worker_engine, get_engine
+    from app.core.clients import get_openai_client, init_storage
+    from app.core.profiling import start_worker_profile_listener
+    from app.core.tracing import configure_tracing
+    from app.services.storage import use_storage_backend
+    from app.services.unit_conversion import unit_conversion_engine
+    configure_worker_engine()
+    configure_tracing(f"{settings.otel_service_name}-worker", engines=[get_engine()])
+    start_worker_profile_listener()
+    
+    # Клиенты S3 и OpenAI создаются до первой задачи и переиспользуются всеми задачами процесса
+    init_storage()
+    get_openai_client()
+    # Каждая задача запускает свой event loop (asyncio.run) - async-клиент S3 не переиспользовался бы
+    use_storage_backend("threadpool")
+    
+    # Компилируем правила приведения единиц до первой задачи
+    db = SessionLocal()
+    try:
+        unit_conversion_engine.load(db)
+    except Exception as e:
+        logger.warning(f"Unit conversion rules are not loaded at startup: {str(e)}")
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,125 @@
+"""
+Клиенты внешних сервисов (S3/MinIO, OpenAI) на процесс.
+
+Клиенты создаются один раз - при старте API (lifespan) или дочернего
+процесса воркера (worker_process_init), либо лениво при первом вызове.
+Пул соединений и TLS-сессии переиспользуются между запросами и задачами,
+а проверка бакета выполняется один раз, а не в каждом FileService().
+Библиотеки импортируются внутри функций, чтобы не замедлять импорт API.
+"""
+import logging
+import threading
+from typing import Any, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_s3_client: Optional[Any] = None
+_s3_presign_client: Optional[Any] = None
+_openai_client: Optional[Any] = None
+_bucket_ready = False
+
+
+def _create_s3_client(endpoint_url: str):
+    import boto3
+    from botocore.config import Config
+    return boto3.client(
+        's3',
+        endpoint_url=endpoint_url,
+        aws_access_key_id=settings.s3_access_key,
+        aws_secret_access_key=settings.s3_secret_key,
+        config=Config(
+            max_pool_connections=settings.s3_max_pool_connections,
+            connect_timeout=settings.s3_connect_timeout,
+            read_timeout=settings.s3_read_timeout,
+            retries={"max_attempts": 3, "mode": "standard"},
+            signature_version="s3v4"
+        )
+    )
+
+
+def s3_client_error() -> type:
+    """
+    botocore ClientError без импорта botocore при загрузке модуля:
+    выражение в except вычисляется только когда исключение уже возникло
+    """
+    from botocore.exceptions import ClientError
+    return ClientError
+
+
+def get_s3_client():
+    """Клиент boto3 S3 процесса (потокобезопасен)"""
+    global _s3_client
+    if _s3_client is None:
+        with _lock:
+            if _s3_client is None:
+                _s3_client = _create_s3_client(settings.s3_endpoint)
+    return _s3_client
+
+
+def get_s3_presign_client():
+    """
+    Клиент для подписи ссылок, которые открывает браузер: адрес хранилища
+    снаружи (s3_public_endpoint) может отличаться от адреса внутри сети
+    """
+    global _s3_presign_client
+    if not settings.s3_public_endpoint or settings.s3_public_endpoint == settings.s3_endpoint:
+        return get_s3_client()
+    if _s3_presign_client is None:
+        with _lock:
+            if _s3_presign_client is None:
+                _s3_presign_client = _create_s3_client(settings.s3_public_endpoint)
+    return _s3_presign_client
+
+
+def bucket_ready() -> bool:
+    return _bucket_ready
+
+
+def ensure_bucket():
+    """Создает бакет, если его нет; после первой удачной проверки - no-op"""
+    global _bucket_ready
+    if _bucket_ready:
+        return
+    from botocore.exceptions import ClientError
+    client = get_s3_client()
+    try:
+        client.head_bucket(Bucket=settings.s3_bucket)
+    except ClientError:
+        client.create_bucket(Bucket=settings.s3_bucket)
+    _bucket_ready = True
+
+
+def get_openai_client():
+    """Клиент OpenAI процесса с общим пулом HTTP-соединений"""
+    global _openai_client
+    if _openai_client is None:
+        with _lock:
+            if _openai_client is None:
+                import httpx
+                import openai
+                _openai_client = openai.OpenAI(
+                    api_key=settings.openai_api_key,
+                    base_url=settings.openai_base_url,
+                    timeout=settings.openai_timeout,
+                    max_retries=settings.openai_max_retries,
+                    http_client=httpx.Client(
+                        limits=httpx.Limits(
+                            max_connections=settings.openai_max_connections,
+                            max_keepalive_connections=settings.openai_max_connections
+                        ),
+                        timeout=settings.openai_timeout
+                    )
+                )
+    return _openai_client
+
+
+def init_storage():
+    """Инициализация S3 при старте процесса; ошибка не фатальна - повтор при первом использовании"""
+    try:
+        get_s3_client()
+        ensure_bucket()
+    except Exception as e:
+        logger.warning(f"S3 storage is not ready at startup: {str(e)}")
\ No newline at end of file
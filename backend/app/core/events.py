@@ -0,0 +1,109 @@
+"""
+События статуса обработки документов через Redis pub/sub.
+
+Celery-задачи публикуют события по этапам пайплайна, API транслирует их
+клиентам через Server-Sent Events. Последнее событие дополнительно
+хранится в Redis, чтобы подключившийся клиент сразу получил текущее
+состояние без обращения к PostgreSQL.
+"""
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, Optional
+
+import redis
+import redis.asyncio as aioredis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_sync_client: Optional[redis.Redis] = None
+
+
+def _channel(document_id: int) -> str:
+    return f"labtrack:document:{document_id}:events"
+
+
+def _snapshot_key(document_id: int) -> str:
+    return f"labtrack:document:{document_id}:last_event"
+
+
+def _get_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _sync_client
+
+
+def publish_document_event(
+    document_id: int,
+    status: str,
+    stage: str,
+    **extra: Any
+) -> None:
+    """Публикует событие статуса документа (вызывается из воркеров)"""
+    event = {
+        "document_id": document_id,
+        "status": status,
+        "stage": stage,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        **extra
+    }
+    payload = json.dumps(event, default=str)
+    try:
+        client = _get_sync_client()
+        pipe = client.pipeline()
+        pipe.set(_snapshot_key(document_id), payload, ex=settings.document_events_ttl)
+        pipe.publish(_channel(document_id), payload)
+        pipe.execute()
+    except redis.RedisError as e:
+        # События - best effort, обработка документа не должна падать из-за Redis
+        logger.warning(f"Failed to publish event for document {document_id}: {str(e)}")
+
+
+def is_terminal_event(event: Dict[str, Any]) -> bool:
+    """Поток закрывается после ошибки или завершения нормализации"""
+    return event.get("status") == "failed" or event.get("stage") == "normalized"
+
+
+def format_sse(event: Dict[str, Any], event_name: str = "status") -> str:
+    """Форматирует событие в формате text/event-stream"""
+    return f"event: {event_name}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def subscribe_document_events(
+    document_id: int,
+    initial_event: Optional[Dict[str, Any]] = None,
+    keepalive_interval: Optional[float] = None
+) -> AsyncIterator[Optional[Dict[str, Any]]]:
+    """
+    Асинхронно отдает события документа из Redis pub/sub.
+    Первым отдается последнее сохраненное событие (или initial_event),
+    None означает, что за keepalive_interval новых событий не было.
+    """
+    interval = keepalive_interval or settings.sse_keepalive_interval
+    client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    pubsub = client.pubsub()
+    # Подписываемся до чтения снимка, чтобы не потерять события между ними
+    await pubsub.subscribe(_channel(document_id))
+    try:
+        snapshot = await client.get(_snapshot_key(document_id))
+        if snapshot:
+            yield json.loads(snapshot)
+        elif initial_event:
+            yield initial_event
+        
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=interval)
+            if message is None:
+                yield None
+                continue
+            try:
+                yield json.loads(message["data"])
+            except (TypeError, ValueError):
+                continue
+    finally:
+        await pubsub.unsubscribe(_channel(document_id))
+        await pubsub.aclose()
+        await client.aclose()
@@ -0,0 +1,227 @@
+"""
+Сэмплирующий профайлер для API и воркеров Celery.
+
+Профайлер работает в отдельном потоке и с заданным интервалом снимает
+стеки потоков процесса через sys._current_frames(), без трассировки
+каждого вызова. Поэтому его можно включать на работающем процессе.
+Результат - collapsed stacks ("a;b;c 42"), которые напрямую открываются
+в flamegraph.pl, speedscope и Grafana Pyroscope.
+
+Режимы (только при profiling_enabled):
+- процесс API: профиль снимается на время запроса к /debug/profile/api;
+- процессы воркеров: каждый дочерний процесс слушает канал Redis и по
+  запросу снимает профиль своего основного потока;
+- документ: задачи, помеченные запросом на профилирование документа,
+  выполняются под профайлером, профиль сохраняется в Redis.
+"""
+import functools
+import json
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+import redis
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+WORKER_PROFILE_CHANNEL = "labtrack:profile:workers"
+
+_sync_client: Optional[redis.Redis] = None
+
+
+def _get_sync_client() -> redis.Redis:
+    global _sync_client
+    if _sync_client is None:
+        _sync_client = redis.Redis.from_url(settings.redis_url, decode_responses=True)
+    return _sync_client
+
+
+def worker_result_key(request_id: str) -> str:
+    return f"labtrack:profile:request:{request_id}"
+
+
+def document_request_key(document_id: int) -> str:
+    return f"labtrack:profile:document:{document_id}:requested"
+
+
+def document_profiles_key(document_id: int) -> str:
+    return f"labtrack:profile:document:{document_id}:profiles"
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    filename = code.co_filename
+    for marker in ("site-packages" + os.sep, os.sep + "app" + os.sep):
+        index = filename.rfind(marker)
+        if index != -1:
+            filename = filename[index + 1:] if marker.startswith(os.sep) else filename[index + len(marker):]
+            break
+    return f"{code.co_name} ({filename}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """Снимает стеки потоков процесса с фиксированным интервалом"""
+    
+    def __init__(self, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None):
+        self.interval = interval
+        self.thread_ids = set(thread_ids) if thread_ids is not None else None
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.duration = 0.0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def start(self):
+        self.started_at = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name="labtrack-profiler", daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.duration = time.perf_counter() - (self.started_at or time.perf_counter())
+    
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                if self.thread_ids is not None and thread_id not in self.thread_ids:
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+                stack.append(thread_names.get(thread_id, str(thread_id)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+    
+    def collapsed(self) -> str:
+        """Профиль в формате collapsed stacks"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "pid": os.getpid(),
+            "host": socket.gethostname(),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "duration_ms": round(self.duration * 1000, 1),
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "collapsed": self.collapsed(),
+        }
+
+
+@contextmanager
+def sampling(interval: float, thread_ids: Optional[Iterable[int]] = None) -> Iterator[SamplingProfiler]:
+    profiler = SamplingProfiler(interval, thread_ids)
+    profiler.start()
+    try:
+        yield profiler
+    finally:
+        profiler.stop()
+
+
+# Профилирование задач отдельного документа
+
+def request_document_profile(document_id: int):
+    """Помечает документ: его следующие задачи выполнятся под профайлером"""
+    client = _get_sync_client()
+    pipe = client.pipeline()
+    pipe.set(document_request_key(document_id), 1, ex=settings.profiling_result_ttl)
+    pipe.delete(document_profiles_key(document_id))
+    pipe.execute()
+
+
+def get_document_profiles(document_id: int) -> List[Dict[str, Any]]:
+    client = _get_sync_client()
+    return [json.loads(item) for item in client.lrange(document_profiles_key(document_id), 0, -1)]
+
+
+def _document_profiling_requested(document_id: int) -> bool:
+    if not settings.profiling_enabled:
+        return False
+    try:
+        return bool(_get_sync_client().exists(document_request_key(document_id)))
+    except redis.RedisError:
+        return False
+
+
+@contextmanager
+def document_profile(task_name: str, document_id: int) -> Iterator[None]:
+    """Профилирует блок, если для документа запрошено профилирование"""
+    if not _document_profiling_requested(document_id):
+        yield
+        return
+    
+    with sampling(settings.profiling_interval_ms / 1000, thread_ids=[threading.get_ident()]) as profiler:
+        yield
+    profile = {"task": task_name, "document_id": document_id, **profiler.to_dict()}
+    try:
+        client = _get_sync_client()
+        pipe = client.pipeline()
+        pipe.rpush(document_profiles_key(document_id), json.dumps(profile))
+        pipe.expire(document_profiles_key(document_id), settings.profiling_result_ttl)
+        pipe.execute()
+    except redis.RedisError as e:
+        logger.warning(f"Failed to store profile of document {document_id}: {str(e)}")
+
+
+def document_profiled(func):
+    """Декоратор для bind=True задач с первым аргументом document_id"""
+    @functools.wraps(func)
+    def wrapper(task, document_id: int, *args, **kwargs):
+        with document_profile(func.__name__, document_id):
+            return func(task, document_id, *args, **kwargs)
+    return wrapper
+
+
+# Профилирование процессов воркеров по запросу
+
+def _handle_worker_request(request: Dict[str, Any], main_thread_id: int):
+    duration = min(float(request["duration"]), settings.profiling_max_duration)
+    interval = float(request.get("interval_ms", settings.profiling_interval_ms)) / 1000
+    with sampling(interval, thread_ids=[main_thread_id]) as profiler:
+        time.sleep(duration)
+    
+    key = worker_result_key(request["request_id"])
+    client = _get_sync_client()
+    pipe = client.pipeline()
+    pipe.hset(key, f"{socket.gethostname()}:{os.getpid()}", json.dumps(profiler.to_dict()))
+    pipe.expire(key, settings.profiling_result_ttl)
+    pipe.execute()
+
+
+def start_worker_profile_listener():
+    """Запускает в процессе воркера поток, принимающий запросы на профиль"""
+    if not settings.profiling_enabled:
+        return
+    main_thread_id = threading.get_ident()
+    
+    def listen():
+        while True:
+            try:
+                pubsub = redis.Redis.from_url(settings.redis_url, decode_responses=True).pubsub(
+                    ignore_subscribe_messages=True
+                )
+                pubsub.subscribe(WORKER_PROFILE_CHANNEL)
+                for message in pubsub.listen():
+                    _handle_worker_request(json.loads(message["data"]), main_thread_id)
+            except Exception as e:
+                logger.warning(f"Profile listener error: {str(e)}")
+                time.sleep(5)
+    
+    threading.Thread(target=listen, name="labtrack-profile-listener", daemon=True).start()
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Учет SQL-запросов в рамках HTTP-запроса.
+
+Слушатели before/after_cursor_execute повешены на класс Engine, поэтому
+видят все движки процесса (sync, asyncpg, реплики). Статистика копится
+в объекте из contextvar, который создает SQLMetricsMiddleware; вне
+HTTP-запроса (Celery, скрипты) запросы не учитываются.
+
+Middleware отдает Server-Timing (db, db-slowest, app), пишет гистограммы
+Prometheus по маршруту и логирует N+1: один и тот же текст запроса,
+повторенный больше sql_n_plus_one_threshold раз.
+"""
+import logging
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import Histogram
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+QUERY_COUNT = Histogram(
+    "labtrack_http_db_queries",
+    "SQL-запросов на HTTP-запрос",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200)
+)
+QUERY_TIME = Histogram(
+    "labtrack_http_db_time_seconds",
+    "Суммарное время SQL-запросов на HTTP-запрос",
+    ["method", "route"]
+)
+REQUEST_TIME = Histogram(
+    "labtrack_http_request_duration_seconds",
+    "Время обработки HTTP-запроса",
+    ["method", "route"]
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+        self.shapes: Counter = Counter()
+    
+    def record(self, statement: str, elapsed_ms: float):
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms > self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+        self.shapes[_WHITESPACE.sub(" ", statement).strip()] += 1
+    
+    def repeated_statements(self, threshold: int):
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > threshold]
+
+
+_current_stats: ContextVar[Optional[RequestQueryStats]] = ContextVar("sql_query_stats", default=None)
+
+
+def current_query_stats() -> Optional[RequestQueryStats]:
+    return _current_stats.get()
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_stats.get() is not None:
+        conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = _current_stats.get()
+    started = conn.info.get("query_started_at")
+    if stats is None or not started:
+        return
+    stats.record(statement, (time.perf_counter() - started.pop()) * 1000)
+
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+class SQLMetricsMiddleware:
+    """ASGI middleware: число и время SQL-запросов на HTTP-запрос"""
+    
+    def __init__(self, app):
+        self.app = app
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not settings.sql_metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+        
+        stats = RequestQueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                app_ms = (time.perf_counter() - started) * 1000
+                server_timing = (
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries", '
+                    f"db-slowest;dur={stats.slowest_ms:.1f}, "
+                    f"app;dur={app_ms:.1f}"
+                )
+                message.setdefault("headers", []).append((b"server-timing", server_timing.encode("latin-1")))
+            await send(message)
+        
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            self._observe(scope, stats, time.perf_counter() - started)
+    
+    def _observe(self, scope, stats: RequestQueryStats, elapsed: float):
+        method, route = scope["method"], _route_path(scope)
+        QUERY_COUNT.labels(method, route).observe(stats.count)
+        QUERY_TIME.labels(method, route).observe(stats.total_ms / 1000)
+        REQUEST_TIME.labels(method, route).observe(elapsed)
+        
+        threshold = settings.sql_n_plus_one_threshold
+        if threshold:
+            for shape, count in stats.repeated_statements(threshold):
+                logger.warning(f"Possible N+1 in {method} {route}: statement repeated {count} times: {shape[:300]}")
+        if stats.slowest_ms >= settings.sql_slow_statement_ms:
+            logger.info(
+                f"Slowest statement in {method} {route}: {stats.slowest_ms:.1f} ms: "
+                f"{_WHITESPACE.sub(' ', stats.slowest_statement or '')[:300]}"
+            )
\ No newline at end of file
@@ -1,33 +1,49 @@
 import asyncio
-from celery import current_task
+import logging
+from celery import current_task, group
 from celery.exceptions import Retry
-from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
+from sqlalchemy import func, or_, select
+from sqlalchemy.orm import joinedload
 from app.core.celery import celery_app
 from app.core.config import settings
+from app.core.profiling import document_profile, document_profiled
+from app.core.tracing import document_span, tag_document
+from app.db.database import SessionLocal
+from app.db.replicas import mark_user_write_sync
+from app.core.events import publish_document_event
 from app.models.document import Document
 from app.models.result import Result
+from app.models.user import User
 from app.services.llm_service import LLMExtractionService
 from app.services.normalization_service import NormalizationService
-from app.services.document_service import DocumentService
+from app.services.blob_cache import get_blob_cache
+from app.services.delta_service import recalculate_deltas, recalculate_document_deltas
+from app.services.stats_service import apply_stats_delta, rebuild_user_stats, status_change_deltas
 
+logger = logging.getLogger(__name__)
 
-# Создание сессии БД для задач
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+def _set_document_status(db, document: Document, status: str):
+    """Меняет статус документа вместе со счетчиками user_stats"""
+    apply_stats_delta(db, document.user_id, **status_change_deltas(document.status, status))
+    document.status = status
 
 
 @celery_app.task(bind=True, max_retries=3)
+@document_profiled
 def process_document(self, document_id: int):
     """
     Основная задача обработки документа:
-    1. Извлечение данных через LLM
-    2. Создание результатов в БД
-    3. Запуск нормализации
+    1. Проверка файла по содержимому (тип, страницы, размеры)
+    2. Извлечение данных через LLM
+    3. Создание результатов в БД
+    4. Запуск нормализации
     """
+    tag_document(document_id)
     db = SessionLocal()
+    document = None
     try:
         # Получаем документ
         document = db.query(Document).filter(Document.id == document_id).first()
@@ -35,21 +51,42 @@ def process_document(self, document_id: int):
             raise Exception(f"Документ {document_id} не найден")
         
         # Обновляем статус
-        document.status = "processing"
+        _set_document_status(db, document, "processing")
         db.commit()
+        publish_document_event(document_id, "processing", "extracting")
         
         # Инициализируем сервис LLM
         llm_service = LLMExtractionService()
         
         # Извлекаем данные из файла
-        extracted_data = asyncio.run(
-            llm_service.extract_from_file(document.file_path, document.mime_type)
-        )
+        with document_span("document.extract", document_id, mime_type=document.mime_type):
+            inspection, extracted_data = asyncio.run(
+                llm_service.inspect_and_extract(document.file_path, document.mime_type, document.filename)
+            )
+        
+        if inspection:
+            document.file_info = inspection.to_dict()
+            document.mime_type = inspection.detected_mime
+            document.extraction_method = inspection.extraction_method
+            if inspection.error:
+                # Файл не обработается ни с какой попытки - без повторов
+                _set_document_status(db, document, "failed")
+                document.error_message = inspection.error
+                db.commit()
+                publish_document_event(
+                    document_id, "failed", "precheck_failed",
+                    error=document.error_message
+                )
+                return {"status": "failed", "error": inspection.error}
         
         if not extracted_data:
-            document.status = "failed"
+            _set_document_status(db, document, "failed")
             document.error_message = "Не удалось извлечь данные из документа"
             db.commit()
+            publish_document_event(
+                document_id, "failed", "extraction_failed",
+                error=document.error_message
+            )
             return {"status": "failed", "error": "Extraction failed"}
         
         # Сохраняем извлеченные метаданные
@@ -64,23 +101,32 @@ def process_document(self, document_id: int):
         
         # Создаем результаты в БД
         result_ids = []
-        for analyte_data in extracted_data.analytes:
-            result = Result(
-                document_id=document_id,
-                source_label=analyte_data.name,
-                raw_value=analyte_data.value,
-                raw_unit=analyte_data.unit,
-                raw_reference_range=analyte_data.reference_range,
-                lab_comments=analyte_data.comments,
-                flag=analyte_data.flag,
-                normalized=False
-            )
-            db.add(result)
-            db.flush()  # Получаем ID
-            result_ids.append(result.id)
+        with document_span("document.save_results", document_id, results_count=len(extracted_data.analytes)):
+            for analyte_data in extracted_data.analytes:
+                result = Result(
+                    document_id=document_id,
+                    source_label=analyte_data.name,
+                    raw_value=analyte_data.value,
+                    raw_unit=analyte_data.unit,
+                    raw_reference_range=analyte_data.reference_range,
+                    lab_comments=analyte_data.comments,
+                    flag=analyte_data.flag,
+                    normalized=False
+                )
+                db.add(result)
+                db.flush()  # Получаем ID
+                result_ids.append(result.id)
+            
+            _set_document_status(db, document, "completed")
+            apply_stats_delta(db, document.user_id, total_results=len(result_ids))
+            db.commit()
+        mark_user_write_sync(document.user_id)
         
-        document.status = "completed"
-        db.commit()
+        publish_document_event(
+            document_id, "completed", "normalizing" if result_ids else "normalized",
+            results_count=len(result_ids),
+            normalized_count=0
+        )
         
         # Запускаем нормализацию результатов асинхронно
         for result_id in result_ids:
@@ -92,41 +138,134 @@ def process_document(self, document_id: int):
             "results_count": len(result_ids),
             "result_ids": result_ids
         }
-        
+    
     except Exception as e:
+        final_attempt = self.request.retries >= self.max_retries
         if document:
-            document.status = "failed"
+            # Сбрасываем незавершенные изменения (результаты, счетчики) перед записью ошибки
+            db.rollback()
+            if final_attempt:
+                _set_document_status(db, document, "failed")
             document.error_message = str(e)
             db.commit()
+            if final_attempt:
+                publish_document_event(document_id, "failed", "error", error=str(e))
+            else:
+                # "failed" закрывает SSE-поток, а повтор еще может завершиться успешно
+                publish_document_event(
+                    document_id, "processing", "retrying",
+                    error=str(e), attempt=self.request.retries + 1
+                )
         
         # Повторяем задачу с экспоненциальной задержкой
         raise self.retry(countdown=60 * (2 ** self.request.retries), exc=e)
-        
+    
     finally:
         db.close()
 
 
+def enqueue_document_batch(document_ids: List[int]):
+    """Обработка документов пакета: одна группа задач в очереди пакетной обработки"""
+    return group(process_document.s(document_id) for document_id in document_ids).apply_async(
+        queue=settings.celery_bulk_queue
+    )
+
+
 @celery_app.task(bind=True, max_retries=2)
 def normalize_result(self, result_id: int):
     """Нормализация отдельного результата"""
     db = SessionLocal()
     try:
-        result = db.query(Result).filter(Result.id == result_id).first()
+        result = db.query(Result).options(joinedload(Result.document).joinedload(Document.user)).filter(
+            Result.id == result_id
+        ).first()
         if not result:
             raise Exception(f"Результат {result_id} не найден")
         
         normalization_service = NormalizationService(db)
-        success = normalization_service.normalize_result(result)
+        with document_span("result.normalize", result.document_id, result_id=result_id), \
+                document_profile("normalize_result", result.document_id):
+            success = normalization_service.normalize_result(result)
         
+        # При неудаче ошибка записана в processing_notes - результат тоже считается обработанным
+        db.commit()
         if success:
-            db.commit()
-            return {"status": "normalized", "result_id": result_id}
-        else:
-            return {"status": "normalization_failed", "result_id": result_id}
-            
+            mark_user_write_sync(result.document.user_id)
+        _publish_normalization_progress(db, result.document_id)
+        return {"status": "normalized" if success else "normalization_failed", "result_id": result_id}
+    
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            db.rollback()
+            _record_normalization_failure(db, result_id, str(e))
+        raise self.retry(countdown=30 * (2 ** self.request.retries), exc=e)
+    
+    finally:
+        db.close()
+
+
+def _record_normalization_failure(db, result_id: int, error: str):
+    """Последняя попытка не удалась: отмечаем результат обработанным, чтобы документ завершился"""
+    try:
+        document_id = db.query(Result.document_id).filter(Result.id == result_id).scalar()
+        if document_id is None:
+            return
+        db.query(Result).filter(Result.id == result_id, Result.processing_notes.is_(None)).update(
+            {Result.processing_notes: {"error": error}}, synchronize_session=False
+        )
+        db.commit()
+        _publish_normalization_progress(db, document_id)
+    except Exception as e:
+        logger.error(f"Failed to record normalization failure for result {result_id}: {str(e)}")
+
+
+def _publish_normalization_progress(db, document_id: int):
+    """
+    Прогресс нормализации по состоянию БД (после commit задачи).
+    Результат обработан, если он нормализован или на нем записана ошибка.
+    Последняя завершившаяся задача видит все остальные коммиты и запускает
+    дельты; если последние задачи завершились одновременно, дельты
+    запускаются дважды - пересчет идемпотентен.
+    """
+    total, done = db.query(
+        func.count(Result.id),
+        func.count(Result.id).filter(or_(Result.normalized == True, Result.processing_notes.isnot(None)))
+    ).filter(Result.document_id == document_id).one()
+    
+    stage = "normalized" if done >= total else "normalizing"
+    if stage == "normalized":
+        calculate_document_deltas.delay(document_id)
+    publish_document_event(
+        document_id, "completed", stage,
+        results_count=total,
+        normalized_count=done
+    )
+
+
+@celery_app.task(bind=True, max_retries=3)
+@document_profiled
+def calculate_document_deltas(self, document_id: int):
+    """Дельты для всех результатов документа одним запросом"""
+    db = SessionLocal()
+    try:
+        with document_span("document.deltas", document_id):
+            updated = recalculate_document_deltas(db, document_id)
+        db.commit()
+        return {"document_id": document_id, "updated": updated}
     except Exception as e:
         raise self.retry(countdown=30 * (2 ** self.request.retries), exc=e)
-        
+    finally:
+        db.close()
+
+
+@celery_app.task
+def repair_result_deltas(user_id: Optional[int] = None):
+    """Полный пересчет цепочек дельт (пользователя или всех пользователей)"""
+    db = SessionLocal()
+    try:
+        updated = recalculate_deltas(db, user_id)
+        db.commit()
+        return {"user_id": user_id, "updated": updated}
     finally:
         db.close()
 
@@ -154,24 +293,61 @@ def reprocess_document(document_id: int):
         if not document:
             return {"error": "Document not found"}
         
-        # Удаляем старые результаты
-        db.query(Result).filter(Result.document_id == document_id).delete()
+        # Удаляем старые результаты, отвязывая от них последующие в цепочках дельт
+        old_result_ids = select(Result.id).filter(Result.document_id == document_id)
+        analyte_ids = [
+            analyte_id for (analyte_id,) in db.query(Result.analyte_id).filter(
+                Result.document_id == document_id,
+                Result.analyte_id.isnot(None)
+            ).distinct()
+        ]
+        db.query(Result).filter(Result.previous_result_id.in_(old_result_ids)).update(
+            {Result.previous_result_id: None}, synchronize_session=False
+        )
+        deleted = db.query(Result).filter(Result.document_id == document_id).delete()
+        apply_stats_delta(db, document.user_id, total_results=-deleted)
+        if analyte_ids:
+            recalculate_deltas(db, document.user_id, analyte_ids)
         
         # Сбрасываем статус документа
-        document.status = "pending"
+        _set_document_status(db, document, "pending")
         document.error_message = None
         document.raw_extracted_data = None
         db.commit()
+        publish_document_event(document_id, "pending", "queued")
         
         # Запускаем обработку заново
         process_document.delay(document_id)
         
         return {"status": "reprocessing_started", "document_id": document_id}
-        
+    
+    finally:
+        db.close()
+
+
+@celery_app.task
+def rebuild_stats(user_id: int):
+    """Сверка счетчиков user_stats с фактическими данными"""
+    db = SessionLocal()
+    try:
+        return rebuild_user_stats(db, user_id)
     finally:
         db.close()
 
 
+@celery_app.task
+def rebuild_all_stats():
+    """Периодическая сверка счетчиков всех пользователей (celery beat)"""
+    db = SessionLocal()
+    try:
+        user_ids = db.scalars(select(User.id)).all()
+    finally:
+        db.close()
+    
+    group(rebuild_stats.s(user_id) for user_id in user_ids).apply_async(queue=settings.celery_bulk_queue)
+    return {"users": len(user_ids)}
+
+
 @celery_app.task
 def cleanup_old_tasks():
     """Очистка старых задач и результатов"""
@@ -182,4 +358,9 @@ def cleanup_old_tasks():
 @celery_app.task
 def health_check():
     """Проверка работоспособности воркеров"""
-    return {"status": "healthy", "worker_id": current_task.request.id}
\ No newline at end of file
+    blob_cache = get_blob_cache()
+    return {
+        "status": "healthy",
+        "worker_id": current_task.request.id,
+        "blob_cache": blob_cache.stats() if blob_cache is not None else None
+    }
\ No newline at end of file
@@ -0,0 +1,113 @@
+"""
+Распределенная трассировка (OpenTelemetry).
+
+По умолчанию выключена: tracer из opentelemetry-api без настроенного
+провайдера ничего не делает, поэтому спаны в коде почти бесплатны.
+При otel_enabled процесс (API или воркер) настраивает провайдер,
+экспортер (OTLP или JSON-файл) и автоинструментацию FastAPI, SQLAlchemy,
+botocore (S3), Redis и Celery. Инструментация Celery переносит контекст
+трассы в заголовках задачи, поэтому upload -> process_document ->
+normalize_result - одна трасса.
+
+Спаны этапов обработки документа помечены атрибутом labtrack.document_id:
+разбивка по этапам для документа - один поиск по тегу в Jaeger/Tempo
+или scripts/trace_breakdown.py для файлового экспортера.
+"""
+import json
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional, Sequence
+
+from opentelemetry import trace
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_ID_ATTRIBUTE = "labtrack.document_id"
+
+tracer = trace.get_tracer("labtrack")
+_configured = False
+
+
+@contextmanager
+def document_span(name: str, document_id: Optional[int], **attributes: Any) -> Iterator[trace.Span]:
+    """Спан этапа обработки документа"""
+    with tracer.start_as_current_span(name) as span:
+        if document_id is not None:
+            span.set_attribute(DOCUMENT_ID_ATTRIBUTE, document_id)
+        for key, value in attributes.items():
+            if value is not None:
+                span.set_attribute(f"labtrack.{key}", value)
+        yield span
+
+
+def tag_document(document_id: int):
+    """Помечает текущий спан (HTTP-запрос, задача Celery) идентификатором документа"""
+    trace.get_current_span().set_attribute(DOCUMENT_ID_ATTRIBUTE, document_id)
+
+
+def _file_exporter(path: str):
+    from opentelemetry.sdk.trace.export import SpanExporter, SpanExportResult
+    
+    class JsonLinesSpanExporter(SpanExporter):
+        """Пишет спаны в файл по одному JSON на строку"""
+        
+        def __init__(self, file_path: str):
+            self.file_path = file_path
+            self._lock = threading.Lock()
+        
+        def export(self, spans) -> SpanExportResult:
+            lines = [json.dumps(json.loads(span.to_json()), ensure_ascii=False) for span in spans]
+            with self._lock, open(self.file_path, "a", encoding="utf-8") as f:
+                f.write("\n".join(lines) + "\n")
+            return SpanExportResult.SUCCESS
+    
+    return JsonLinesSpanExporter(path)
+
+
+def _exporter():
+    if settings.otel_exporter == "file":
+        return _file_exporter(settings.otel_file_path)
+    if settings.otel_exporter == "console":
+        from opentelemetry.sdk.trace.export import ConsoleSpanExporter
+        return ConsoleSpanExporter()
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+    return OTLPSpanExporter(endpoint=f"{settings.otel_exporter_otlp_endpoint.rstrip('/')}/v1/traces")
+
+
+def configure_tracing(service_name: str, app=None, engines: Sequence[Any] = ()) -> bool:
+    """Настраивает трассировку процесса; True, если она включена"""
+    global _configured
+    if not settings.otel_enabled or _configured:
+        return _configured
+    
+    from opentelemetry.instrumentation.botocore import BotocoreInstrumentor
+    from opentelemetry.instrumentation.celery import CeleryInstrumentor
+    from opentelemetry.instrumentation.redis import RedisInstrumentor
+    from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+    from opentelemetry.sdk.resources import Resource
+    from opentelemetry.sdk.trace import TracerProvider
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor
+    from opentelemetry.sdk.trace.sampling import ParentBasedTraceIdRatio
+    
+    provider = TracerProvider(
+        resource=Resource.create({"service.name": service_name, "deployment.environment": settings.environment}),
+        sampler=ParentBasedTraceIdRatio(settings.otel_sample_ratio)
+    )
+    provider.add_span_processor(BatchSpanProcessor(_exporter()))
+    trace.set_tracer_provider(provider)
+    
+    if app is not None:
+        from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
+        FastAPIInstrumentor.instrument_app(app, excluded_urls="health,metrics")
+    SQLAlchemyInstrumentor().instrument(engines=[getattr(e, "sync_engine", e) for e in engines])
+    BotocoreInstrumentor().instrument()
+    RedisInstrumentor().instrument()
+    # Публикация задач (API) и их выполнение (воркер): контекст идет в заголовках Celery
+    CeleryInstrumentor().instrument()
+    
+    _configured = True
+    logger.info(f"Tracing enabled for {service_name}: exporter={settings.otel_exporter}")
+    return True
\ No newline at end of file
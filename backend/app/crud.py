@@ -6,6 +6,8 @@ from sqlalchemy.orm import Session
 from sqlalchemy import desc
 
 from app.models import User, Document, Analyte, Result, AnalyteMapping
+from app.core.cache import analyte_cache
+from app.services.stats_service import apply_stats_delta, get_user_stats, status_change_deltas
 from app.schemas.base import (
     UserCreate, UserUpdate,
     DocumentCreate, DocumentUpdate, 
@@ -51,6 +53,7 @@ def get_documents(db: Session, user_id: int = 1, skip: int = 0, limit: int = 100
 def create_document(db: Session, document: DocumentCreate) -> Document:
     db_document = Document(**document.model_dump())
     db.add(db_document)
+    apply_stats_delta(db, db_document.user_id, total_documents=1, pending_documents=1)
     db.commit()
     db.refresh(db_document)
     return db_document
@@ -58,7 +61,12 @@ def create_document(db: Session, document: DocumentCreate) -> Document:
 def update_document(db: Session, document_id: int, document: DocumentUpdate) -> Optional[Document]:
     db_document = get_document(db, document_id)
     if db_document:
-        for key, value in document.model_dump(exclude_unset=True).items():
+        update_data = document.model_dump(exclude_unset=True)
+        if "status" in update_data:
+            apply_stats_delta(
+                db, db_document.user_id, **status_change_deltas(db_document.status, update_data["status"])
+            )
+        for key, value in update_data.items():
             setattr(db_document, key, value)
         db.commit()
         db.refresh(db_document)
@@ -83,6 +91,7 @@ def create_analyte(db: Session, analyte: AnalyteCreate) -> Analyte:
     db.add(db_analyte)
     db.commit()
     db.refresh(db_analyte)
+    analyte_cache.invalidate_sync()
     return db_analyte
 
 def update_analyte(db: Session, analyte_id: int, analyte: AnalyteUpdate) -> Optional[Analyte]:
@@ -92,6 +101,7 @@ def update_analyte(db: Session, analyte_id: int, analyte: AnalyteUpdate) -> Opti
             setattr(db_analyte, key, value)
         db.commit()
         db.refresh(db_analyte)
+        analyte_cache.invalidate_sync()
     return db_analyte
 
 # Result CRUD
@@ -118,6 +128,9 @@ def get_results(db: Session,
 def create_result(db: Session, result: ResultCreate) -> Result:
     db_result = Result(**result.model_dump())
     db.add(db_result)
+    document = get_document(db, db_result.document_id)
+    if document:
+        apply_stats_delta(db, document.user_id, total_results=1)
     db.commit()
     db.refresh(db_result)
     return db_result
@@ -133,16 +146,4 @@ def update_result(db: Session, result_id: int, result: ResultUpdate) -> Optional
 
 # Statistics
 def get_stats(db: Session, user_id: int = 1) -> dict:
-    return {
-        "total_documents": db.query(Document).filter(Document.user_id == user_id).count(),
-        "total_results": db.query(Result).join(Document).filter(Document.user_id == user_id).count(),
-        "total_analytes": db.query(Analyte).filter(Analyte.is_active == True).count(),
-        "processed_documents": db.query(Document).filter(
-            Document.user_id == user_id,
-            Document.status == "completed"
-        ).count(),
-        "pending_documents": db.query(Document).filter(
-            Document.user_id == user_id,
-            Document.status == "pending"
-        ).count()
-    }
\ No newline at end of file
+    return get_user_stats(db, user_id)
\ No newline at end of file
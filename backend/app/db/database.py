@@ -1,17 +1,52 @@
-from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, AsyncSession
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.db.pool import create_db_engine, create_async_db_engine
 
-engine = create_engine(settings.database_url)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Единственный синхронный движок процесса (API-скрипты и Celery-воркеры) -
+# привязка SessionLocal; получать через get_engine(), воркер его заменяет
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=create_db_engine("api"))
+
+# Асинхронный движок (asyncpg) для обработчиков API
+async_engine = create_async_db_engine("api_async")
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
 
 Base = declarative_base()
 
 
+def get_engine() -> Engine:
+    """Текущий синхронный движок процесса"""
+    return SessionLocal.kw["bind"]
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+def configure_worker_engine():
+    """
+    Вызывается в каждом процессе Celery после fork: пул родителя
+    не переиспользуется, размер пула рассчитан на одну задачу за раз.
+    """
+    get_engine().dispose(close=False)
+    SessionLocal.configure(bind=create_db_engine(
+        "worker",
+        pool_size=settings.worker_db_pool_size,
+        max_overflow=settings.worker_db_max_overflow
+    ))
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,201 @@
+"""
+Фабрика движков SQLAlchemy с настраиваемым пулом соединений.
+
+Один и тот же код создает движки для API (sync и asyncpg) и для
+Celery-воркеров. Параметры пула берутся из Settings, в режиме PgBouncer
+(transaction pooling) используется NullPool и отключаются серверные
+prepared statements.
+"""
+import threading
+import time
+import uuid
+from typing import Any, Dict, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core.config import settings
+
+
+class PoolMetrics:
+    """Счетчики пула: выдачи/возвраты соединений и время ожидания свободного"""
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connects = 0
+        self.checkouts = 0
+        self.checkins = 0
+        self.invalidations = 0
+        self.wait_count = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+    
+    def record_wait(self, elapsed_ms: float):
+        with self._lock:
+            self.wait_count += 1
+            self.wait_total_ms += elapsed_ms
+            self.wait_max_ms = max(self.wait_max_ms, elapsed_ms)
+    
+    def increment(self, counter: str):
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "connects": self.connects,
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "in_use": self.checkouts - self.checkins,
+                "invalidations": self.invalidations,
+                "wait_avg_ms": round(self.wait_total_ms / self.wait_count, 3) if self.wait_count else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+            }
+
+
+class _TimedGetMixin:
+    """Замеряет время получения соединения из пула (включая ожидание в очереди)"""
+    
+    metrics: Optional[PoolMetrics] = None
+    
+    def recreate(self):
+        # dispose() пересоздает пул - метрики переносим на новый экземпляр
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+    
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait((time.perf_counter() - started) * 1000)
+
+
+class InstrumentedQueuePool(_TimedGetMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_TimedGetMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+class InstrumentedNullPool(_TimedGetMixin, NullPool):
+    pass
+
+
+# Метрики всех созданных движков по имени (api, api_async, worker)
+pool_metrics: Dict[str, PoolMetrics] = {}
+_engines: Dict[str, Any] = {}
+
+
+def _pool_kwargs(pool_class, pool_size: Optional[int], max_overflow: Optional[int]) -> Dict[str, Any]:
+    if settings.db_pgbouncer_mode:
+        return {"poolclass": pool_class["null"]}
+    
+    return {
+        "poolclass": pool_class["queue"],
+        "pool_size": pool_size if pool_size is not None else settings.db_pool_size,
+        "max_overflow": max_overflow if max_overflow is not None else settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+
+def _attach_metrics(name: str, sync_engine: Engine) -> PoolMetrics:
+    metrics = PoolMetrics()
+    sync_engine.pool.metrics = metrics
+    
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.increment("connects")
+    
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.increment("checkouts")
+    
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.increment("checkins")
+    
+    @event.listens_for(sync_engine, "invalidate")
+    def _on_invalidate(dbapi_connection, connection_record, exception):
+        metrics.increment("invalidations")
+    
+    pool_metrics[name] = metrics
+    return metrics
+
+
+def create_db_engine(
+    name: str = "api",
+    url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None
+) -> Engine:
+    """Создает синхронный движок (psycopg2) с пулом из настроек"""
+    engine = create_engine(
+        url or settings.database_url,
+        **_pool_kwargs(
+            {"queue": InstrumentedQueuePool, "null": InstrumentedNullPool},
+            pool_size,
+            max_overflow
+        )
+    )
+    _attach_metrics(name, engine)
+    _engines[name] = engine
+    return engine
+
+
+def create_async_db_engine(
+    name: str = "api_async",
+    url: Optional[str] = None,
+    pool_size: Optional[int] = None,
+    max_overflow: Optional[int] = None
+) -> AsyncEngine:
+    """Создает асинхронный движок (asyncpg) с пулом из настроек"""
+    url = make_url(url or settings.async_database_url)
+    connect_args = {}
+    if settings.db_pgbouncer_mode:
+        # PgBouncer в transaction-режиме не поддерживает именованные prepared statements:
+        # отключаем кэши asyncpg/SQLAlchemy и делаем имена уникальными
+        url = url.update_query_dict({"prepared_statement_cache_size": "0"})
+        connect_args = {
+            "statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    
+    engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        **_pool_kwargs(
+            {"queue": InstrumentedAsyncQueuePool, "null": InstrumentedNullPool},
+            pool_size,
+            max_overflow
+        )
+    )
+    _attach_metrics(name, engine.sync_engine)
+    _engines[name] = engine
+    return engine
+
+
+def get_pool_stats() -> Dict[str, Dict[str, Any]]:
+    """Метрики и текущее состояние пулов всех движков процесса"""
+    stats = {}
+    for name, engine in _engines.items():
+        sync_engine = getattr(engine, "sync_engine", engine)
+        pool = sync_engine.pool
+        pool_state = {"pool_class": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            pool_state.update({
+                "size": pool.size(),
+                "checked_out": pool.checkedout(),
+                "overflow": pool.overflow(),
+                "checked_in": pool.checkedin(),
+            })
+        metrics = pool_metrics.get(name)
+        stats[name] = {**pool_state, **(metrics.snapshot() if metrics else {})}
+    return stats
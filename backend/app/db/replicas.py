@@ -0,0 +1,185 @@
+"""
+Маршрутизация аналитических чтений на реплики PostgreSQL.
+
+Реплика выбирается по кругу среди тех, чье отставание не превышает
+replica_max_lag_seconds; если подходящих нет - используется primary.
+После собственной записи пользователя (загрузка, правка) его чтения
+в течение read_your_writes_window секунд идут на primary.
+"""
+import itertools
+import logging
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import redis
+import redis.asyncio as aioredis
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.db.pool import create_db_engine, create_async_db_engine
+
+logger = logging.getLogger(__name__)
+
+# Отставание реплики в секундах; 0, если все полученные WAL уже применены
+REPLICA_LAG_SQL = text("""
+    SELECT CASE
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+
+def _last_write_key(user_id: int) -> str:
+    return f"labtrack:user:{user_id}:last_write"
+
+
+class ReplicaRouter:
+    def __init__(self, replica_urls: List[str]):
+        self.replica_urls = replica_urls
+        self._sync_engines: Dict[int, Engine] = {}
+        self._async_engines: Dict[int, AsyncEngine] = {}
+        # index -> (время проверки, отставание или None если реплика недоступна)
+        self._lag_cache: Dict[int, Tuple[float, Optional[float]]] = {}
+        self._round_robin = itertools.cycle(range(len(replica_urls))) if replica_urls else None
+        self._lock = threading.Lock()
+    
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replica_urls)
+    
+    def _sync_engine(self, index: int) -> Engine:
+        with self._lock:
+            if index not in self._sync_engines:
+                self._sync_engines[index] = create_db_engine(f"replica_{index}", url=self.replica_urls[index])
+            return self._sync_engines[index]
+    
+    def _async_engine(self, index: int) -> AsyncEngine:
+        with self._lock:
+            if index not in self._async_engines:
+                self._async_engines[index] = create_async_db_engine(
+                    f"replica_{index}_async",
+                    url=settings.to_async_url(self.replica_urls[index])
+                )
+            return self._async_engines[index]
+    
+    def _candidates(self) -> List[int]:
+        """Порядок обхода реплик, начиная со следующей по кругу"""
+        with self._lock:
+            start = next(self._round_robin)
+        count = len(self.replica_urls)
+        return [(start + offset) % count for offset in range(count)]
+    
+    def _cached_lag(self, index: int) -> Tuple[bool, Optional[float]]:
+        checked_at, lag = self._lag_cache.get(index, (0.0, None))
+        fresh = time.monotonic() - checked_at < settings.replica_lag_check_interval
+        return fresh, lag
+    
+    def _is_acceptable(self, lag: Optional[float]) -> bool:
+        return lag is not None and lag <= settings.replica_max_lag_seconds
+    
+    def choose_sync_engine(self) -> Optional[Engine]:
+        """Синхронная реплика с допустимым отставанием или None (primary)"""
+        if not self.enabled:
+            return None
+        
+        for index in self._candidates():
+            fresh, lag = self._cached_lag(index)
+            if not fresh:
+                try:
+                    with self._sync_engine(index).connect() as connection:
+                        lag = float(connection.execute(REPLICA_LAG_SQL).scalar() or 0)
+                except SQLAlchemyError as e:
+                    logger.warning(f"Replica {index} is unavailable: {str(e)}")
+                    lag = None
+                self._lag_cache[index] = (time.monotonic(), lag)
+            if self._is_acceptable(lag):
+                return self._sync_engine(index)
+        return None
+    
+    async def choose_async_engine(self) -> Optional[AsyncEngine]:
+        """Асинхронная реплика с допустимым отставанием или None (primary)"""
+        if not self.enabled:
+            return None
+        
+        for index in self._candidates():
+            fresh, lag = self._cached_lag(index)
+            if not fresh:
+                try:
+                    async with self._async_engine(index).connect() as connection:
+                        lag = float((await connection.execute(REPLICA_LAG_SQL)).scalar() or 0)
+                except (SQLAlchemyError, OSError) as e:
+                    logger.warning(f"Replica {index} is unavailable: {str(e)}")
+                    lag = None
+                self._lag_cache[index] = (time.monotonic(), lag)
+            if self._is_acceptable(lag):
+                return self._async_engine(index)
+        return None
+    
+    def status(self) -> List[dict]:
+        replicas = []
+        for index in range(len(self.replica_urls)):
+            _, lag = self._cached_lag(index)
+            replicas.append({
+                "replica": index,
+                "lag_seconds": lag,
+                "available": self._is_acceptable(lag)
+            })
+        return replicas
+
+
+replica_router = ReplicaRouter(settings.database_replica_urls)
+
+_sync_redis: Optional[redis.Redis] = None
+_async_redis: Optional[aioredis.Redis] = None
+
+
+def _get_sync_redis() -> redis.Redis:
+    global _sync_redis
+    if _sync_redis is None:
+        _sync_redis = redis.Redis.from_url(settings.redis_url)
+    return _sync_redis
+
+
+def _get_async_redis() -> aioredis.Redis:
+    global _async_redis
+    if _async_redis is None:
+        _async_redis = aioredis.from_url(settings.redis_url)
+    return _async_redis
+
+
+def mark_user_write_sync(user_id: int) -> None:
+    """Отмечает запись пользователя: его чтения временно идут на primary"""
+    if not replica_router.enabled:
+        return
+    try:
+        _get_sync_redis().set(_last_write_key(user_id), 1, ex=settings.read_your_writes_window)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to mark write for user {user_id}: {str(e)}")
+
+
+async def mark_user_write(user_id: int) -> None:
+    if not replica_router.enabled:
+        return
+    try:
+        await _get_async_redis().set(_last_write_key(user_id), 1, ex=settings.read_your_writes_window)
+    except redis.RedisError as e:
+        logger.warning(f"Failed to mark write for user {user_id}: {str(e)}")
+
+
+def has_recent_write_sync(user_id: int) -> bool:
+    try:
+        return bool(_get_sync_redis().exists(_last_write_key(user_id)))
+    except redis.RedisError:
+        # Без Redis не можем гарантировать read-your-writes - читаем с primary
+        return True
+
+
+async def has_recent_write(user_id: int) -> bool:
+    try:
+        return bool(await _get_async_redis().exists(_last_write_key(user_id)))
+    except redis.RedisError:
+        return True
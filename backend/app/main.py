@@ -1,35 +1,113 @@
-from fastapi import FastAPI
+"""
+Точка входа API: uvicorn app.main:app (или --factory app.main:create_app).
+
+Набор роутеров задается настройкой api_routers, модули роутеров
+импортируются только для включенных. Тяжелые зависимости (Celery,
+openai, boto3, pint) подгружаются при первом использовании, а не при
+старте процесса - проверка: python benchmarks/import_time.py.
+"""
+import asyncio
+import importlib
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import APIRouter, FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from app.api.endpoints import documents, results, analytes
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+from app.core.clients import init_storage
 from app.core.config import settings
+from app.core.sql_metrics import SQLMetricsMiddleware
+from app.core.tracing import configure_tracing
+from app.db.database import async_engine, get_engine
+from app.db.pool import get_pool_stats
+from app.db.replicas import replica_router
 
-app = FastAPI(
-    title="LabTrack API",
-    description="Медицинский трекер анализов - API для загрузки, обработки и анализа медицинских документов",
-    version="1.0.0"
-)
-
-# CORS настройки
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["http://localhost:3000", "http://127.0.0.1:3000"],  # React dev server
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
-)
+# Роутеры API: имя -> (модуль, префикс, теги)
+ROUTERS: Dict[str, Tuple[str, str, List[str]]] = {
+    "documents": ("app.api.endpoints.documents", "/api/v1/documents", ["documents"]),
+    "results": ("app.api.endpoints.results", "/api/v1/results", ["results"]),
+    "analytes": ("app.api.endpoints.analytes", "/api/v1/analytes", ["analytes"]),
+    "crud": ("app.api.endpoints.crud", "", ["crud"]),
+}
 
-# API роуты
-app.include_router(documents.router, prefix="/api/v1/documents", tags=["documents"])
-app.include_router(results.router, prefix="/api/v1/results", tags=["results"])
-app.include_router(analytes.router, prefix="/api/v1/analytes", tags=["analytes"])
+health_router = APIRouter()
 
 
-@app.get("/")
+@health_router.get("/")
 async def root():
     return {"message": "LabTrack API v1.0.0", "status": "healthy"}
 
 
-@app.get("/health")
+@health_router.get("/health")
 async def health_check():
-    return {"status": "healthy", "environment": settings.environment}
\ No newline at end of file
+    return {"status": "healthy", "environment": settings.environment}
+
+
+@health_router.get("/health/db-pool")
+async def db_pool_stats():
+    """Состояние пулов соединений с БД и время ожидания соединения"""
+    return {"pgbouncer_mode": settings.db_pgbouncer_mode, "pools": get_pool_stats()}
+
+
+@health_router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Метрики Prometheus"""
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+@health_router.get("/health/db-replicas")
+async def db_replicas_status():
+    """Отставание реплик по последней проверке и их доступность для чтений"""
+    return {"enabled": replica_router.enabled, "replicas": replica_router.status()}
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Клиент S3 и проверка бакета - один раз на процесс, а не на каждую загрузку
+    await asyncio.to_thread(init_storage)
+    yield
+    from app.services.storage import get_storage
+    await get_storage().close()
+
+
+def create_app(routers: Optional[List[str]] = None) -> FastAPI:
+    """Собирает приложение с роутерами из api_routers (или переданного списка)"""
+    app = FastAPI(
+        title="LabTrack API",
+        description="Медицинский трекер анализов - API для загрузки, обработки и анализа медицинских документов",
+        version="1.0.0",
+        lifespan=lifespan
+    )
+    
+    # CORS настройки
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=settings.cors_origins,
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+        expose_headers=["Server-Timing"],
+    )
+    app.add_middleware(SQLMetricsMiddleware)
+    configure_tracing(settings.otel_service_name, app=app, engines=[get_engine(), async_engine])
+    
+    app.include_router(health_router)
+    for name in settings.api_routers if routers is None else routers:
+        if name not in ROUTERS:
+            raise ValueError(f"Unknown router in api_routers: {name}")
+        module_name, prefix, tags = ROUTERS[name]
+        app.include_router(importlib.import_module(module_name).router, prefix=prefix, tags=tags)
+    
+    if settings.profiling_enabled:
+        from app.api.endpoints import debug
+        app.include_router(debug.router, prefix="/api/v1/debug", tags=["debug"], include_in_schema=False)
+    
+    return app
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -1,7 +1,7 @@
 # Импортируем модели без relationship для избежания циклических зависимостей
-from app.models.user import User
+from app.models.user import User, UserStats
 from app.models.document import Document
-from app.models.analyte import Analyte, AnalyteMapping
+from app.models.analyte import Analyte, AnalyteMapping, UnitConversionRule
 from app.models.result import Result
 
-__all__ = ["User", "Document", "Analyte", "AnalyteMapping", "Result"]
\ No newline at end of file
+__all__ = ["User", "UserStats", "Document", "Analyte", "AnalyteMapping", "UnitConversionRule", "Result"]
\ No newline at end of file
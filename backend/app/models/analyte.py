@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, JSON, Boolean, Numeric
+from sqlalchemy import Column, Integer, String, Text, JSON, Boolean, Numeric, DateTime
+from sqlalchemy.sql import func
 from app.db.database import Base
 
 
@@ -29,4 +30,22 @@ class AnalyteMapping(Base):
     analyte_id = Column(Integer, nullable=False, index=True)
     lab_name = Column(String, nullable=True)  # Специфично для лаборатории
     confidence_score = Column(Numeric(3, 2), default=1.0)  # Уверенность в маппинге
-    is_validated = Column(Boolean, default=False)  # Проверено человеком
\ No newline at end of file
+    is_validated = Column(Boolean, default=False)  # Проверено человеком
+
+
+class UnitConversionRule(Base):
+    """
+    Правило приведения единиц. analyte_code = NULL - правило для любого аналита
+    (синоним единицы), lab_name - переопределение для конкретной лаборатории.
+    """
+    __tablename__ = "unit_conversion_rules"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    analyte_code = Column(String, nullable=True, index=True)
+    source_unit = Column(String, nullable=False)  # Хранится в нижнем регистре
+    target_unit = Column(String, nullable=False)
+    factor = Column(Numeric(18, 9), nullable=True)  # target = source * factor
+    molar_mass = Column(Numeric(12, 4), nullable=True)  # г/моль, если factor не задан
+    lab_name = Column(String, nullable=True)
+    is_active = Column(Boolean, default=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
\ No newline at end of file
@@ -1,11 +1,15 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, ForeignKey, JSON, Index
 from sqlalchemy.sql import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred
 from app.db.database import Base
 
 
 class Document(Base):
     __tablename__ = "documents"
+    __table_args__ = (
+        # Список документов пользователя, отсортированный по дате загрузки
+        Index("ix_documents_user_id_created_at", "user_id", "created_at"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     user_id = Column(Integer, ForeignKey("users.id"), default=1)  # Дефолтный пользователь для v1
@@ -14,6 +18,10 @@ class Document(Base):
     file_path = Column(String, nullable=False)  # Путь в S3
     file_size = Column(Integer)
     mime_type = Column(String)
+    batch_id = Column(String(32), nullable=True, index=True)  # Пакетная загрузка (POST /documents/batch)
+    # Результат проверки по содержимому: тип, путь извлечения, страницы, размеры
+    file_info = Column(JSON, nullable=True)
+    extraction_method = Column(String(32), nullable=True)  # text_layer, vision, text_layer+vision, text, spreadsheet
     
     status = Column(String, default="pending")  # pending, processing, completed, failed
     error_message = Column(Text, nullable=True)
@@ -21,10 +29,12 @@ class Document(Base):
     # Метаданные извлеченные LLM
     lab_name = Column(String, nullable=True)
     report_date = Column(DateTime(timezone=True), nullable=True)
-    raw_extracted_data = Column(JSON, nullable=True)  # Сырые данные от LLM
+    # Сырые данные от LLM (десятки KB) - загружаются только по явному обращению
+    raw_extracted_data = deferred(Column(JSON, nullable=True))
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     # Связи
+    user = relationship("User")
     results = relationship("Result", back_populates="document")
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, Numeric
+from sqlalchemy import Column, Integer, String, DateTime, Text, Boolean, ForeignKey, JSON, Numeric, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.database import Base
@@ -8,8 +8,8 @@ class Result(Base):
     __tablename__ = "results"
     
     id = Column(Integer, primary_key=True, index=True)
-    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False)
-    analyte_id = Column(Integer, ForeignKey("analytes.id"), nullable=True)  # Может быть NULL если не смаплено
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    analyte_id = Column(Integer, ForeignKey("analytes.id"), nullable=True, index=True)  # Может быть NULL если не смаплено
     
     # Исходные данные из документа
     source_label = Column(String, nullable=False)  # Название показателя как в документе
@@ -28,6 +28,8 @@ class Result(Base):
     is_out_of_range = Column(Boolean, nullable=True)
     flag = Column(String, nullable=True)  # H, L, N и т.д.
     is_suspect = Column(Boolean, default=False)  # >10x от референса
+    range_position = Column(Numeric(12, 4), nullable=True)  # 0 = нижняя граница, 1 = верхняя
+    relative_deviation = Column(Numeric(12, 4), nullable=True)  # Выход за границу в долях границы, со знаком
     normalized = Column(Boolean, default=False)  # Успешно нормализовано
     
     # Связь с предыдущим результатом для расчета дельт
@@ -43,4 +45,13 @@ class Result(Base):
     
     # Связи
     document = relationship("Document", back_populates="results")
-    analyte = relationship("Analyte")
\ No newline at end of file
+    analyte = relationship("Analyte")
+
+
+# "Самые отклоняющиеся результаты": внутри документа - обход индекса без сортировки,
+# по пользователю - сортировка только результатов его документов
+Index(
+    "ix_results_document_id_abs_relative_deviation",
+    Result.document_id,
+    func.abs(Result.relative_deviation).desc().nulls_last()
+)
\ No newline at end of file
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Date, DateTime, Boolean, ForeignKey
 from sqlalchemy.sql import func
 from app.db.database import Base
 
@@ -9,5 +9,21 @@ class User(Base):
     id = Column(Integer, primary_key=True, index=True)
     email = Column(String, unique=True, index=True, nullable=True)  # Для будущих версий
     is_active = Column(Boolean, default=True)
+    
+    # Для подбора референсных интервалов
+    sex = Column(String, nullable=True)  # male, female
+    birth_date = Column(Date, nullable=True)
+    
     created_at = Column(DateTime(timezone=True), server_default=func.now())
-    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class UserStats(Base):
+    """Счетчики для /stats, поддерживаются инкрементально пайплайном"""
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_documents = Column(Integer, nullable=False, default=0)
+    processed_documents = Column(Integer, nullable=False, default=0)
+    pending_documents = Column(Integer, nullable=False, default=0)
+    total_results = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
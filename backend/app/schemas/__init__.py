@@ -1,14 +1,16 @@
 # Используем упрощенные схемы без forward references
 from app.schemas.base import (
     User, UserCreate, UserUpdate,
-    Document, DocumentCreate, DocumentUpdate, DocumentWithResults,
+    Document, DocumentCreate, DocumentUpdate, DocumentWithResults, DocumentRawExtraction,
+    DocumentUploadRequest, DocumentUploadTicket, DocumentUploadComplete, DocumentBatch, DocumentBatchStatus,
     Analyte, AnalyteCreate, AnalyteUpdate, AnalyteMapping, AnalyteMappingCreate,
     Result, ResultCreate, ResultUpdate, ResultWithAnalyte
 )
 
 __all__ = [
     "User", "UserCreate", "UserUpdate",
-    "Document", "DocumentCreate", "DocumentUpdate", "DocumentWithResults",
+    "Document", "DocumentCreate", "DocumentUpdate", "DocumentWithResults", "DocumentRawExtraction",
+    "DocumentUploadRequest", "DocumentUploadTicket", "DocumentUploadComplete", "DocumentBatch", "DocumentBatchStatus",
     "Analyte", "AnalyteCreate", "AnalyteUpdate",
     "AnalyteMapping", "AnalyteMappingCreate",
     "Result", "ResultCreate", "ResultUpdate", "ResultWithAnalyte"
@@ -1,8 +1,8 @@
 from __future__ import annotations
 
 from pydantic import BaseModel
-from datetime import datetime
-from typing import Optional, Any, List, Dict
+from datetime import date, datetime
+from typing import Optional, Any, List, Dict, Literal
 from decimal import Decimal
 
 
@@ -10,6 +10,8 @@ from decimal import Decimal
 class UserBase(BaseModel):
     email: Optional[str] = None
     is_active: bool = True
+    sex: Optional[Literal["male", "female"]] = None
+    birth_date: Optional[date] = None
 
 
 class User(UserBase):
@@ -27,6 +29,8 @@ class UserCreate(UserBase):
 class UserUpdate(BaseModel):
     email: Optional[str] = None
     is_active: Optional[bool] = None
+    sex: Optional[Literal["male", "female"]] = None
+    birth_date: Optional[date] = None
 
 
 # Схемы для аналитов
@@ -92,9 +96,11 @@ class Document(DocumentBase):
     file_path: str
     file_size: Optional[int] = None
     mime_type: Optional[str] = None
+    batch_id: Optional[str] = None
+    file_info: Optional[Dict[str, Any]] = None
+    extraction_method: Optional[str] = None
     status: str = "pending"
     error_message: Optional[str] = None
-    raw_extracted_data: Optional[Dict[str, Any]] = None
     created_at: datetime
     updated_at: Optional[datetime] = None
     
@@ -102,6 +108,14 @@ class Document(DocumentBase):
         from_attributes = True
 
 
+class DocumentRawExtraction(BaseModel):
+    id: int
+    raw_extracted_data: Optional[Dict[str, Any]] = None
+    
+    class Config:
+        from_attributes = True
+
+
 class DocumentCreate(DocumentBase):
     user_id: int = 1  # По умолчанию для v1
     file_path: Optional[str] = None
@@ -117,6 +131,45 @@ class DocumentUpdate(BaseModel):
     raw_extracted_data: Optional[Dict[str, Any]] = None
 
 
+class DocumentUploadRequest(BaseModel):
+    """Запрос на прямую загрузку файла в S3"""
+    filename: str
+    content_type: str
+    size: int
+    md5: Optional[str] = None  # base64 MD5 содержимого (Content-MD5), проверяется хранилищем
+
+
+class DocumentUploadTicket(BaseModel):
+    upload_id: str
+    url: str
+    fields: Dict[str, str]  # Поля формы presigned POST, файл передается последним полем "file"
+    expires_in: int
+
+
+class DocumentUploadComplete(BaseModel):
+    upload_id: str
+    lab_name: Optional[str] = None
+    report_date: Optional[str] = None
+
+
+class DocumentBatch(BaseModel):
+    """Результат пакетной загрузки"""
+    batch_id: str
+    documents: List[Document]
+    skipped: List[Dict[str, str]] = []  # Файлы, не прошедшие проверку: filename, reason
+
+
+class DocumentBatchStatus(BaseModel):
+    batch_id: str
+    total: int
+    pending: int
+    processing: int
+    completed: int  # Данные извлечены, нормализация может еще идти
+    normalized: int  # Из completed: все результаты обработаны нормализацией
+    failed: int
+    progress: float  # Доля готовых документов: normalized + failed
+
+
 # Схемы результатов (без связи с Documents)
 class ResultBase(BaseModel):
     source_label: str
@@ -138,6 +191,8 @@ class Result(ResultBase):
     is_out_of_range: Optional[bool] = None
     flag: Optional[str] = None
     is_suspect: bool = False
+    range_position: Optional[Decimal] = None
+    relative_deviation: Optional[Decimal] = None
     normalized: bool = False
     previous_result_id: Optional[int] = None
     delta_value: Optional[Decimal] = None
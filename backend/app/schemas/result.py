@@ -49,6 +49,8 @@ class Result(ResultBase):
     is_out_of_range: Optional[bool]
     flag: Optional[str]
     is_suspect: bool
+    range_position: Optional[Decimal] = None
+    relative_deviation: Optional[Decimal] = None
     normalized: bool
     previous_result_id: Optional[int]
     delta_value: Optional[Decimal]
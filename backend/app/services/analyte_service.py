@@ -1,22 +1,79 @@
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import or_, func
+from sqlalchemy import select, or_, func
+from sqlalchemy.sql import Select
 from typing import List, Optional
 from app.models.analyte import Analyte, AnalyteMapping
 from app.schemas.analyte import AnalyteCreate, AnalyteUpdate
+from app.core.cache import analyte_cache
+
+
+def _exact_mappings_query(source_label: str, lab_name: Optional[str] = None) -> Select:
+    query = select(AnalyteMapping, Analyte).join(
+        Analyte, AnalyteMapping.analyte_id == Analyte.id
+    ).filter(
+        func.lower(AnalyteMapping.source_label) == source_label.lower()
+    )
+    
+    if lab_name:
+        query = query.filter(AnalyteMapping.lab_name == lab_name)
+    
+    return query
+
+
+def _partial_matches_query(source_label: str) -> Select:
+    return select(Analyte).filter(
+        or_(
+            Analyte.name.ilike(f"%{source_label}%"),
+            func.similarity(Analyte.name, source_label) > 0.3
+        )
+    ).limit(5)
+
+
+def _exact_suggestions(exact_matches) -> List[dict]:
+    suggestions = []
+    for mapping, analyte in exact_matches:
+        suggestions.append({
+            'analyte_id': analyte.id,
+            'analyte_name': analyte.name,
+            'analyte_code': analyte.code,
+            'confidence_score': float(mapping.confidence_score),
+            'is_validated': mapping.is_validated,
+            'match_type': 'exact'
+        })
+    return suggestions
+
+
+def _partial_suggestions(analytes) -> List[dict]:
+    suggestions = []
+    for analyte in analytes:
+        suggestions.append({
+            'analyte_id': analyte.id,
+            'analyte_name': analyte.name,
+            'analyte_code': analyte.code,
+            'confidence_score': 0.7,  # Базовая уверенность для частичных совпадений
+            'is_validated': False,
+            'match_type': 'partial'
+        })
+    return suggestions
+
+
+def _sort_suggestions(suggestions: List[dict]) -> List[dict]:
+    return sorted(suggestions, key=lambda x: x['confidence_score'], reverse=True)
 
 
 class AnalyteService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_analytes(
+    async def get_analytes(
         self,
         skip: int = 0,
         limit: int = 100,
         search: Optional[str] = None,
         active_only: bool = True
     ) -> List[Analyte]:
-        query = self.db.query(Analyte)
+        query = select(Analyte)
         
         if active_only:
             query = query.filter(Analyte.is_active == True)
@@ -29,23 +86,24 @@ class AnalyteService:
             )
             query = query.filter(search_filter)
         
-        return query.offset(skip).limit(limit).all()
+        return (await self.db.scalars(query.offset(skip).limit(limit))).all()
     
-    def get_analyte(self, analyte_id: int) -> Optional[Analyte]:
-        return self.db.query(Analyte).filter(Analyte.id == analyte_id).first()
+    async def get_analyte(self, analyte_id: int) -> Optional[Analyte]:
+        return await self.db.get(Analyte, analyte_id)
     
-    def get_analyte_by_code(self, code: str) -> Optional[Analyte]:
-        return self.db.query(Analyte).filter(Analyte.code == code).first()
+    async def get_analyte_by_code(self, code: str) -> Optional[Analyte]:
+        return (await self.db.scalars(select(Analyte).filter(Analyte.code == code))).first()
     
-    def create_analyte(self, analyte_data: AnalyteCreate) -> Analyte:
+    async def create_analyte(self, analyte_data: AnalyteCreate) -> Analyte:
         db_analyte = Analyte(**analyte_data.model_dump())
         self.db.add(db_analyte)
-        self.db.commit()
-        self.db.refresh(db_analyte)
+        await self.db.commit()
+        await self.db.refresh(db_analyte)
+        await analyte_cache.invalidate()
         return db_analyte
     
-    def update_analyte(self, analyte_id: int, analyte_update: AnalyteUpdate) -> Optional[Analyte]:
-        db_analyte = self.get_analyte(analyte_id)
+    async def update_analyte(self, analyte_id: int, analyte_update: AnalyteUpdate) -> Optional[Analyte]:
+        db_analyte = await self.get_analyte(analyte_id)
         if not db_analyte:
             return None
         
@@ -53,56 +111,24 @@ class AnalyteService:
         for field, value in update_data.items():
             setattr(db_analyte, field, value)
         
-        self.db.commit()
-        self.db.refresh(db_analyte)
+        await self.db.commit()
+        await self.db.refresh(db_analyte)
+        await analyte_cache.invalidate()
         return db_analyte
     
-    def find_mappings(self, source_label: str, lab_name: Optional[str] = None) -> List[dict]:
+    async def find_mappings(self, source_label: str, lab_name: Optional[str] = None) -> List[dict]:
         # Поиск точных совпадений
-        exact_query = self.db.query(AnalyteMapping, Analyte).join(
-            Analyte, AnalyteMapping.analyte_id == Analyte.id
-        ).filter(
-            func.lower(AnalyteMapping.source_label) == source_label.lower()
-        )
-        
-        if lab_name:
-            exact_query = exact_query.filter(AnalyteMapping.lab_name == lab_name)
-        
-        exact_matches = exact_query.all()
-        
-        suggestions = []
-        for mapping, analyte in exact_matches:
-            suggestions.append({
-                'analyte_id': analyte.id,
-                'analyte_name': analyte.name,
-                'analyte_code': analyte.code,
-                'confidence_score': float(mapping.confidence_score),
-                'is_validated': mapping.is_validated,
-                'match_type': 'exact'
-            })
+        exact_matches = (await self.db.execute(_exact_mappings_query(source_label, lab_name))).all()
+        suggestions = _exact_suggestions(exact_matches)
         
         # Если точных совпадений нет, ищем частичные
         if not suggestions:
-            partial_query = self.db.query(Analyte).filter(
-                or_(
-                    Analyte.name.ilike(f"%{source_label}%"),
-                    func.similarity(Analyte.name, source_label) > 0.3
-                )
-            ).limit(5)
-            
-            for analyte in partial_query.all():
-                suggestions.append({
-                    'analyte_id': analyte.id,
-                    'analyte_name': analyte.name,
-                    'analyte_code': analyte.code,
-                    'confidence_score': 0.7,  # Базовая уверенность для частичных совпадений
-                    'is_validated': False,
-                    'match_type': 'partial'
-                })
+            partial_matches = (await self.db.scalars(_partial_matches_query(source_label))).all()
+            suggestions = _partial_suggestions(partial_matches)
         
-        return sorted(suggestions, key=lambda x: x['confidence_score'], reverse=True)
+        return _sort_suggestions(suggestions)
     
-    def create_or_update_mapping(
+    async def create_or_update_mapping(
         self,
         source_label: str,
         analyte_id: int,
@@ -111,17 +137,19 @@ class AnalyteService:
         is_validated: bool = False
     ) -> AnalyteMapping:
         # Проверяем существующий маппинг
-        existing_mapping = self.db.query(AnalyteMapping).filter(
-            AnalyteMapping.source_label == source_label,
-            AnalyteMapping.analyte_id == analyte_id,
-            AnalyteMapping.lab_name == lab_name
-        ).first()
+        existing_mapping = (await self.db.scalars(
+            select(AnalyteMapping).filter(
+                AnalyteMapping.source_label == source_label,
+                AnalyteMapping.analyte_id == analyte_id,
+                AnalyteMapping.lab_name == lab_name
+            )
+        )).first()
         
         if existing_mapping:
             existing_mapping.confidence_score = confidence_score
             existing_mapping.is_validated = is_validated
-            self.db.commit()
-            self.db.refresh(existing_mapping)
+            await self.db.commit()
+            await self.db.refresh(existing_mapping)
             return existing_mapping
         else:
             new_mapping = AnalyteMapping(
@@ -132,6 +160,26 @@ class AnalyteService:
                 is_validated=is_validated
             )
             self.db.add(new_mapping)
-            self.db.commit()
-            self.db.refresh(new_mapping)
-            return new_mapping
\ No newline at end of file
+            await self.db.commit()
+            await self.db.refresh(new_mapping)
+            return new_mapping
+
+
+class SyncAnalyteService:
+    """Синхронный поиск аналитов для Celery-воркеров (нормализация)"""
+    
+    def __init__(self, db: Session):
+        self.db = db
+    
+    def get_analyte(self, analyte_id: int) -> Optional[Analyte]:
+        return self.db.get(Analyte, analyte_id)
+    
+    def find_mappings(self, source_label: str, lab_name: Optional[str] = None) -> List[dict]:
+        exact_matches = self.db.execute(_exact_mappings_query(source_label, lab_name)).all()
+        suggestions = _exact_suggestions(exact_matches)
+        
+        if not suggestions:
+            partial_matches = self.db.scalars(_partial_matches_query(source_label)).all()
+            suggestions = _partial_suggestions(partial_matches)
+        
+        return _sort_suggestions(suggestions)
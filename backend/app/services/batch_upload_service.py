@@ -0,0 +1,147 @@
+"""
+Пакетная загрузка документов (несколько файлов или ZIP-архив).
+
+Файлы и члены архива по одному читаются из временного файла загрузки
+и параллельно (не больше batch_upload_concurrency) отправляются в S3,
+поэтому в памяти одновременно лежит лишь несколько файлов. Документы
+затем создаются одним INSERT, а задачи обработки публикуются одной
+группой Celery в очередь пакетной обработки.
+"""
+import asyncio
+import mimetypes
+import os
+import zipfile
+from typing import Any, Dict, List, Tuple
+
+from fastapi import UploadFile
+
+from app.core.clients import bucket_ready, ensure_bucket
+from app.core.config import settings
+from app.services.file_inspection import inspect_head
+from app.services.file_service import FileService
+
+ZIP_CONTENT_TYPES = {"application/zip", "application/x-zip-compressed"}
+
+
+class BatchUploadError(ValueError):
+    """Пакет отклонен целиком (превышены лимиты, поврежденный архив)"""
+
+
+class BatchStorageError(RuntimeError):
+    """Файлы пакета не удалось сохранить в S3"""
+
+
+def _is_zip(upload: UploadFile) -> bool:
+    return (upload.filename or "").lower().endswith(".zip") or upload.content_type in ZIP_CONTENT_TYPES
+
+
+def _guess_mime_type(filename: str) -> str:
+    return mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+
+class BatchCollector:
+    """Складывает файлы пакета в S3 с учетом лимитов на число и объем"""
+    
+    def __init__(self, user_id: int):
+        self.user_id = user_id
+        self.file_service = FileService()
+        self.files: List[Dict[str, Any]] = []
+        self.skipped: List[Dict[str, str]] = []
+        self.total_bytes = 0
+        self._semaphore = asyncio.Semaphore(settings.batch_upload_concurrency)
+        self._uploads: List[asyncio.Task] = []
+    
+    def _accept(self, filename: str, size: int) -> bool:
+        if len(self.files) >= settings.batch_max_files:
+            raise BatchUploadError(f"В пакете больше {settings.batch_max_files} файлов")
+        if not self.file_service.validate_upload(filename, size) or size <= 0:
+            self.skipped.append({"filename": filename, "reason": "Недопустимый тип или размер файла"})
+            return False
+        if self.total_bytes + size > settings.batch_max_bytes:
+            raise BatchUploadError("Превышен суммарный размер пакета")
+        self.total_bytes += size
+        return True
+    
+    async def _put(self, file_key: str, content: bytes, content_type: str):
+        try:
+            await self.file_service.storage.put(file_key, content, content_type)
+        finally:
+            self._semaphore.release()
+    
+    async def _store(self, filename: str, content: bytes, content_type: str):
+        """Ставит отправку в S3 в фон; ждет, если уже идет batch_upload_concurrency отправок"""
+        inspection = inspect_head(content[:settings.precheck_image_header_bytes], content_type, filename, len(content))
+        if inspection.error:
+            self.total_bytes -= len(content)
+            self.skipped.append({"filename": filename, "reason": inspection.error})
+            return
+        content_type = inspection.detected_mime
+        await self._semaphore.acquire()
+        file_key = self.file_service.build_file_key(self.user_id, filename)
+        self._uploads.append(asyncio.create_task(self._put(file_key, content, content_type)))
+        self.files.append({
+            "filename": filename,
+            "file_path": file_key,
+            "file_size": len(content),
+            "mime_type": content_type,
+        })
+    
+    async def add_file(self, upload: UploadFile):
+        if not self._accept(upload.filename, upload.size or 0):
+            return
+        content = await upload.read()
+        await self._store(upload.filename, content, upload.content_type or _guess_mime_type(upload.filename))
+    
+    async def add_archive(self, upload: UploadFile):
+        try:
+            archive = await asyncio.to_thread(zipfile.ZipFile, upload.file)
+        except zipfile.BadZipFile:
+            raise BatchUploadError(f"Поврежденный архив: {upload.filename}")
+        
+        with archive:
+            for info in archive.infolist():
+                filename = os.path.basename(info.filename)
+                # Каталоги и служебные файлы архиваторов (__MACOSX, .DS_Store)
+                if info.is_dir() or not filename or filename.startswith(".") or info.filename.startswith("__MACOSX/"):
+                    continue
+                if not self._accept(filename, info.file_size):
+                    continue
+                try:
+                    content = await asyncio.to_thread(archive.read, info)
+                except (zipfile.BadZipFile, RuntimeError) as e:
+                    self.total_bytes -= info.file_size
+                    self.skipped.append({"filename": filename, "reason": f"Ошибка чтения из архива: {str(e)}"})
+                    continue
+                await self._store(filename, content, _guess_mime_type(filename))
+    
+    async def collect(self, uploads: List[UploadFile]) -> Tuple[List[Dict[str, Any]], List[Dict[str, str]]]:
+        if not bucket_ready():
+            try:
+                await asyncio.to_thread(ensure_bucket)
+            except Exception as e:
+                raise BatchStorageError("Хранилище недоступно") from e
+        try:
+            for upload in uploads:
+                if _is_zip(upload):
+                    await self.add_archive(upload)
+                else:
+                    await self.add_file(upload)
+        except BaseException:
+            # Пакет отклонен: дожидаемся начатых отправок и убираем их из S3
+            await asyncio.gather(*self._uploads, return_exceptions=True)
+            await self.discard()
+            raise
+        
+        results = await asyncio.gather(*self._uploads, return_exceptions=True)
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            await self.discard()
+            raise BatchStorageError("Не удалось сохранить файлы пакета в хранилище") from errors[0]
+        return self.files, self.skipped
+    
+    async def discard(self):
+        """Удаляет из S3 уже отправленные файлы отклоненного пакета"""
+        await asyncio.gather(
+            *(self.file_service.delete_file(file["file_path"]) for file in self.files),
+            return_exceptions=True
+        )
\ No newline at end of file
@@ -0,0 +1,222 @@
+"""
+Локальный дисковый кэш файлов документов на узлах воркеров.
+
+Повторная обработка, разбиение на страницы и превью читают один и тот же
+объект S3. Кэш хранит объекты на диске под ключом (S3-ключ, ETag), поэтому
+измененный объект никогда не отдается из кэша. Ключи LabTrack содержат
+uuid и не перезаписываются, так что по умолчанию ETag не сверяется с S3
+перед чтением (blob_cache_revalidate) и повторная работа с документом
+не обращается к сети.
+
+Каталог общий для всех процессов воркера на узле: запись атомарная
+(временный файл + rename), LRU - по времени последнего доступа (mtime),
+вытеснение - при превышении blob_cache_max_bytes. Процесс видит только
+свои записи, поэтому размер каталога пересчитывается с диска не реже
+blob_cache_recount_interval, а вытеснение выполняется под файловой
+блокировкой одним процессом за раз. Большие файлы читаются через mmap
+без копирования в память процесса.
+"""
+import fcntl
+import hashlib
+import logging
+import mmap
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+
+from prometheus_client import Counter
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+CACHE_HITS = Counter("labtrack_blob_cache_hits_total", "Чтения файлов документов из дискового кэша")
+CACHE_MISSES = Counter("labtrack_blob_cache_misses_total", "Промахи дискового кэша файлов документов")
+CACHE_EVICTIONS = Counter("labtrack_blob_cache_evictions_total", "Файлы, вытесненные из дискового кэша")
+
+Buffer = Union[bytes, mmap.mmap]
+
+
+def _digest(value: str) -> str:
+    return hashlib.sha256(value.encode("utf-8")).hexdigest()
+
+
+class DiskBlobCache:
+    def __init__(self, directory: str, max_bytes: int, mmap_threshold: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.mmap_threshold = mmap_threshold
+        self._lock = threading.Lock()
+        self._approx_size: Optional[int] = None
+        self._counted_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        os.makedirs(directory, exist_ok=True)
+    
+    def _path(self, key: str, etag: Optional[str]) -> str:
+        key_digest = _digest(key)
+        etag_part = _digest(etag.strip('"'))[:16] if etag else "latest"
+        return os.path.join(self.directory, key_digest[:2], f"{key_digest}.{etag_part}")
+    
+    def _find(self, key: str, etag: Optional[str]) -> Optional[str]:
+        if etag:
+            path = self._path(key, etag)
+            return path if os.path.exists(path) else None
+        # Без ETag берем последнюю записанную версию ключа
+        key_digest = _digest(key)
+        bucket_dir = os.path.join(self.directory, key_digest[:2])
+        try:
+            candidates = [
+                os.path.join(bucket_dir, name) for name in os.listdir(bucket_dir)
+                if name.startswith(key_digest + ".")
+            ]
+        except FileNotFoundError:
+            return None
+        return max(candidates, key=os.path.getmtime) if candidates else None
+    
+    def _record(self, hit: bool):
+        if hit:
+            self.hits += 1
+            CACHE_HITS.inc()
+        else:
+            self.misses += 1
+            CACHE_MISSES.inc()
+    
+    @contextmanager
+    def open(self, key: str, etag: Optional[str] = None) -> Iterator[Optional[Buffer]]:
+        """Содержимое из кэша: bytes или mmap для больших файлов; None при промахе"""
+        path = self._find(key, etag)
+        if path is None:
+            self._record(False)
+            yield None
+            return
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            # Файл вытеснен другим процессом между поиском и открытием
+            self._record(False)
+            yield None
+            return
+        
+        self._record(True)
+        with f:
+            os.utime(path)  # Отметка использования для LRU
+            size = os.fstat(f.fileno()).st_size
+            if size >= self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield mapped
+            else:
+                yield f.read()
+    
+    def get(self, key: str, etag: Optional[str] = None) -> Optional[bytes]:
+        with self.open(key, etag) as buffer:
+            return bytes(buffer) if buffer is not None else None
+    
+    def put(self, key: str, etag: Optional[str], body: bytes):
+        if len(body) > self.max_bytes:
+            return
+        path = self._path(key, etag)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            logger.warning(f"Failed to write {key} to blob cache: {str(e)}")
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            return
+        
+        with self._lock:
+            now = time.monotonic()
+            if self._approx_size is None or now - self._counted_at >= settings.blob_cache_recount_interval:
+                # Учитываем записи других процессов узла
+                self._approx_size = self._disk_usage()
+                self._counted_at = now
+            else:
+                self._approx_size += len(body)
+            if self._approx_size > self.max_bytes:
+                with self._eviction_lock():
+                    self._evict()
+    
+    @contextmanager
+    def _eviction_lock(self):
+        """Межпроцессная блокировка: вытесняет один процесс, остальные ждут и пересчитывают"""
+        with open(os.path.join(self.directory, ".evict.lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+    
+    def _entries(self):
+        for root, _, names in os.walk(self.directory):
+            for name in names:
+                # Временные файлы записи и файл блокировки
+                if name.startswith("."):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    stat = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+    
+    def _disk_usage(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+    
+    def _evict(self):
+        """Удаляет давно не использованные файлы до 90% лимита (размер - по диску)"""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        for path, size, _ in entries:
+            if total <= target:
+                break
+            try:
+                os.unlink(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            self.evictions += 1
+            CACHE_EVICTIONS.inc()
+        self._approx_size = total
+        self._counted_at = time.monotonic()
+    
+    def stats(self) -> Dict[str, int]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            "evictions": self.evictions,
+            "size_bytes": self._approx_size if self._approx_size is not None else self._disk_usage(),
+            "max_bytes": self.max_bytes,
+        }
+
+
+_blob_cache: Optional[DiskBlobCache] = None
+_blob_cache_lock = threading.Lock()
+
+
+def get_blob_cache() -> Optional[DiskBlobCache]:
+    """Кэш процесса или None, если он выключен (blob_cache_enabled)"""
+    global _blob_cache
+    if not settings.blob_cache_enabled:
+        return None
+    if _blob_cache is None:
+        with _blob_cache_lock:
+            if _blob_cache is None:
+                _blob_cache = DiskBlobCache(
+                    settings.blob_cache_dir,
+                    settings.blob_cache_max_bytes,
+                    settings.blob_cache_mmap_threshold
+                )
+    return _blob_cache
\ No newline at end of file
@@ -0,0 +1,143 @@
+"""
+Дельты между последовательными результатами одного аналита.
+
+Цепочка previous_result_id/delta_* строится одним UPDATE с оконной
+функцией LAG по аналиту пользователя в порядке даты наблюдения
+(report_date документа, иначе дата загрузки). LAG идет по документам,
+а не по строкам: несколько результатов одного аналита в документе
+ссылаются на последний результат предыдущего документа, а не друг на
+друга. Пересчитывается вся цепочка затронутых аналитов, поэтому отчеты,
+загруженные задним числом, корректно встают между уже существующими
+результатами. У результатов, выпавших из цепочки (не числовые, без
+аналита), дельты сбрасываются.
+"""
+from typing import Iterable, Optional, Union
+from sqlalchemy import select, update, func, case, and_, or_
+from sqlalchemy.orm import Session, aliased
+from sqlalchemy.sql import Select
+from app.models.document import Document
+from app.models.result import Result
+
+
+def observation_date():
+    """Дата наблюдения результата: дата отчета или дата загрузки документа"""
+    return func.coalesce(Document.report_date, Document.created_at)
+
+
+def _in_chain():
+    """Результат участвует в цепочке дельт"""
+    return and_(
+        Result.analyte_id.isnot(None),
+        Result.is_numeric == True,
+        Result.normalized == True
+    )
+
+
+def _delta_chain(user_id: Optional[int] = None, analyte_ids: Optional[Union[Iterable[int], Select]] = None):
+    # Одна строка на (документ, аналит) - последний результат аналита в документе
+    documents = select(
+        Document.user_id,
+        Document.id.label("document_id"),
+        Result.analyte_id,
+        observation_date().label("observed_at"),
+        func.max(Result.id).label("last_result_id"),
+    ).join(Document, Result.document_id == Document.id).filter(_in_chain()).group_by(
+        Document.id, Result.analyte_id
+    )
+    if user_id is not None:
+        documents = documents.filter(Document.user_id == user_id)
+    if analyte_ids is not None:
+        documents = documents.filter(Result.analyte_id.in_(analyte_ids))
+    documents = documents.subquery()
+    
+    previous_documents = select(
+        documents.c.document_id,
+        documents.c.analyte_id,
+        func.lag(documents.c.last_result_id).over(
+            partition_by=(documents.c.user_id, documents.c.analyte_id),
+            order_by=(documents.c.observed_at, documents.c.document_id)
+        ).label("previous_id"),
+    ).subquery()
+    
+    previous = aliased(Result)
+    return select(
+        Result.id.label("result_id"),
+        Result.numeric_value.label("numeric_value"),
+        previous_documents.c.previous_id,
+        previous.numeric_value.label("previous_value"),
+    ).join(
+        previous_documents,
+        and_(
+            Result.document_id == previous_documents.c.document_id,
+            Result.analyte_id == previous_documents.c.analyte_id
+        )
+    ).outerjoin(previous, previous.id == previous_documents.c.previous_id).filter(_in_chain()).subquery()
+
+
+def _clear_dropped_deltas(db: Session, user_id: Optional[int] = None) -> int:
+    """Сбрасывает дельты результатов, которые больше не входят в цепочку"""
+    stmt = update(Result).where(
+        # IS NOT TRUE, а не NOT (...): флаги могут быть NULL
+        or_(
+            Result.analyte_id.is_(None),
+            Result.is_numeric.isnot(True),
+            Result.normalized.isnot(True)
+        ),
+        or_(
+            Result.previous_result_id.isnot(None),
+            Result.delta_value.isnot(None),
+            Result.delta_percent.isnot(None)
+        )
+    )
+    if user_id is not None:
+        stmt = stmt.where(Result.document_id.in_(select(Document.id).filter(Document.user_id == user_id)))
+    stmt = stmt.values(
+        previous_result_id=None,
+        delta_value=None,
+        delta_percent=None
+    ).execution_options(synchronize_session=False)
+    return db.execute(stmt).rowcount
+
+
+def recalculate_deltas(
+    db: Session,
+    user_id: Optional[int] = None,
+    analyte_ids: Optional[Union[Iterable[int], Select]] = None
+) -> int:
+    """Пересчитывает цепочки дельт, возвращает число измененных результатов"""
+    chain = _delta_chain(user_id, analyte_ids)
+    has_previous = chain.c.previous_value.isnot(None)
+    delta_value = case((has_previous, chain.c.numeric_value - chain.c.previous_value))
+    delta_percent = case(
+        (and_(has_previous, chain.c.previous_value != 0),
+         (chain.c.numeric_value - chain.c.previous_value) / chain.c.previous_value * 100)
+    )
+    previous_id = case((has_previous, chain.c.previous_id))
+    
+    stmt = update(Result).where(
+        Result.id == chain.c.result_id,
+        # Не трогаем строки, у которых цепочка не изменилась
+        or_(
+            Result.previous_result_id.is_distinct_from(previous_id),
+            Result.delta_value.is_distinct_from(delta_value),
+        )
+    ).values(
+        previous_result_id=previous_id,
+        delta_value=delta_value,
+        delta_percent=delta_percent
+    ).execution_options(synchronize_session=False)
+    
+    return db.execute(stmt).rowcount + _clear_dropped_deltas(db, user_id)
+
+
+def recalculate_document_deltas(db: Session, document_id: int) -> int:
+    """Пересчитывает цепочки аналитов, встречающихся в документе"""
+    document = db.query(Document.user_id).filter(Document.id == document_id).first()
+    if not document:
+        return 0
+    
+    analyte_ids = select(Result.analyte_id).filter(
+        Result.document_id == document_id,
+        Result.analyte_id.isnot(None)
+    ).distinct()
+    return recalculate_deltas(db, document.user_id, analyte_ids)
\ No newline at end of file
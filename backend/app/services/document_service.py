@@ -1,16 +1,25 @@
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import List, Optional
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import undefer
+from sqlalchemy import select, func, insert
+from typing import Any, Dict, List, Optional, Sequence
 from app.models.document import Document
 from app.models.result import Result
 from app.schemas.base import DocumentCreate, DocumentUpdate
+from app.services.stats_service import apply_stats_delta_async, status_change_deltas
+
+
+# Поля, доступные для выборки в списке документов (raw_extracted_data - отдельный эндпоинт)
+DOCUMENT_LIST_FIELDS = (
+    'id', 'user_id', 'filename', 'file_path', 'file_size', 'mime_type', 'batch_id', 'file_info',
+    'extraction_method', 'status', 'error_message', 'lab_name', 'report_date', 'created_at', 'updated_at'
+)
 
 
 class DocumentService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def create_document(
+    async def create_document(
         self, 
         document_data: DocumentCreate, 
         file_path: str,
@@ -29,96 +38,202 @@ class DocumentService:
             status="pending"
         )
         self.db.add(db_document)
-        self.db.commit()
-        self.db.refresh(db_document)
+        await apply_stats_delta_async(self.db, user_id, total_documents=1, pending_documents=1)
+        await self.db.commit()
+        await self.db.refresh(db_document)
         return db_document
     
-    def get_document(self, document_id: int, user_id: int) -> Optional[Document]:
-        return self.db.query(Document).filter(
+    async def create_documents_bulk(
+        self,
+        files: Sequence[Dict[str, Any]],
+        user_id: int,
+        batch_id: str
+    ) -> List[Document]:
+        """Документы пакетной загрузки одним INSERT ... RETURNING и одним коммитом"""
+        if not files:
+            return []
+        rows = [
+            {
+                "user_id": user_id,
+                "batch_id": batch_id,
+                "status": "pending",
+                "filename": file["filename"],
+                "file_path": file["file_path"],
+                "file_size": file["file_size"],
+                "mime_type": file["mime_type"],
+                "lab_name": file.get("lab_name"),
+            }
+            for file in files
+        ]
+        documents = (await self.db.scalars(
+            insert(Document).returning(Document, sort_by_parameter_order=True), rows
+        )).all()
+        await apply_stats_delta_async(
+            self.db, user_id, total_documents=len(documents), pending_documents=len(documents)
+        )
+        await self.db.commit()
+        return list(documents)
+    
+    async def get_batch_status(self, batch_id: str, user_id: int) -> Optional[dict]:
+        """Сводный прогресс пакета: число документов по статусам"""
+        rows = (await self.db.execute(
+            select(Document.status, func.count(Document.id)).filter(
+                Document.batch_id == batch_id,
+                Document.user_id == user_id
+            ).group_by(Document.status)
+        )).all()
+        if not rows:
+            return None
+        
+        # completed выставляется после извлечения; документ готов, когда все его
+        # результаты нормализованы или получили ошибку нормализации
+        unprocessed = select(Result.id).filter(
+            Result.document_id == Document.id,
+            Result.normalized.isnot(True),
+            Result.processing_notes.is_(None)
+        ).exists()
+        normalized = await self.db.scalar(
+            select(func.count(Document.id)).filter(
+                Document.batch_id == batch_id,
+                Document.user_id == user_id,
+                Document.status == "completed",
+                ~unprocessed
+            )
+        )
+        
+        counts = {status: count for status, count in rows}
+        total = sum(counts.values())
+        done = normalized + counts.get("failed", 0)
+        return {
+            "batch_id": batch_id,
+            "total": total,
+            "pending": counts.get("pending", 0),
+            "processing": counts.get("processing", 0),
+            "completed": counts.get("completed", 0),
+            "normalized": normalized,
+            "failed": counts.get("failed", 0),
+            "progress": round(done / total, 3),
+        }
+    
+    async def get_document(self, document_id: int, user_id: int) -> Optional[Document]:
+        query = select(Document).filter(
+            Document.id == document_id,
+            Document.user_id == user_id
+        )
+        return (await self.db.scalars(query)).first()
+    
+    async def get_document_raw_extraction(self, document_id: int, user_id: int) -> Optional[Document]:
+        """Документ с загруженным raw_extracted_data (колонка отложена по умолчанию)"""
+        query = select(Document).options(
+            undefer(Document.raw_extracted_data)
+        ).filter(
+            Document.id == document_id,
+            Document.user_id == user_id
+        )
+        return (await self.db.scalars(query)).first()
+    
+    async def get_document_status(self, document_id: int, user_id: int) -> Optional[dict]:
+        """Легкий запрос статуса без загрузки raw_extracted_data"""
+        query = select(
+            Document.id,
+            Document.status,
+            Document.error_message
+        ).filter(
             Document.id == document_id,
             Document.user_id == user_id
-        ).first()
+        )
+        row = (await self.db.execute(query)).first()
+        
+        if not row:
+            return None
+        return {"document_id": row.id, "status": row.status, "error": row.error_message}
     
-    def get_documents(
+    async def get_documents(
         self, 
         user_id: int,
         skip: int = 0,
         limit: int = 100,
         status: Optional[str] = None
     ) -> List[Document]:
-        query = self.db.query(Document).filter(Document.user_id == user_id)
+        query = select(Document).filter(Document.user_id == user_id)
         
         if status:
             query = query.filter(Document.status == status)
         
-        return query.offset(skip).limit(limit).all()
+        return (await self.db.scalars(query.offset(skip).limit(limit))).all()
     
-    def update_document(
+    async def update_document(
         self, 
         document_id: int, 
         document_update: DocumentUpdate,
         user_id: int
     ) -> Optional[Document]:
-        db_document = self.get_document(document_id, user_id)
+        db_document = await self.get_document(document_id, user_id)
         if not db_document:
             return None
         
         update_data = document_update.model_dump(exclude_unset=True)
+        if "status" in update_data:
+            await apply_stats_delta_async(
+                self.db, user_id, **status_change_deltas(db_document.status, update_data["status"])
+            )
         for field, value in update_data.items():
             setattr(db_document, field, value)
         
-        self.db.commit()
-        self.db.refresh(db_document)
+        await self.db.commit()
+        await self.db.refresh(db_document)
         return db_document
     
-    def delete_document(self, document_id: int, user_id: int) -> bool:
-        db_document = self.get_document(document_id, user_id)
+    async def delete_document(self, document_id: int, user_id: int) -> bool:
+        db_document = await self.get_document(document_id, user_id)
         if not db_document:
             return False
         
-        self.db.delete(db_document)
-        self.db.commit()
+        results_count = await self.db.scalar(
+            select(func.count(Result.id)).filter(Result.document_id == document_id)
+        )
+        await self.db.delete(db_document)
+        await apply_stats_delta_async(
+            self.db, user_id,
+            total_documents=-1,
+            total_results=-(results_count or 0),
+            **status_change_deltas(db_document.status, None)
+        )
+        await self.db.commit()
         return True
     
-    def get_documents_with_results_count(
+    async def get_documents_with_results_count(
         self, 
         user_id: int,
         skip: int = 0,
         limit: int = 100,
-        status: Optional[str] = None
+        status: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None
     ) -> List[dict]:
         """Получить документы с подсчетом количества результатов"""
-        query = self.db.query(
-            Document,
-            func.coalesce(func.count(Result.id), 0).label('results_count')
-        ).outerjoin(Result).filter(Document.user_id == user_id)
+        fields = list(fields or DOCUMENT_LIST_FIELDS)
+        if 'id' not in fields:
+            fields.insert(0, 'id')
+        
+        # Коррелированный подзапрос по индексу results.document_id
+        # вместо GROUP BY по широким строкам документов
+        results_count = select(
+            func.count(Result.id)
+        ).filter(
+            Result.document_id == Document.id
+        ).correlate(Document).scalar_subquery()
+        
+        query = select(
+            *[getattr(Document, field) for field in fields],
+            results_count.label('results_count')
+        ).filter(Document.user_id == user_id)
         
         if status:
             query = query.filter(Document.status == status)
         
-        query = query.group_by(Document.id).order_by(Document.created_at.desc())
-        
-        results = query.offset(skip).limit(limit).all()
+        query = query.order_by(Document.created_at.desc())
         
-        # Преобразуем в словари для удобства
-        documents_with_count = []
-        for document, results_count in results:
-            doc_dict = {
-                'id': document.id,
-                'user_id': document.user_id,
-                'filename': document.filename,
-                'file_path': document.file_path,
-                'file_size': document.file_size,
-                'mime_type': document.mime_type,
-                'status': document.status,
-                'error_message': document.error_message,
-                'lab_name': document.lab_name,
-                'report_date': document.report_date,
-                'raw_extracted_data': document.raw_extracted_data,
-                'created_at': document.created_at,
-                'updated_at': document.updated_at,
-                'results_count': results_count
-            }
-            documents_with_count.append(doc_dict)
+        rows = (await self.db.execute(query.offset(skip).limit(limit))).all()
         
-        return documents_with_count
\ No newline at end of file
+        # Преобразуем в словари только с запрошенными колонками
+        return [dict(row._mapping) for row in rows]
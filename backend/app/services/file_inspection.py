@@ -0,0 +1,137 @@
+"""
+Быстрая проверка файла до дорогого извлечения через LLM.
+
+Тип определяется по сигнатуре первых килобайт (libmagic), а не по
+расширению и Content-Type клиента. По типу выбирается путь извлечения:
+изображение с расширением .csv уйдет в vision, xlsx - в текстовый путь
+после конвертации. Файлы, которые заведомо не обработаются (неизвестный
+формат, пустой файл, не UTF-8 текст, слишком много страниц), отклоняются
+без вызова LLM. Заодно определяются число страниц PDF и размеры изображения.
+"""
+import io
+import codecs
+import logging
+import re
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Изображения, которые принимает vision API
+VISION_IMAGE_TYPES = {"image/png", "image/jpeg", "image/webp", "image/gif"}
+TEXT_TYPES = {"text/plain", "text/csv", "application/csv", "text/tab-separated-values"}
+XLSX_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Запасные сигнатуры, если libmagic недоступна
+_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+    (b"GIF87a", "image/gif"),
+    (b"GIF89a", "image/gif"),
+    (b"PK\x03\x04", "application/zip"),
+)
+_PDF_PAGE = re.compile(rb"/Type\s*/Page(?![a-zA-Z])")
+
+
+@dataclass
+class FileInspection:
+    declared_mime: Optional[str]
+    detected_mime: str
+    route: Optional[str] = None  # vision | text | spreadsheet
+    size: int = 0
+    page_count: Optional[int] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    error: Optional[str] = None
+    # Заполняются при извлечении: text | text_layer | text_layer+vision | vision | spreadsheet
+    extraction_method: Optional[str] = None
+    scanned_pages: Optional[List[int]] = None  # Страницы PDF без текстового слоя (с 1)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+def sniff_mime(head: bytes) -> str:
+    """MIME-тип по содержимому первых килобайт"""
+    try:
+        import magic
+        return magic.from_buffer(bytes(head), mime=True)
+    except ImportError:
+        for signature, mime in _SIGNATURES:
+            if head.startswith(signature):
+                return mime
+        return "text/plain" if _is_utf8_text(head) else "application/octet-stream"
+
+
+def _is_utf8_text(head: bytes) -> bool:
+    try:
+        # final=False: многобайтный символ может быть обрезан границей фрагмента
+        codecs.getincrementaldecoder("utf-8")().decode(bytes(head), final=False)
+        return b"\x00" not in head
+    except UnicodeDecodeError:
+        return False
+
+
+def _route(detected: str, filename: Optional[str]) -> Optional[str]:
+    if detected in VISION_IMAGE_TYPES or detected == "application/pdf":
+        return "vision"
+    if detected in TEXT_TYPES or detected.startswith("text/"):
+        return "text"
+    # Старые версии libmagic определяют xlsx как zip
+    if detected == XLSX_TYPE or (detected == "application/zip" and (filename or "").lower().endswith(".xlsx")):
+        return "spreadsheet"
+    return None
+
+
+def inspect_head(head: bytes, declared_mime: Optional[str], filename: Optional[str], size: int) -> FileInspection:
+    """Проверка по первым килобайтам (для API: отклонить загрузку сразу)"""
+    if size == 0 or not head:
+        return FileInspection(declared_mime, "application/x-empty", size=size, error="Пустой файл")
+    
+    detected = sniff_mime(head[:settings.precheck_sniff_bytes])
+    inspection = FileInspection(declared_mime, detected, route=_route(detected, filename), size=size)
+    if inspection.route is None:
+        inspection.error = f"Неподдерживаемый формат файла: {detected}"
+    elif inspection.route == "text" and not _is_utf8_text(head[:settings.precheck_sniff_bytes]):
+        inspection.error = "Текстовый файл не в кодировке UTF-8"
+    elif detected.startswith("image/"):
+        _read_image_size(head, inspection)
+    return inspection
+
+
+def _read_image_size(head: bytes, inspection: FileInspection):
+    # Pillow читает только заголовок: размеры есть в первых килобайтах
+    try:
+        from PIL import Image
+        with Image.open(io.BytesIO(bytes(head))) as image:
+            inspection.width, inspection.height = image.size
+    except Exception as e:
+        logger.debug(f"Image header is not readable: {str(e)}")
+        return
+    if min(inspection.width, inspection.height) < settings.precheck_min_image_side:
+        inspection.error = f"Слишком маленькое изображение: {inspection.width}x{inspection.height}"
+
+
+def inspect_file(content, declared_mime: Optional[str], filename: Optional[str]) -> FileInspection:
+    """Полная проверка в воркере: content - bytes или mmap всего файла"""
+    head = bytes(content[:max(settings.precheck_sniff_bytes, settings.precheck_image_header_bytes)])
+    inspection = inspect_head(head, declared_mime, filename, len(content))
+    if inspection.error is None and inspection.detected_mime == "application/pdf":
+        # Оценка: страницы внутри сжатых object streams (PDF 1.5+) так не видны
+        inspection.page_count = len(_PDF_PAGE.findall(content)) or None
+        if inspection.page_count and inspection.page_count > settings.precheck_max_pdf_pages:
+            inspection.error = f"Слишком много страниц в PDF: {inspection.page_count}"
+    return inspection
+
+
+def spreadsheet_to_text(content) -> str:
+    """Листы xlsx в CSV-текст для текстового пути извлечения"""
+    import pandas as pd
+    sheets = pd.read_excel(io.BytesIO(bytes(content)), sheet_name=None, header=None, dtype=str)
+    parts = []
+    for name, frame in sheets.items():
+        parts.append(f"# {name}\n{frame.dropna(how='all').to_csv(index=False, header=False)}")
+    return "\n".join(parts)
\ No newline at end of file
@@ -1,11 +1,14 @@
 import asyncio
 import uuid
 from fastapi import UploadFile
-from typing import Optional
-import magic
-import boto3
-from botocore.exceptions import ClientError
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+from app.core.clients import bucket_ready, ensure_bucket, get_s3_client, get_s3_presign_client, s3_client_error
 from app.core.config import settings
+from app.core.tracing import tracer
+from app.services.blob_cache import Buffer, get_blob_cache
+from app.services.file_inspection import FileInspection, inspect_head
+from app.services.storage import DEFAULT_CHUNK_SIZE, get_storage
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,78 +16,168 @@ logger = logging.getLogger(__name__)
 
 class FileService:
     def __init__(self):
-        self.s3_client = boto3.client(
-            's3',
-            endpoint_url=settings.s3_endpoint,
-            aws_access_key_id=settings.s3_access_key,
-            aws_secret_access_key=settings.s3_secret_key
-        )
-        self._ensure_bucket_exists()
+        # Клиенты общие для процесса: сетевые вызовы идут через async-бэкенд (app.services.storage),
+        # синхронный клиент нужен только для подписи ссылок
+        self.s3_client = get_s3_client()
+        self.storage = get_storage()
     
-    def _ensure_bucket_exists(self):
-        try:
-            self.s3_client.head_bucket(Bucket=settings.s3_bucket)
-        except ClientError:
-            self.s3_client.create_bucket(Bucket=settings.s3_bucket)
-    
-    def validate_file(self, file: UploadFile) -> bool:
-        if not file.filename:
+    def validate_upload(self, filename: Optional[str], size: Optional[int]) -> bool:
+        if not filename:
             return False
         
         # Проверка размера
-        if file.size and file.size > settings.max_file_size:
+        if size and size > settings.max_file_size:
             return False
         
         # Проверка расширения
-        extension = file.filename.split('.')[-1].lower()
+        extension = filename.split('.')[-1].lower()
         if extension not in settings.allowed_file_types:
             return False
         
         return True
     
+    def validate_file(self, file: UploadFile) -> bool:
+        return self.validate_upload(file.filename, file.size)
+    
+    async def inspect_upload(self, file: UploadFile) -> FileInspection:
+        """Проверка загружаемого файла по сигнатуре первых килобайт"""
+        head = await file.read(settings.precheck_image_header_bytes)
+        await file.seek(0)
+        return inspect_head(head, file.content_type, file.filename, file.size or len(head))
+    
+    async def inspect_stored(self, file_path: str, declared_mime: Optional[str], filename: str, size: int) -> FileInspection:
+        """То же для объекта в S3: читается только начало файла"""
+        head = await self.storage.read_head(file_path, settings.precheck_image_header_bytes)
+        return inspect_head(head, declared_mime, filename, size)
+    
+    @staticmethod
+    def build_file_key(user_id: int, filename: str) -> str:
+        """Уникальный ключ объекта для файла пользователя"""
+        extension = filename.split('.')[-1].lower()
+        return f"user_{user_id}/documents/{uuid.uuid4()}.{extension}"
+    
     async def save_file(self, file: UploadFile, user_id: int) -> str:
         # Генерация уникального имени файла
-        file_id = str(uuid.uuid4())
-        extension = file.filename.split('.')[-1].lower()
-        file_key = f"user_{user_id}/documents/{file_id}.{extension}"
+        file_key = self.build_file_key(user_id, file.filename)
         
         # Чтение содержимого файла
         content = await file.read()
         await file.seek(0)  # Сброс позиции для возможного повторного чтения
         
         # Загрузка в S3
-        self.s3_client.put_object(
-            Bucket=settings.s3_bucket,
-            Key=file_key,
-            Body=content,
-            ContentType=file.content_type or 'application/octet-stream'
-        )
+        if not bucket_ready():
+            await asyncio.to_thread(ensure_bucket)
+        await self.storage.put(file_key, content, file.content_type or 'application/octet-stream')
         
         return file_key
     
     def get_file_url(self, file_path: str, expires_in: int = 3600) -> str:
         try:
-            return self.s3_client.generate_presigned_url(
+            return get_s3_presign_client().generate_presigned_url(
                 'get_object',
                 Params={'Bucket': settings.s3_bucket, 'Key': file_path},
                 ExpiresIn=expires_in
             )
-        except ClientError as e:
+        except s3_client_error() as e:
             logger.error(f"Error generating presigned URL for {file_path}: {str(e)}")
             return None
     
+    def create_presigned_post(
+        self,
+        file_key: str,
+        content_type: str,
+        size: int,
+        md5: Optional[str] = None,
+        expires_in: int = 900
+    ) -> Optional[dict]:
+        """
+        Форма presigned POST для загрузки браузером напрямую в S3.
+        Хранилище само отклонит файл другого размера, типа или (с md5) содержимого.
+        """
+        fields = {"Content-Type": content_type}
+        conditions = [
+            {"Content-Type": content_type},
+            ["content-length-range", size, size],
+        ]
+        if md5:
+            fields["Content-MD5"] = md5
+            conditions.append({"Content-MD5": md5})
+        try:
+            return get_s3_presign_client().generate_presigned_post(
+                Bucket=settings.s3_bucket,
+                Key=file_key,
+                Fields=fields,
+                Conditions=conditions,
+                ExpiresIn=expires_in
+            )
+        except s3_client_error() as e:
+            logger.error(f"Error generating presigned POST for {file_key}: {str(e)}")
+            return None
+    
+    async def _cache_etag(self, file_path: str) -> Optional[str]:
+        # Без сверки берется последняя версия ключа в кэше (ключи не перезаписываются)
+        if not settings.blob_cache_revalidate:
+            return None
+        return (await self.storage.head(file_path)).get("ETag")
+    
+    async def _fetch_and_cache(self, file_path: str) -> bytes:
+        body, etag = await self.storage.fetch(file_path)
+        cache = get_blob_cache()
+        if cache is not None:
+            await asyncio.to_thread(cache.put, file_path, etag, body)
+        return body
+    
     async def get_file_content(self, file_path: str) -> Optional[bytes]:
         try:
-            response = self.s3_client.get_object(Bucket=settings.s3_bucket, Key=file_path)
-            return response['Body'].read()
-        except ClientError as e:
+            cache = get_blob_cache()
+            if cache is not None:
+                body = await asyncio.to_thread(cache.get, file_path, await self._cache_etag(file_path))
+                if body is not None:
+                    return body
+            return await self._fetch_and_cache(file_path)
+        except s3_client_error() as e:
             logger.error(f"Error getting file content for {file_path}: {str(e)}")
             return None
     
-    def delete_file(self, file_path: str) -> bool:
+    @asynccontextmanager
+    async def open_file(self, file_path: str) -> AsyncIterator[Optional[Buffer]]:
+        """
+        Содержимое файла как буфер на время блока: большие файлы из
+        дискового кэша отдаются через mmap без копирования
+        """
+        cache = get_blob_cache()
+        with tracer.start_as_current_span("document.download") as span:
+            try:
+                etag = await self._cache_etag(file_path) if cache is not None else None
+            except s3_client_error() as e:
+                logger.error(f"Error getting file content for {file_path}: {str(e)}")
+                yield None
+                return
+            if cache is not None:
+                with cache.open(file_path, etag) as buffer:
+                    if buffer is not None:
+                        span.set_attribute("labtrack.blob_cache_hit", True)
+                        span.set_attribute("labtrack.file_size", len(buffer))
+                        yield buffer
+                        return
+            span.set_attribute("labtrack.blob_cache_hit", False)
+            try:
+                body = await self._fetch_and_cache(file_path)
+            except s3_client_error() as e:
+                logger.error(f"Error getting file content for {file_path}: {str(e)}")
+                body = None
+            span.set_attribute("labtrack.file_size", len(body or b""))
+            yield body
+    
+    async def stream_file(self, file_path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        """Потоковое чтение объекта частями, без загрузки целиком в память"""
+        async for chunk in self.storage.stream(file_path, chunk_size):
+            yield chunk
+    
+    async def delete_file(self, file_path: str) -> bool:
         try:
-            self.s3_client.delete_object(Bucket=settings.s3_bucket, Key=file_path)
+            await self.storage.delete(file_path)
             return True
-        except ClientError as e:
+        except s3_client_error() as e:
             logger.error(f"Error deleting file {file_path}: {str(e)}")
             return False
\ No newline at end of file
@@ -1,9 +1,13 @@
+import asyncio
 import base64
-from typing import Dict, List, Optional, Any
-import openai
+from typing import Dict, List, Optional, Any, Tuple
 from pydantic import BaseModel
+from app.core.clients import get_openai_client
 from app.core.config import settings
+from app.core.tracing import tracer
 from app.services.file_service import FileService
+from app.services.file_inspection import FileInspection, inspect_file, spreadsheet_to_text
+from app.services.pdf_text import extract_text_layer, render_pages
 import json
 import logging
 
@@ -30,7 +34,7 @@ class ExtractedDocument(BaseModel):
 
 class LLMExtractionService:
     def __init__(self):
-        self.client = openai.OpenAI(api_key=settings.openai_api_key)
+        self.client = get_openai_client()
         self.file_service = FileService()
     
     def _get_extraction_schema(self) -> Dict[str, Any]:
@@ -109,30 +113,129 @@ class LLMExtractionService:
 
 Верни результат строго в указанном JSON формате."""
     
+    def _create_completion(self, **kwargs):
+        """Вызов chat completions со спаном: модель, токены, время ответа"""
+        with tracer.start_as_current_span("openai.chat.completions") as span:
+            span.set_attribute("llm.model", kwargs.get("model", ""))
+            response = self.client.chat.completions.create(**kwargs)
+            if response.usage is not None:
+                span.set_attribute("llm.usage.prompt_tokens", response.usage.prompt_tokens)
+                span.set_attribute("llm.usage.completion_tokens", response.usage.completion_tokens)
+            return response
+    
     async def extract_from_file(self, file_path: str, mime_type: str) -> Optional[ExtractedDocument]:
         """Извлекает данные из файла с помощью LLM"""
+        _, extracted = await self.inspect_and_extract(file_path, mime_type)
+        return extracted
+    
+    async def inspect_and_extract(
+        self,
+        file_path: str,
+        mime_type: str,
+        filename: Optional[str] = None
+    ) -> Tuple[Optional[FileInspection], Optional[ExtractedDocument]]:
+        """
+        Проверка файла по содержимому и извлечение данных.
+        Если проверка отклонила файл (inspection.error), LLM не вызывается.
+        """
         try:
-            file_content = await self.file_service.get_file_content(file_path)
-            if not file_content:
-                return None
-            
-            # Для изображений и PDF используем vision API
-            if mime_type.startswith('image/') or mime_type == 'application/pdf':
-                return await self._extract_from_image(file_content, mime_type)
-            else:
-                # Для текстовых файлов
-                return await self._extract_from_text(file_content.decode('utf-8'))
+            # Буфер может быть mmap из дискового кэша воркера
+            async with self.file_service.open_file(file_path) as file_content:
+                if not file_content:
+                    return None, None
+                
+                with tracer.start_as_current_span("document.precheck") as span:
+                    inspection = inspect_file(file_content, mime_type, filename)
+                    span.set_attribute("file.detected_mime", inspection.detected_mime)
+                    span.set_attribute("file.route", inspection.route or "")
+                if inspection.error:
+                    return inspection, None
+                
+                return inspection, await self.extract_from_content(file_content, inspection)
                 
         except Exception as e:
             logger.error(f"Error extracting data from file {file_path}: {str(e)}", exc_info=True)
+            return None, None
+    
+    async def extract_from_content(self, file_content, inspection: FileInspection) -> Optional[ExtractedDocument]:
+        """
+        Извлечение по пути, выбранному проверкой (а не по расширению файла).
+        Выбранный способ записывается в inspection.extraction_method.
+        """
+        if inspection.route == "vision":
+            if inspection.detected_mime == "application/pdf":
+                return await self._extract_from_pdf(file_content, inspection)
+            # Для изображений используем vision API
+            inspection.extraction_method = "vision"
+            return await self._extract_from_image(file_content, inspection.detected_mime)
+        if inspection.route == "spreadsheet":
+            inspection.extraction_method = "spreadsheet"
+            return await self._extract_from_text(spreadsheet_to_text(file_content))
+        # Для текстовых файлов
+        inspection.extraction_method = "text"
+        return await self._extract_from_text(str(file_content, 'utf-8'))
+    
+    async def _extract_from_pdf(self, file_content, inspection: FileInspection) -> Optional[ExtractedDocument]:
+        """
+        PDF: текстовый слой - в текстовую модель, сканированные страницы - в vision.
+        Vision API принимает только изображения, поэтому сканы отрисовываются в PNG.
+        """
+        with tracer.start_as_current_span("document.pdf_text") as span:
+            layer = await asyncio.to_thread(extract_text_layer, file_content)
+            if layer is not None:
+                span.set_attribute("pdf.page_count", layer.page_count)
+                span.set_attribute("pdf.scanned_pages", len(layer.scanned_pages))
+        if layer is None:
+            # Нечитаемый PDF нельзя ни разобрать, ни отрисовать
+            return None
+        
+        inspection.page_count = layer.page_count
+        if not settings.pdf_text_layer_enabled:
+            layer.scanned_pages = list(range(layer.page_count))
+        if layer.fully_digital:
+            inspection.extraction_method = "text_layer"
+            return await self._extract_from_text(layer.text())
+        
+        # Сканы отправляются в vision по одной странице
+        inspection.scanned_pages = [index + 1 for index in layer.scanned_pages]
+        try:
+            page_images = await asyncio.to_thread(render_pages, file_content, layer.scanned_pages)
+        except Exception as e:
+            logger.error(f"Failed to render scanned PDF pages: {str(e)}")
+            return None
+        
+        parts = []
+        if layer.has_text:
+            inspection.extraction_method = "text_layer+vision"
+            parts.append(await self._extract_from_text(layer.text()))
+        else:
+            inspection.extraction_method = "vision"
+        for page_image in page_images:
+            parts.append(await self._extract_from_image(page_image, "image/png"))
+        return self._merge_extractions(parts)
+    
+    @staticmethod
+    def _merge_extractions(parts: List[Optional[ExtractedDocument]]) -> Optional[ExtractedDocument]:
+        """Объединение результатов по частям документа: метаданные из первой части, где они есть"""
+        parts = [part for part in parts if part is not None]
+        if not parts:
             return None
+        merged = ExtractedDocument()
+        for part in parts:
+            merged.lab_name = merged.lab_name or part.lab_name
+            merged.report_date = merged.report_date or part.report_date
+            merged.report_type = merged.report_type or part.report_type
+            merged.analytes.extend(part.analytes)
+        comments = [part.additional_comments for part in parts if part.additional_comments]
+        merged.additional_comments = "\n".join(comments) or None
+        return merged
     
     async def _extract_from_image(self, file_content: bytes, mime_type: str) -> Optional[ExtractedDocument]:
         """Извлечение данных из изображения или PDF через Vision API"""
         try:
             base64_content = base64.b64encode(file_content).decode('utf-8')
             
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model="gpt-4o",
                 messages=[
                     {
@@ -176,7 +279,7 @@ class LLMExtractionService:
     async def _extract_from_text(self, text_content: str) -> Optional[ExtractedDocument]:
         """Извлечение данных из текстового содержимого"""
         try:
-            response = self.client.chat.completions.create(
+            response = self._create_completion(
                 model="gpt-4o-mini",
                 messages=[
                     {
@@ -1,48 +1,19 @@
 import re
 from typing import Optional, Dict, Any, Tuple
 from decimal import Decimal, InvalidOperation
-import pint
 from sqlalchemy.orm import Session
 from app.models.analyte import Analyte, AnalyteMapping
+from app.models.document import Document
 from app.models.result import Result
-from app.services.analyte_service import AnalyteService
+from app.services.analyte_service import SyncAnalyteService
+from app.services.reference_ranges import age_at, apply_range_deviation, reference_range_resolver
+from app.services.unit_conversion import is_known_unit, normalize_unit_key, unit_conversion_engine
 
 
 class NormalizationService:
     def __init__(self, db: Session):
         self.db = db
-        self.analyte_service = AnalyteService(db)
-        
-        # Инициализация Pint для конверсии единиц
-        self.ureg = pint.UnitRegistry()
-        self._setup_medical_units()
-    
-    def _setup_medical_units(self):
-        """Настройка специфических медицинских единиц"""
-        # Добавляем медицинские единицы в реестр Pint
-        self.ureg.define('cell = 1 * count')  # Клетки
-        self.ureg.define('IU = 1 * international_unit')  # Международные единицы
-        self.ureg.define('U = 1 * unit')  # Единицы активности
-        self.ureg.define('copies = 1 * count')  # Копии (для ПЦР)
-        
-        # Конверсии концентраций
-        self.unit_conversions = {
-            # Глюкоза: мг/дл -> ммоль/л
-            'glucose': {
-                'mg/dl': {'factor': 0.0555, 'target': 'mmol/l'},
-                'mg/dL': {'factor': 0.0555, 'target': 'mmol/l'},
-            },
-            # Холестерин: мг/дл -> ммоль/л  
-            'cholesterol': {
-                'mg/dl': {'factor': 0.02586, 'target': 'mmol/l'},
-                'mg/dL': {'factor': 0.02586, 'target': 'mmol/l'},
-            },
-            # Креатинин: мг/дл -> мкмоль/л
-            'creatinine': {
-                'mg/dl': {'factor': 88.4, 'target': 'μmol/l'},
-                'mg/dL': {'factor': 88.4, 'target': 'μmol/l'},
-            }
-        }
+        self.analyte_service = SyncAnalyteService(db)
     
     def normalize_result(self, result: Result) -> bool:
         """Нормализует результат анализа"""
@@ -65,7 +36,8 @@ class NormalizationService:
                 normalized_unit, converted_value = self._normalize_units(
                     result.raw_unit, 
                     numeric_value, 
-                    analyte.code
+                    analyte.code,
+                    result.document.lab_name
                 )
                 if normalized_unit and converted_value is not None:
                     result.normalized_unit = normalized_unit
@@ -81,7 +53,7 @@ class NormalizationService:
                 result.normalized_reference_max = ref_max
             elif analyte and analyte.reference_ranges:
                 # Использовать дефолтные референсы из справочника
-                ref_min, ref_max = self._get_default_reference_ranges(analyte)
+                ref_min, ref_max = self._get_default_reference_ranges(analyte, result.document)
                 result.normalized_reference_min = ref_min
                 result.normalized_reference_max = ref_max
             
@@ -100,9 +72,10 @@ class NormalizationService:
                     result.normalized_reference_max
                 )
             
-            # 6. Расчет дельты с предыдущим результатом
-            self._calculate_delta(result)
+            apply_range_deviation(result)
             
+            # Дельты с предыдущими результатами считаются одним запросом
+            # на весь документ после нормализации (см. delta_service)
             result.normalized = True
             result.processing_notes = {
                 "normalized_at": "2024",  # TODO: использовать текущую дату
@@ -151,44 +124,28 @@ class NormalizationService:
         
         return None
     
-    def _normalize_units(self, raw_unit: str, value: Decimal, analyte_code: str) -> Tuple[Optional[str], Optional[Decimal]]:
+    def _normalize_units(
+        self,
+        raw_unit: str,
+        value: Decimal,
+        analyte_code: str,
+        lab_name: Optional[str] = None
+    ) -> Tuple[Optional[str], Optional[Decimal]]:
         """Нормализует единицы измерения"""
         if not raw_unit or not analyte_code:
             return raw_unit, value
         
-        # Очистка единицы
-        clean_unit = raw_unit.strip().lower()
-        
-        # Проверяем есть ли специфичная конверсия для данного аналита
-        if analyte_code in self.unit_conversions and clean_unit in self.unit_conversions[analyte_code]:
-            conversion = self.unit_conversions[analyte_code][clean_unit]
-            converted_value = value * Decimal(str(conversion['factor']))
-            return conversion['target'], converted_value
-        
-        # Попытка конверсии через Pint (для стандартных единиц)
-        try:
-            # Нормализация обозначений единиц
-            unit_mapping = {
-                'г/л': 'g/l',
-                'мг/л': 'mg/l',
-                'ммоль/л': 'mmol/l',
-                'мкмоль/л': 'μmol/l',
-                'мкг/л': 'μg/l',
-                'ед/л': 'U/l',
-                'мед/л': 'mU/l'
-            }
-            
-            normalized_unit = unit_mapping.get(clean_unit, clean_unit)
-            
-            # Проверяем, может ли Pint обработать единицу
-            try:
-                self.ureg(normalized_unit)
-                return normalized_unit, value
-            except:
-                return raw_unit, value
-                
-        except Exception:
-            return raw_unit, value
+        # Правила из unit_conversion_rules: конверсия для аналита/лаборатории или синоним единицы
+        unit_conversion_engine.refresh(self.db)
+        converted = unit_conversion_engine.convert(value, raw_unit, analyte_code, lab_name)
+        if converted is not None:
+            return converted
+        
+        # Без правила оставляем единицу, если Pint ее понимает
+        clean_unit = normalize_unit_key(raw_unit)
+        if is_known_unit(clean_unit):
+            return clean_unit, value
+        return raw_unit, value
     
     def _parse_reference_range(self, raw_range: str, unit: Optional[str]) -> Tuple[Optional[Decimal], Optional[Decimal]]:
         """Парсит референсные значения"""
@@ -236,24 +193,18 @@ class NormalizationService:
         
         return None, None
     
-    def _get_default_reference_ranges(self, analyte: Analyte) -> Tuple[Optional[Decimal], Optional[Decimal]]:
-        """Получает дефолтные референсные значения из справочника"""
-        if not analyte.reference_ranges:
-            return None, None
-        
-        # TODO: Учесть пол и возраст пациента в будущих версиях
-        # Пока используем 'normal' или первый доступный диапазон
-        ranges = analyte.reference_ranges
-        
-        if 'normal' in ranges:
-            ref_data = ranges['normal']
-        else:
-            ref_data = list(ranges.values())[0]
-        
-        min_val = Decimal(str(ref_data.get('min'))) if ref_data.get('min') else None
-        max_val = Decimal(str(ref_data.get('max'))) if ref_data.get('max') else None
-        
-        return min_val, max_val
+    def _get_default_reference_ranges(self, analyte: Analyte, document: Optional[Document] = None) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        """Получает референсные значения из справочника с учетом пола и возраста пациента"""
+        if document is None:
+            return reference_range_resolver.resolve(analyte)
+        
+        user = document.user
+        return reference_range_resolver.resolve(
+            analyte,
+            sex=user.sex if user else None,
+            age=age_at(user.birth_date, document.report_date or document.created_at) if user else None,
+            lab=document.lab_name
+        )
     
     def _calculate_flags(self, value: Decimal, ref_min: Optional[Decimal], ref_max: Optional[Decimal]) -> Tuple[Optional[str], bool]:
         """Вычисляет флаги отклонения от нормы"""
@@ -282,27 +233,4 @@ class NormalizationService:
             if ref_max > 0 and value / ref_max > Decimal('10'):
                 return True
         
-        return False
-    
-    def _calculate_delta(self, result: Result):
-        """Вычисляет дельту с предыдущим результатом того же аналита"""
-        if not result.analyte_id or not result.is_numeric:
-            return
-        
-        # Находим предыдущий результат для того же аналита
-        previous_result = self.db.query(Result).filter(
-            Result.analyte_id == result.analyte_id,
-            Result.document_id != result.document_id,
-            Result.is_numeric == True,
-            Result.normalized == True
-        ).join(Result.document).filter(
-            Result.document.has(user_id=result.document.user_id)
-        ).order_by(Result.created_at.desc()).first()
-        
-        if previous_result and previous_result.numeric_value:
-            result.previous_result_id = previous_result.id
-            result.delta_value = result.numeric_value - previous_result.numeric_value
-            
-            # Процентное изменение
-            if previous_result.numeric_value != 0:
-                result.delta_percent = (result.delta_value / previous_result.numeric_value) * 100
\ No newline at end of file
+        return False
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""
+Текстовый слой PDF для извлечения без vision.
+
+Большинство PDF из лабораторий сформированы программно и содержат текст:
+его дешевле и быстрее отправить в текстовую модель, чем base64 всего файла
+в gpt-4o. Таблицы извлекаются отдельно и передаются строками с разделителем
+" | ", чтобы модель видела соответствие показателя, значения и единицы.
+Страницы почти без текста считаются сканами - для них остается vision.
+"""
+import io
+import logging
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PdfTextLayer:
+    page_count: int
+    page_texts: List[str] = field(default_factory=list)
+    scanned_pages: List[int] = field(default_factory=list)  # Номера страниц с 0
+    
+    @property
+    def has_text(self) -> bool:
+        return len(self.scanned_pages) < self.page_count
+    
+    @property
+    def fully_digital(self) -> bool:
+        return self.page_count > 0 and not self.scanned_pages
+    
+    def text(self) -> str:
+        """Текст страниц с текстовым слоем, с заголовками страниц"""
+        return "\n\n".join(
+            f"--- Страница {index + 1} ---\n{page_text}"
+            for index, page_text in enumerate(self.page_texts)
+            if index not in self.scanned_pages
+        )
+
+
+def _format_table(rows: List[List[Optional[str]]]) -> str:
+    lines = []
+    for row in rows:
+        cells = [" ".join((cell or "").split()) for cell in row]
+        if any(cells):
+            lines.append(" | ".join(cells))
+    return "\n".join(lines)
+
+
+def _page_text(page) -> str:
+    """Текст страницы: таблицы отдельно строками, остальное - как есть"""
+    tables = page.find_tables()
+    remainder = page
+    for table in tables:
+        remainder = remainder.outside_bbox(table.bbox)
+    parts = [remainder.extract_text() or ""]
+    parts.extend(_format_table(table.extract()) for table in tables)
+    return "\n\n".join(part.strip() for part in parts if part and part.strip())
+
+
+def extract_text_layer(content) -> Optional[PdfTextLayer]:
+    """Текстовый слой PDF или None, если файл не читается pdfplumber"""
+    import pdfplumber
+    try:
+        with pdfplumber.open(io.BytesIO(bytes(content))) as pdf:
+            layer = PdfTextLayer(page_count=len(pdf.pages))
+            for index, page in enumerate(pdf.pages):
+                page_text = _page_text(page)
+                layer.page_texts.append(page_text)
+                if len(page_text) < settings.pdf_text_min_chars_per_page:
+                    layer.scanned_pages.append(index)
+            return layer
+    except Exception as e:
+        logger.warning(f"PDF text layer is not readable: {str(e)}")
+        return None
+
+
+def render_pages(content, page_numbers: List[int]) -> List[bytes]:
+    """PNG выбранных страниц (сканов) для vision"""
+    import pdfplumber
+    images = []
+    with pdfplumber.open(io.BytesIO(bytes(content))) as pdf:
+        for index in page_numbers:
+            buffer = io.BytesIO()
+            pdf.pages[index].to_image(resolution=settings.pdf_render_dpi).save(buffer, format="PNG")
+            images.append(buffer.getvalue())
+    return images
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""
+Разрешение референсных интервалов с учетом пола, возраста, лаборатории и метода.
+
+Analyte.reference_ranges компилируется один раз на процесс в список
+интервалов с уже сконвертированными Decimal-границами. Поддерживаются
+исходные форматы справочника ({"normal": ...}, {"male": ..., "female": ...})
+и расширенный:
+
+    {"ranges": [{"sex": "female", "age_min": 18, "age_max": 65,
+                 "lab": "Инвитро", "method": null, "min": 120, "max": 150}]}
+
+Скомпилированный индекс сбрасывается при изменении версии кэша
+справочника аналитов (analyte_cache), то есть при любой правке аналита.
+Версия сверяется не чаще reference_ranges_check_interval.
+
+Здесь же - положение значения в интервале и относительное отклонение,
+которые сохраняются в результате при нормализации.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.core.cache import analyte_cache
+from app.core.config import settings
+from app.models.analyte import Analyte
+from app.models.result import Result
+
+SEXES = ("male", "female")
+
+# Ключи исходного формата, означающие диапазон без привязки к полу
+_NEUTRAL_KEYS = ("normal", "all", "default")
+
+
+@dataclass(frozen=True)
+class ReferenceInterval:
+    min_value: Optional[Decimal]
+    max_value: Optional[Decimal]
+    sex: Optional[str] = None
+    age_min: Optional[float] = None  # включительно, лет
+    age_max: Optional[float] = None  # не включительно, лет
+    lab: Optional[str] = None
+    method: Optional[str] = None
+    
+    @property
+    def specificity(self) -> int:
+        """Чем больше заданных условий, тем приоритетнее интервал"""
+        return sum(
+            value is not None
+            for value in (self.sex, self.age_min, self.age_max, self.lab, self.method)
+        )
+    
+    def matches(
+        self,
+        sex: Optional[str],
+        age: Optional[float],
+        lab: Optional[str],
+        method: Optional[str]
+    ) -> bool:
+        if self.sex is not None and self.sex != sex:
+            return False
+        if self.age_min is not None and (age is None or age < self.age_min):
+            return False
+        if self.age_max is not None and (age is None or age >= self.age_max):
+            return False
+        if self.lab is not None and (lab is None or self.lab.lower() != lab.lower()):
+            return False
+        if self.method is not None and (method is None or self.method.lower() != method.lower()):
+            return False
+        return True
+
+
+def _to_decimal(value: Any) -> Optional[Decimal]:
+    if value is None or value == "":
+        return None
+    return Decimal(str(value))
+
+
+def _to_float(value: Any) -> Optional[float]:
+    return float(value) if value is not None else None
+
+
+def _interval(data: Dict[str, Any], sex: Optional[str] = None) -> ReferenceInterval:
+    return ReferenceInterval(
+        min_value=_to_decimal(data.get("min")),
+        max_value=_to_decimal(data.get("max")),
+        sex=data.get("sex", sex),
+        age_min=_to_float(data.get("age_min")),
+        age_max=_to_float(data.get("age_max")),
+        lab=data.get("lab"),
+        method=data.get("method"),
+    )
+
+
+def compile_reference_ranges(reference_ranges: Optional[Dict[str, Any]]) -> Tuple[ReferenceInterval, ...]:
+    """Компилирует JSON справочника в интервалы, отсортированные по специфичности"""
+    if not reference_ranges:
+        return ()
+    
+    intervals: List[ReferenceInterval] = []
+    fallback: List[ReferenceInterval] = []
+    for key, data in reference_ranges.items():
+        if key == "ranges" and isinstance(data, list):
+            intervals.extend(_interval(item) for item in data if isinstance(item, dict))
+        elif isinstance(data, dict):
+            if key in SEXES:
+                intervals.append(_interval(data, sex=key))
+            elif key in _NEUTRAL_KEYS:
+                intervals.append(_interval(data))
+            else:
+                # Неизвестная группа: используется, только если других диапазонов нет
+                fallback.append(_interval(data))
+    
+    if not intervals:
+        return tuple(fallback[:1])
+    intervals.sort(key=lambda interval: -interval.specificity)
+    return tuple(intervals)
+
+
+def age_at(birth_date: Optional[date], observed_at: Optional[datetime]) -> Optional[float]:
+    """Возраст в годах на дату наблюдения"""
+    if birth_date is None:
+        return None
+    observed = observed_at.date() if isinstance(observed_at, datetime) else (observed_at or date.today())
+    return (observed - birth_date).days / 365.25
+
+
+DEVIATION_PRECISION = Decimal("0.0001")
+# Предел Numeric(12, 4): при очень узком интервале или малой границе частное может быть огромным
+DEVIATION_LIMIT = Decimal("99999999.9999")
+
+
+def _bounded(ratio: Decimal) -> Decimal:
+    return max(-DEVIATION_LIMIT, min(DEVIATION_LIMIT, ratio)).quantize(DEVIATION_PRECISION)
+
+
+def range_position(value: Decimal, ref_min: Optional[Decimal], ref_max: Optional[Decimal]) -> Optional[Decimal]:
+    """Положение значения в референсном интервале: 0 - нижняя граница, 1 - верхняя"""
+    if ref_min is None or ref_max is None or ref_max <= ref_min:
+        return None
+    return _bounded((value - ref_min) / (ref_max - ref_min))
+
+
+def relative_deviation(value: Decimal, ref_min: Optional[Decimal], ref_max: Optional[Decimal]) -> Optional[Decimal]:
+    """
+    Относительное отклонение от нарушенной границы: 0 внутри интервала,
+    +0.25 - на 25% выше верхней границы, -0.1 - на 10% ниже нижней
+    """
+    if ref_min is None and ref_max is None:
+        return None
+    if ref_max is not None and value > ref_max:
+        bound = ref_max
+    elif ref_min is not None and value < ref_min:
+        bound = ref_min
+    else:
+        return Decimal("0")
+    
+    if bound == 0:
+        # От нулевой границы отклонение считаем в ширине интервала
+        if ref_min is None or ref_max is None or ref_max <= ref_min:
+            return None
+        return _bounded((value - bound) / (ref_max - ref_min))
+    return _bounded((value - bound) / abs(bound))
+
+
+def apply_range_deviation(result: Result):
+    """Заполняет range_position и relative_deviation по нормализованным значениям"""
+    if not result.is_numeric or result.numeric_value is None:
+        result.range_position = None
+        result.relative_deviation = None
+        return
+    
+    value = Decimal(result.numeric_value)
+    ref_min = result.normalized_reference_min
+    ref_max = result.normalized_reference_max
+    result.range_position = range_position(value, ref_min, ref_max)
+    result.relative_deviation = relative_deviation(value, ref_min, ref_max)
+
+
+class ReferenceRangeResolver:
+    def __init__(self):
+        self._compiled: Dict[int, Tuple[ReferenceInterval, ...]] = {}
+        self._version: Optional[int] = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def _refresh_version(self):
+        if time.monotonic() - self._checked_at < settings.reference_ranges_check_interval:
+            return
+        self._checked_at = time.monotonic()
+        version = analyte_cache.get_version_sync()
+        if version is None:
+            # Redis недоступен - продолжаем с текущим индексом
+            return
+        with self._lock:
+            if version != self._version:
+                self._compiled.clear()
+                self._version = version
+    
+    def _intervals(self, analyte: Analyte) -> Tuple[ReferenceInterval, ...]:
+        intervals = self._compiled.get(analyte.id)
+        if intervals is None:
+            intervals = compile_reference_ranges(analyte.reference_ranges)
+            with self._lock:
+                self._compiled[analyte.id] = intervals
+        return intervals
+    
+    def resolve(
+        self,
+        analyte: Analyte,
+        sex: Optional[str] = None,
+        age: Optional[float] = None,
+        lab: Optional[str] = None,
+        method: Optional[str] = None
+    ) -> Tuple[Optional[Decimal], Optional[Decimal]]:
+        self._refresh_version()
+        intervals = self._intervals(analyte)
+        for interval in intervals:
+            if interval.matches(sex, age, lab, method):
+                return interval.min_value, interval.max_value
+        
+        if sex is None:
+            # Пол неизвестен, а диапазоны заданы только по полу:
+            # берем охватывающий интервал, чтобы не помечать норму одного пола как отклонение
+            candidates = [
+                interval for interval in intervals
+                if interval.sex is not None and interval.matches(interval.sex, age, lab, method)
+            ]
+            if candidates:
+                mins = [interval.min_value for interval in candidates]
+                maxs = [interval.max_value for interval in candidates]
+                return (
+                    None if None in mins else min(mins),
+                    None if None in maxs else max(maxs)
+                )
+        
+        return None, None
+    
+    def invalidate(self, analyte_ids: Optional[Iterable[int]] = None):
+        with self._lock:
+            if analyte_ids is None:
+                self._compiled.clear()
+            else:
+                for analyte_id in analyte_ids:
+                    self._compiled.pop(analyte_id, None)
+
+
+reference_range_resolver = ReferenceRangeResolver()
\ No newline at end of file
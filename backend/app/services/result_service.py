@@ -1,18 +1,24 @@
-from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import desc, and_, or_, func, distinct
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from sqlalchemy import select, desc, and_, or_, func, distinct
 from typing import List, Optional
 from datetime import date, datetime, timedelta
 from app.models.result import Result
 from app.models.document import Document
 from app.models.analyte import Analyte
 from app.schemas.result import ResultCreate, ResultUpdate
+from app.services.reference_ranges import apply_range_deviation
+from app.services.stats_service import apply_stats_delta_async
+
+# Поля, от которых зависят range_position/relative_deviation
+RANGE_FIELDS = {"numeric_value", "is_numeric", "normalized_reference_min", "normalized_reference_max"}
 
 
 class ResultService:
-    def __init__(self, db: Session):
+    def __init__(self, db: AsyncSession):
         self.db = db
     
-    def get_results(
+    async def get_results(
         self,
         user_id: int,
         skip: int = 0,
@@ -22,9 +28,10 @@ class ResultService:
         date_from: Optional[date] = None,
         date_to: Optional[date] = None,
         out_of_range: Optional[bool] = None,
-        suspect: Optional[bool] = None
+        suspect: Optional[bool] = None,
+        order_by: str = "date"
     ) -> List[Result]:
-        query = self.db.query(Result).options(
+        query = select(Result).options(
             joinedload(Result.analyte),
             joinedload(Result.document)
         ).join(Document).filter(Document.user_id == user_id)
@@ -47,66 +54,82 @@ class ResultService:
         if suspect is not None:
             query = query.filter(Result.is_suspect == suspect)
         
-        return query.order_by(desc(Result.created_at)).offset(skip).limit(limit).all()
+        if order_by == "deviation":
+            # Самые отклоняющиеся первыми, без отклонения (NULL) - в конце;
+            # порядок совпадает с индексом ix_results_document_id_abs_relative_deviation
+            query = query.order_by(
+                func.abs(Result.relative_deviation).desc().nulls_last(), desc(Result.created_at)
+            )
+        else:
+            query = query.order_by(desc(Result.created_at))
+        query = query.offset(skip).limit(limit)
+        return (await self.db.scalars(query)).all()
     
-    def get_result(self, result_id: int, user_id: int) -> Optional[Result]:
-        return self.db.query(Result).options(
+    async def get_result(self, result_id: int, user_id: int) -> Optional[Result]:
+        query = select(Result).options(
             joinedload(Result.analyte),
             joinedload(Result.document)
         ).join(Document).filter(
             Result.id == result_id,
             Document.user_id == user_id
-        ).first()
+        )
+        return (await self.db.scalars(query)).first()
     
-    def update_result(
+    async def update_result(
         self, 
         result_id: int, 
         result_update: ResultUpdate,
         user_id: int
     ) -> Optional[Result]:
-        db_result = self.get_result(result_id, user_id)
+        db_result = await self.get_result(result_id, user_id)
         if not db_result:
             return None
         
         update_data = result_update.model_dump(exclude_unset=True)
         for field, value in update_data.items():
             setattr(db_result, field, value)
+        if RANGE_FIELDS.intersection(update_data):
+            apply_range_deviation(db_result)
+        
+        await self.db.commit()
         
-        self.db.commit()
-        self.db.refresh(db_result)
-        return db_result
+        # Перечитываем вместе со связями: refresh сбрасывает analyte, а ленивая
+        # загрузка в AsyncSession недоступна (MissingGreenlet при сериализации)
+        return await self.get_result(result_id, user_id)
     
-    def get_analyte_history(
+    async def get_analyte_history(
         self,
         analyte_id: int,
         user_id: int,
         skip: int = 0,
         limit: int = 50
     ) -> List[Result]:
-        return self.db.query(Result).options(
+        query = select(Result).options(
             joinedload(Result.analyte),
             joinedload(Result.document)
         ).join(Document).filter(
             Result.analyte_id == analyte_id,
             Document.user_id == user_id
-        ).order_by(desc(Result.created_at)).offset(skip).limit(limit).all()
+        ).order_by(desc(Result.created_at)).offset(skip).limit(limit)
+        return (await self.db.scalars(query)).all()
     
-    def get_source_label_history(
+    async def get_source_label_history(
         self,
         source_label: str,
         user_id: int,
         skip: int = 0,
         limit: int = 50
     ) -> List[Result]:
-        return self.db.query(Result).options(
+        query = select(Result).options(
             joinedload(Result.analyte),
             joinedload(Result.document)
         ).join(Document).filter(
             Result.source_label == source_label,
             Document.user_id == user_id
-        ).order_by(desc(Result.created_at)).offset(skip).limit(limit).all()
+        ).order_by(desc(Result.created_at)).offset(skip).limit(limit)
+        return (await self.db.scalars(query)).all()
     
-    def get_trends_summary(
+    async def get_trends_summary(
         self,
         user_id: int,
         analyte_ids: List[int] = None,
@@ -114,7 +137,10 @@ class ResultService:
     ) -> dict:
         cutoff_date = datetime.now() - timedelta(days=days)
         
-        query = self.db.query(Result).join(Document).filter(
+        # analyte загружается сразу - ленивая загрузка недоступна в AsyncSession
+        query = select(Result).options(
+            joinedload(Result.analyte)
+        ).join(Document).filter(
             Document.user_id == user_id,
             Result.created_at >= cutoff_date,
             Result.normalized == True
@@ -123,7 +149,7 @@ class ResultService:
         if analyte_ids:
             query = query.filter(Result.analyte_id.in_(analyte_ids))
         
-        results = query.all()
+        results = (await self.db.scalars(query)).all()
         
         trends = {}
         for result in results:
@@ -149,7 +175,7 @@ class ResultService:
         
         return trends
     
-    def get_results_summary(
+    async def get_results_summary(
         self,
         user_id: int,
         date_from: Optional[date] = None,
@@ -162,7 +188,7 @@ class ResultService:
         
         # Подзапрос для получения последних результатов по каждому показателю
         # Используем source_label как группировку, так как analyte_id может быть None
-        latest_subquery = self.db.query(
+        latest_subquery = select(
             Result.source_label,
             func.max(Result.created_at).label('latest_date')
         ).join(Document).filter(
@@ -182,7 +208,7 @@ class ResultService:
         latest_subquery = latest_subquery.group_by(Result.source_label).subquery()
         
         # Основной запрос для получения данных
-        query = self.db.query(Result).options(
+        query = select(Result).options(
             joinedload(Result.analyte),
             joinedload(Result.document)
         ).join(Document).join(
@@ -201,7 +227,7 @@ class ResultService:
         if out_of_range_only:
             query = query.filter(Result.is_out_of_range == True)
         
-        results = query.order_by(desc(Result.created_at)).all()
+        results = (await self.db.scalars(query.order_by(desc(Result.created_at)))).all()
         
         # Формируем ответ
         summary = []
@@ -248,16 +274,21 @@ class ResultService:
         
         return summary
     
-    def create_manual_result(self, result_data: ResultCreate, user_id: int) -> Result:
+    async def create_manual_result(self, result_data: ResultCreate, user_id: int) -> Result:
         # TODO: Проверить что document принадлежит пользователю
         db_result = Result(
             **result_data.model_dump(),
             normalized=False  # Будет нормализовано позже
         )
         self.db.add(db_result)
-        self.db.commit()
-        self.db.refresh(db_result)
+        await apply_stats_delta_async(self.db, user_id, total_results=1)
+        await self.db.commit()
         
         # TODO: Запустить нормализацию через Celery
         
-        return db_result
\ No newline at end of file
+        # Перечитываем вместе со связями для ответа
+        query = select(Result).options(
+            joinedload(Result.analyte),
+            joinedload(Result.document)
+        ).filter(Result.id == db_result.id)
+        return (await self.db.scalars(query)).one()
\ No newline at end of file
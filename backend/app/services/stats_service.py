@@ -0,0 +1,125 @@
+"""
+Статистика пользователя для /stats.
+
+Счетчики хранятся в user_stats и обновляются в той же транзакции,
+что и изменения документов/результатов: INSERT ... ON CONFLICT прибавляет
+изменение к строке или создает ее (у нового пользователя счетчики с нуля).
+Полный пересчет одним агрегирующим запросом (COUNT(*) FILTER) - при
+чтении без строки и периодически в задаче rebuild_all_stats.
+"""
+from typing import Dict, Optional
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from sqlalchemy.sql import Insert
+from app.models.analyte import Analyte
+from app.models.document import Document
+from app.models.result import Result
+from app.models.user import UserStats
+
+# Статусы документа, которые учитываются в счетчиках
+_STATUS_COUNTERS = {
+    "completed": "processed_documents",
+    "pending": "pending_documents",
+}
+
+
+def _active_analytes_count():
+    return select(func.count(Analyte.id)).filter(Analyte.is_active == True).scalar_subquery()
+
+
+def compute_user_stats(db: Session, user_id: int) -> Dict[str, int]:
+    """Полный пересчет статистики одним запросом"""
+    document_counts = select(
+        func.count(Document.id).label("total_documents"),
+        func.count(Document.id).filter(Document.status == "completed").label("processed_documents"),
+        func.count(Document.id).filter(Document.status == "pending").label("pending_documents"),
+    ).filter(Document.user_id == user_id).subquery()
+    
+    results_count = select(func.count(Result.id)).join(Document).filter(
+        Document.user_id == user_id
+    ).scalar_subquery()
+    
+    row = db.execute(select(
+        document_counts.c.total_documents,
+        results_count.label("total_results"),
+        _active_analytes_count().label("total_analytes"),
+        document_counts.c.processed_documents,
+        document_counts.c.pending_documents,
+    )).one()
+    return dict(row._mapping)
+
+
+def rebuild_user_stats(db: Session, user_id: int) -> Dict[str, int]:
+    """Пересчитывает и сохраняет счетчики пользователя"""
+    stats = compute_user_stats(db, user_id)
+    counters = {key: value for key, value in stats.items() if key != "total_analytes"}
+    stmt = pg_insert(UserStats).values(user_id=user_id, **counters)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={**counters, "updated_at": func.now()}
+    ))
+    db.commit()
+    return stats
+
+
+def get_user_stats(db: Session, user_id: int) -> Dict[str, int]:
+    """Статистика из счетчиков за один запрос по первичному ключу"""
+    row = db.execute(select(
+        UserStats.total_documents,
+        UserStats.total_results,
+        _active_analytes_count().label("total_analytes"),
+        UserStats.processed_documents,
+        UserStats.pending_documents,
+    ).filter(UserStats.user_id == user_id)).first()
+    
+    if row is not None:
+        return dict(row._mapping)
+    
+    try:
+        return rebuild_user_stats(db, user_id)
+    except SQLAlchemyError:
+        # Сессия на read-only реплике: отдаем пересчет, строка появится при чтении с primary
+        db.rollback()
+        return compute_user_stats(db, user_id)
+
+
+def status_change_deltas(old_status: Optional[str], new_status: Optional[str]) -> Dict[str, int]:
+    """Изменения счетчиков при переходе документа между статусами"""
+    deltas: Dict[str, int] = {}
+    if old_status == new_status:
+        return deltas
+    if old_status in _STATUS_COUNTERS:
+        deltas[_STATUS_COUNTERS[old_status]] = deltas.get(_STATUS_COUNTERS[old_status], 0) - 1
+    if new_status in _STATUS_COUNTERS:
+        deltas[_STATUS_COUNTERS[new_status]] = deltas.get(_STATUS_COUNTERS[new_status], 0) + 1
+    return deltas
+
+
+def _stats_update(user_id: int, deltas: Dict[str, int]) -> Optional[Insert]:
+    deltas = {key: value for key, value in deltas.items() if value}
+    if not deltas:
+        return None
+    stmt = pg_insert(UserStats).values(user_id=user_id, **deltas)
+    return stmt.on_conflict_do_update(
+        index_elements=[UserStats.user_id],
+        set_={
+            **{key: getattr(UserStats, key) + stmt.excluded[key] for key in deltas},
+            "updated_at": func.now()
+        }
+    )
+
+
+def apply_stats_delta(db: Session, user_id: int, **deltas: int):
+    """Добавляет изменение счетчиков в текущую транзакцию (коммитит вызывающий)"""
+    stmt = _stats_update(user_id, deltas)
+    if stmt is not None:
+        db.execute(stmt)
+
+
+async def apply_stats_delta_async(db: AsyncSession, user_id: int, **deltas: int):
+    stmt = _stats_update(user_id, deltas)
+    if stmt is not None:
+        await db.execute(stmt)
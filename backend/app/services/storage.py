@@ -0,0 +1,221 @@
+"""
+Асинхронный доступ к объектному хранилищу (S3/MinIO).
+
+Два бэкенда с общим интерфейсом StorageBackend:
+- AioS3Storage - нативный async-клиент aiobotocore, по клиенту на event loop;
+- ThreadPoolStorage - общий boto3-клиент процесса в отдельном пуле потоков.
+
+API использует aiobotocore (если он установлен), воркеры Celery - пул
+потоков: каждая задача запускает свой event loop через asyncio.run, и
+async-клиент пришлось бы создавать заново. В обоих случаях event loop
+не блокируется на сетевых вызовах S3.
+"""
+import asyncio
+import logging
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, Optional, Tuple
+
+from app.core.clients import get_s3_client
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1024 * 1024
+
+
+class StorageBackend(ABC):
+    """Интерфейс хранилища объектов"""
+    
+    name = "base"
+    
+    @abstractmethod
+    async def put(self, key: str, body: bytes, content_type: str):
+        ...
+    
+    async def get(self, key: str) -> bytes:
+        body, _ = await self.fetch(key)
+        return body
+    
+    @abstractmethod
+    async def fetch(self, key: str) -> Tuple[bytes, Optional[str]]:
+        """Содержимое объекта и его ETag"""
+    
+    @abstractmethod
+    def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        ...
+    
+    @abstractmethod
+    async def read_head(self, key: str, length: int) -> bytes:
+        """Первые length байт объекта (Range-запрос)"""
+    
+    @abstractmethod
+    async def head(self, key: str) -> Dict[str, Any]:
+        ...
+    
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+    
+    async def close(self):
+        pass
+
+
+class ThreadPoolStorage(StorageBackend):
+    """Синхронный boto3-клиент в выделенном пуле потоков"""
+    
+    name = "threadpool"
+    
+    def __init__(self, max_workers: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="labtrack-s3")
+    
+    async def _call(self, func, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(*args, **kwargs))
+    
+    async def put(self, key: str, body: bytes, content_type: str):
+        await self._call(
+            get_s3_client().put_object,
+            Bucket=settings.s3_bucket, Key=key, Body=body, ContentType=content_type
+        )
+    
+    async def fetch(self, key: str) -> Tuple[bytes, Optional[str]]:
+        def read():
+            response = get_s3_client().get_object(Bucket=settings.s3_bucket, Key=key)
+            return response["Body"].read(), response.get("ETag")
+        return await self._call(read)
+    
+    async def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        response = await self._call(get_s3_client().get_object, Bucket=settings.s3_bucket, Key=key)
+        body = response["Body"]
+        try:
+            while True:
+                chunk = await self._call(body.read, chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            body.close()
+    
+    async def read_head(self, key: str, length: int) -> bytes:
+        def read():
+            response = get_s3_client().get_object(Bucket=settings.s3_bucket, Key=key, Range=f"bytes=0-{length - 1}")
+            return response["Body"].read()
+        return await self._call(read)
+    
+    async def head(self, key: str) -> Dict[str, Any]:
+        return await self._call(get_s3_client().head_object, Bucket=settings.s3_bucket, Key=key)
+    
+    async def delete(self, key: str):
+        await self._call(get_s3_client().delete_object, Bucket=settings.s3_bucket, Key=key)
+    
+    async def close(self):
+        self._executor.shutdown(wait=False)
+
+
+class AioS3Storage(StorageBackend):
+    """Нативный async-клиент aiobotocore; клиент привязан к event loop"""
+    
+    name = "aiobotocore"
+    
+    def __init__(self):
+        from aiobotocore.session import get_session
+        self._session = get_session()
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+        self._contexts: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Any]" = weakref.WeakKeyDictionary()
+    
+    async def _client(self):
+        loop = asyncio.get_running_loop()
+        client = self._clients.get(loop)
+        if client is None:
+            from aiobotocore.config import AioConfig
+            context = self._session.create_client(
+                "s3",
+                endpoint_url=settings.s3_endpoint,
+                aws_access_key_id=settings.s3_access_key,
+                aws_secret_access_key=settings.s3_secret_key,
+                config=AioConfig(
+                    max_pool_connections=settings.s3_max_pool_connections,
+                    connect_timeout=settings.s3_connect_timeout,
+                    read_timeout=settings.s3_read_timeout,
+                    retries={"max_attempts": 3, "mode": "standard"}
+                )
+            )
+            client = await context.__aenter__()
+            self._contexts[loop] = context
+            self._clients[loop] = client
+        return client
+    
+    async def put(self, key: str, body: bytes, content_type: str):
+        client = await self._client()
+        await client.put_object(Bucket=settings.s3_bucket, Key=key, Body=body, ContentType=content_type)
+    
+    async def fetch(self, key: str) -> Tuple[bytes, Optional[str]]:
+        client = await self._client()
+        response = await client.get_object(Bucket=settings.s3_bucket, Key=key)
+        async with response["Body"] as body:
+            return await body.read(), response.get("ETag")
+    
+    async def stream(self, key: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> AsyncIterator[bytes]:
+        client = await self._client()
+        response = await client.get_object(Bucket=settings.s3_bucket, Key=key)
+        async with response["Body"] as body:
+            while True:
+                chunk = await body.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    async def read_head(self, key: str, length: int) -> bytes:
+        client = await self._client()
+        response = await client.get_object(Bucket=settings.s3_bucket, Key=key, Range=f"bytes=0-{length - 1}")
+        async with response["Body"] as body:
+            return await body.read()
+    
+    async def head(self, key: str) -> Dict[str, Any]:
+        client = await self._client()
+        return await client.head_object(Bucket=settings.s3_bucket, Key=key)
+    
+    async def delete(self, key: str):
+        client = await self._client()
+        await client.delete_object(Bucket=settings.s3_bucket, Key=key)
+    
+    async def close(self):
+        """Закрывает клиент текущего event loop (shutdown API)"""
+        loop = asyncio.get_running_loop()
+        context = self._contexts.pop(loop, None)
+        self._clients.pop(loop, None)
+        if context is not None:
+            await context.__aexit__(None, None, None)
+
+
+_storage: Optional[StorageBackend] = None
+_storage_lock = threading.Lock()
+
+
+def _create_storage(backend: str) -> StorageBackend:
+    if backend == "aiobotocore":
+        try:
+            return AioS3Storage()
+        except ImportError:
+            logger.warning("aiobotocore is not installed, falling back to thread pool S3 backend")
+    return ThreadPoolStorage(max_workers=settings.s3_max_pool_connections)
+
+
+def get_storage() -> StorageBackend:
+    """Бэкенд хранилища процесса (настройка s3_async_backend)"""
+    global _storage
+    if _storage is None:
+        with _storage_lock:
+            if _storage is None:
+                _storage = _create_storage(settings.s3_async_backend)
+    return _storage
+
+
+def use_storage_backend(backend: str):
+    """Переключает бэкенд процесса (воркеры Celery используют пул потоков)"""
+    global _storage
+    with _storage_lock:
+        _storage = _create_storage(backend)
\ No newline at end of file
@@ -0,0 +1,157 @@
+"""
+Приведение единиц измерения по правилам из таблицы unit_conversion_rules.
+
+Правила компилируются в словарь с ключом (analyte_code, source_unit, lab_name),
+поэтому поиск - несколько обращений к dict без запросов к БД. Скомпилированная
+таблица привязана к версии unit_rules_cache: загрузка правил (скрипт
+load_unit_rules.py) увеличивает версию, и воркеры перечитывают правила
+без перезапуска.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from decimal import Decimal
+from typing import Dict, Iterable, Optional, Tuple
+
+import pint
+from sqlalchemy.orm import Session
+
+from app.core.cache import unit_rules_cache
+from app.core.config import settings
+from app.models.analyte import UnitConversionRule
+
+logger = logging.getLogger(__name__)
+
+RuleKey = Tuple[Optional[str], str, Optional[str]]
+
+
+def _create_unit_registry() -> pint.UnitRegistry:
+    """Реестр Pint с медицинскими единицами (создается один раз на процесс)"""
+    ureg = pint.UnitRegistry()
+    ureg.define('cell = 1 * count')  # Клетки
+    ureg.define('IU = 1 * international_unit')  # Международные единицы
+    ureg.define('U = 1 * unit')  # Единицы активности
+    ureg.define('copies = 1 * count')  # Копии (для ПЦР)
+    return ureg
+
+
+ureg = _create_unit_registry()
+
+
+def normalize_unit_key(unit: Optional[str]) -> Optional[str]:
+    return unit.strip().lower() if unit else None
+
+
+@lru_cache(maxsize=1024)
+def is_known_unit(unit: str) -> bool:
+    """Понимает ли Pint единицу (результат кэшируется - разбор дорогой)"""
+    try:
+        ureg(unit)
+        return True
+    except Exception:
+        return False
+
+
+@dataclass(frozen=True)
+class CompiledConversion:
+    target_unit: str
+    factor: Decimal
+
+
+def molar_factor(source_unit: str, target_unit: str, molar_mass: Decimal) -> Decimal:
+    """Коэффициент пересчета между массовой и молярной концентрацией"""
+    quantity = ureg.Quantity(1, source_unit) / ureg.Quantity(float(molar_mass), "g/mol")
+    if quantity.check(ureg(target_unit).dimensionality):
+        return Decimal(str(quantity.to(target_unit).magnitude))
+    # Обратное направление: молярная -> массовая
+    quantity = ureg.Quantity(1, source_unit) * ureg.Quantity(float(molar_mass), "g/mol")
+    return Decimal(str(quantity.to(target_unit).magnitude))
+
+
+def compile_rules(rules: Iterable[UnitConversionRule]) -> Dict[RuleKey, CompiledConversion]:
+    table: Dict[RuleKey, CompiledConversion] = {}
+    for rule in rules:
+        try:
+            if rule.factor is not None:
+                factor = Decimal(rule.factor)
+            elif rule.molar_mass is not None:
+                factor = molar_factor(rule.source_unit, rule.target_unit, Decimal(rule.molar_mass))
+            else:
+                factor = Decimal("1")
+        except (pint.errors.PintError, ValueError, ArithmeticError) as e:
+            logger.warning(f"Skipping unit rule {rule.id} ({rule.source_unit} -> {rule.target_unit}): {str(e)}")
+            continue
+        
+        key = (rule.analyte_code, normalize_unit_key(rule.source_unit), rule.lab_name.lower() if rule.lab_name else None)
+        table[key] = CompiledConversion(rule.target_unit, factor)
+    return table
+
+
+class UnitConversionEngine:
+    def __init__(self):
+        self._table: Dict[RuleKey, CompiledConversion] = {}
+        self._version: Optional[int] = None
+        self._loaded = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+    
+    def load(self, db: Session, version: Optional[int] = None):
+        """Перечитывает правила из БД и компилирует таблицу"""
+        rules = db.query(UnitConversionRule).filter(UnitConversionRule.is_active == True).all()
+        if version is None:
+            version = unit_rules_cache.get_version_sync()
+        self.use_rules(rules, version)
+        logger.info(f"Loaded {len(self._table)} unit conversion rules (version {version})")
+    
+    def use_rules(self, rules: Iterable[UnitConversionRule], version: Optional[int] = None):
+        """Подменяет таблицу уже загруженными правилами"""
+        table = compile_rules(rules)
+        with self._lock:
+            self._table = table
+            self._version = version
+            self._loaded = True
+            self._checked_at = time.monotonic()
+    
+    def refresh(self, db: Session):
+        """Перезагружает правила, если изменилась их версия (не чаще unit_rules_check_interval)"""
+        if self._loaded and time.monotonic() - self._checked_at < settings.unit_rules_check_interval:
+            return
+        version = unit_rules_cache.get_version_sync()
+        if not self._loaded or (version is not None and version != self._version):
+            self.load(db, version)
+        else:
+            # Redis недоступен или версия не менялась - работаем с текущей таблицей
+            self._checked_at = time.monotonic()
+    
+    def lookup(self, analyte_code: Optional[str], unit: str, lab_name: Optional[str] = None) -> Optional[CompiledConversion]:
+        """Правило от более специфичного к общему: аналит+лаборатория, аналит, синоним"""
+        unit_key = normalize_unit_key(unit)
+        lab_key = lab_name.lower() if lab_name else None
+        table = self._table
+        for key in (
+            (analyte_code, unit_key, lab_key),
+            (analyte_code, unit_key, None),
+            (None, unit_key, lab_key),
+            (None, unit_key, None),
+        ):
+            conversion = table.get(key)
+            if conversion is not None:
+                return conversion
+        return None
+    
+    def convert(
+        self,
+        value: Decimal,
+        unit: str,
+        analyte_code: Optional[str],
+        lab_name: Optional[str] = None
+    ) -> Optional[Tuple[str, Decimal]]:
+        conversion = self.lookup(analyte_code, unit, lab_name)
+        if conversion is None:
+            return None
+        return conversion.target_unit, value * conversion.factor
+
+
+unit_conversion_engine = UnitConversionEngine()
\ No newline at end of file
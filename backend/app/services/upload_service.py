@@ -0,0 +1,143 @@
+"""
+Прямая загрузка файлов из браузера в S3 (presigned POST).
+
+1. API выдает форму presigned POST и сохраняет в Redis тикет загрузки:
+   ключ объекта, заявленные имя, тип, размер и MD5.
+2. Браузер отправляет файл прямо в S3/MinIO, байты не проходят через API.
+3. Завершение загрузки сверяет объект в хранилище с тикетом (HEAD: размер,
+   Content-Type, ETag = MD5 для однократной загрузки), после чего создается
+   документ. Неподтвержденный объект удаляется.
+"""
+import base64
+import binascii
+import json
+import uuid
+from typing import Any, Dict, Optional
+
+import redis.asyncio as aioredis
+
+from app.core.clients import s3_client_error
+from app.core.config import settings
+from app.schemas.base import DocumentUploadRequest, DocumentUploadTicket
+from app.services.file_service import FileService
+
+_client: Optional[aioredis.Redis] = None
+
+
+class UploadError(ValueError):
+    """Загрузка отклонена: тикет не найден или файл не совпал с заявленным"""
+
+
+def _ticket_key(upload_id: str) -> str:
+    return f"labtrack:upload:{upload_id}"
+
+
+def _redis() -> aioredis.Redis:
+    global _client
+    if _client is None:
+        _client = aioredis.from_url(settings.redis_url, decode_responses=True)
+    return _client
+
+
+def _md5_hex(md5_base64: str) -> str:
+    try:
+        return base64.b64decode(md5_base64, validate=True).hex()
+    except (binascii.Error, ValueError):
+        raise UploadError("Некорректный MD5 файла")
+
+
+async def create_upload(user_id: int, request: DocumentUploadRequest) -> DocumentUploadTicket:
+    """Проверяет заявленный файл и выдает форму presigned POST"""
+    file_service = FileService()
+    if request.size <= 0 or not file_service.validate_upload(request.filename, request.size):
+        raise UploadError("Недопустимый тип файла")
+    if request.md5:
+        _md5_hex(request.md5)
+    
+    file_key = file_service.build_file_key(user_id, request.filename)
+    presigned = file_service.create_presigned_post(
+        file_key, request.content_type, request.size, request.md5, settings.upload_url_expires
+    )
+    if presigned is None:
+        raise UploadError("Не удалось подготовить загрузку")
+    
+    upload_id = uuid.uuid4().hex
+    ticket = {
+        "user_id": user_id,
+        "file_key": file_key,
+        "filename": request.filename,
+        "content_type": request.content_type,
+        "size": request.size,
+        "md5": request.md5,
+    }
+    # Тикет живет дольше ссылки: браузер может закончить загрузку в последний момент
+    await _redis().set(_ticket_key(upload_id), json.dumps(ticket), ex=settings.upload_url_expires * 2)
+    
+    return DocumentUploadTicket(
+        upload_id=upload_id,
+        url=presigned["url"],
+        fields=presigned["fields"],
+        expires_in=settings.upload_url_expires
+    )
+
+
+async def complete_upload(user_id: int, upload_id: str) -> Dict[str, Any]:
+    """
+    Сверяет загруженный объект с тикетом и возвращает его параметры.
+    Тикет удаляется только после проверки (или окончательного отказа): если
+    браузер еще не дослал файл или HEAD не прошел, завершение можно повторить.
+    Одновременные завершения одного тикета исключает короткая блокировка.
+    """
+    client = _redis()
+    lock_key = f"{_ticket_key(upload_id)}:lock"
+    if not await client.set(lock_key, "1", nx=True, ex=settings.upload_complete_lock_ttl):
+        raise UploadError("Загрузка уже завершается")
+    try:
+        raw_ticket = await client.get(_ticket_key(upload_id))
+        if raw_ticket is None:
+            raise UploadError("Загрузка не найдена или устарела")
+        ticket = json.loads(raw_ticket)
+        if ticket["user_id"] != user_id:
+            raise UploadError("Загрузка не найдена или устарела")
+        
+        file_service = FileService()
+        try:
+            head = await file_service.storage.head(ticket["file_key"])
+        except s3_client_error():
+            # Тикет сохраняется: файл может быть еще в пути
+            raise UploadError("Файл не загружен в хранилище")
+        
+        problems = []
+        if head.get("ContentLength") != ticket["size"]:
+            problems.append("размер")
+        if (head.get("ContentType") or "").split(";")[0].strip() != ticket["content_type"]:
+            problems.append("тип")
+        etag = (head.get("ETag") or "").strip('"')
+        if ticket["md5"] and "-" not in etag and etag != _md5_hex(ticket["md5"]):
+            problems.append("содержимое")
+        if problems:
+            await _reject(file_service, upload_id, ticket)
+            raise UploadError(f"Файл не совпадает с заявленным: {', '.join(problems)}")
+        
+        # Content-Type задает браузер - тип определяется по содержимому
+        try:
+            inspection = await file_service.inspect_stored(
+                ticket["file_key"], ticket["content_type"], ticket["filename"], ticket["size"]
+            )
+        except s3_client_error():
+            raise UploadError("Файл временно недоступен в хранилище, повторите завершение")
+        if inspection.error:
+            await _reject(file_service, upload_id, ticket)
+            raise UploadError(inspection.error)
+        ticket["content_type"] = inspection.detected_mime
+        
+        await client.delete(_ticket_key(upload_id))
+        return ticket
+    finally:
+        await client.delete(lock_key)
+
+
+async def _reject(file_service: FileService, upload_id: str, ticket: Dict[str, Any]):
+    """Окончательный отказ: удаляем объект и тикет"""
+    await file_service.delete_file(ticket["file_key"])
+    await _redis().delete(_ticket_key(upload_id))
\ No newline at end of file
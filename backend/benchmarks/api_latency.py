@@ -0,0 +1,178 @@
+"""
+Микробенчмарк задержек API на данных из seed_data.py.
+
+Приложение запускается в том же процессе (ASGI-транспорт httpx), запросы
+идут последовательно, поэтому на каждый запрос точно считается число
+SQL-запросов ко всем движкам. Сравнение с предыдущим прогоном (--compare)
+падает, если выросло число запросов (N+1) или p95 вырос больше порога.
+
+Пример:
+    python benchmarks/api_latency.py --user-id 2 --iterations 50 --output api.json
+    python benchmarks/api_latency.py --user-id 2 --compare api.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+from urllib.parse import quote
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+import httpx
+from sqlalchemy import event, select
+from sqlalchemy.engine import Engine
+
+from app.api.deps import get_current_user
+from app.db.database import SessionLocal
+from app.main import app
+from app.models import Document, Result
+
+query_counter = {"count": 0}
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    query_counter["count"] += 1
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def default_endpoints(user_id: int) -> List[str]:
+    """Эндпоинты с параметрами, подобранными по данным пользователя"""
+    db = SessionLocal()
+    try:
+        analyte_id, source_label = db.execute(
+            select(Result.analyte_id, Result.source_label)
+            .join(Document)
+            .filter(Document.user_id == user_id, Result.analyte_id.isnot(None))
+            .limit(1)
+        ).first() or (None, None)
+    finally:
+        db.close()
+    
+    endpoints = [
+        "/api/v1/results/?limit=100",
+        "/api/v1/results/?limit=100&order_by=deviation",
+        "/api/v1/results/summary",
+        "/api/v1/results/trends/summary",
+        "/api/v1/documents/?limit=100",
+    ]
+    if analyte_id:
+        endpoints.append(f"/api/v1/results/analyte/{analyte_id}/history")
+    if source_label:
+        endpoints.append(f"/api/v1/results/source-label/{quote(source_label, safe='')}/history")
+    return endpoints
+
+
+async def bench_endpoint(client: httpx.AsyncClient, endpoint: str, iterations: int, warmup: int) -> Dict[str, Any]:
+    for _ in range(warmup):
+        await client.get(endpoint)
+    
+    latencies = []
+    query_counts = []
+    errors = 0
+    for _ in range(iterations):
+        query_counter["count"] = 0
+        started = time.perf_counter()
+        response = await client.get(endpoint)
+        latencies.append((time.perf_counter() - started) * 1000)
+        query_counts.append(query_counter["count"])
+        if response.status_code >= 400:
+            errors += 1
+    
+    return {
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2),
+        "queries_per_request": max(query_counts),
+        "errors": errors,
+    }
+
+
+def compare(report: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """False, если выросло число запросов или p95 ухудшился больше threshold %"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    
+    ok = True
+    print(f"\n📊 Сравнение с {baseline_path}:")
+    for endpoint, stats in report["endpoints"].items():
+        old = baseline.get("endpoints", {}).get(endpoint)
+        if not old:
+            continue
+        problems = []
+        if stats["queries_per_request"] > old["queries_per_request"]:
+            problems.append(f"запросов {old['queries_per_request']} → {stats['queries_per_request']}")
+        if old["p95_ms"] and (stats["p95_ms"] - old["p95_ms"]) / old["p95_ms"] * 100 > threshold:
+            problems.append(f"p95 {old['p95_ms']} → {stats['p95_ms']} ms")
+        ok = ok and not problems
+        print(f"   {'❌' if problems else '✅'} {endpoint} {'; '.join(problems)}")
+    return ok
+
+
+async def main(args) -> int:
+    app.dependency_overrides[get_current_user] = lambda: {"id": args.user_id, "email": None}
+    endpoints = args.endpoints or default_endpoints(args.user_id)
+    
+    report: Dict[str, Any] = {
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "user_id": args.user_id,
+        "iterations": args.iterations,
+        "endpoints": {},
+    }
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for endpoint in endpoints:
+            stats = await bench_endpoint(client, endpoint, args.iterations, args.warmup)
+            report["endpoints"][endpoint] = stats
+            print(
+                f"⏱️ p50 {stats['p50_ms']:>8} ms  p95 {stats['p95_ms']:>8} ms  p99 {stats['p99_ms']:>8} ms  "
+                f"🐘 {stats['queries_per_request']:>3} запр.  {endpoint}"
+            )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Результаты сохранены в {args.output}")
+    
+    over_budget = [
+        endpoint for endpoint, stats in report["endpoints"].items()
+        if args.max_queries is not None and stats["queries_per_request"] > args.max_queries
+    ]
+    for endpoint in over_budget:
+        print(f"❌ {endpoint}: больше {args.max_queries} SQL-запросов на запрос")
+    
+    if over_budget or (args.compare and not compare(report, args.compare, args.threshold)):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Задержки API LabTrack на объемных данных")
+    parser.add_argument("--user-id", type=int, default=1, help="Пользователь, от имени которого идут запросы")
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--endpoints", nargs="+", help="Свой список эндпоинтов")
+    parser.add_argument("--max-queries", type=int, help="Бюджет SQL-запросов на один HTTP-запрос")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Допустимый рост p95, %%")
+    args = parser.parse_args()
+    
+    print(f"🚀 Бенчмарк API для пользователя {args.user_id}...")
+    sys.exit(asyncio.run(main(args)))
\ No newline at end of file
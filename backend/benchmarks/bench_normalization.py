@@ -0,0 +1,303 @@
+"""
+Бенчмарк горячего пути нормализации результатов.
+
+Изолированные этапы (без БД и Redis): разбор значения, разбор референса,
+приведение единиц, флаги и отклонение, вся цепочка целиком. С флагом --e2e
+дополнительно прогоняется NormalizationService.normalize_result с поиском
+аналитов и пересчет дельт против локального PostgreSQL (DATABASE_URL);
+транзакция в конце откатывается.
+
+Пример:
+    python benchmarks/bench_normalization.py --rows 20000 --output bench.json
+    python benchmarks/bench_normalization.py --compare bench.json --threshold 10
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from corpus import corpus_summary, generate_rows  # noqa: E402
+from app.services.normalization_service import NormalizationService  # noqa: E402
+from app.services.reference_ranges import range_position, relative_deviation  # noqa: E402
+from app.services.unit_conversion import unit_conversion_engine  # noqa: E402
+
+RULES_CSV = os.path.join(BACKEND_DIR, "scripts", "unit_conversion_rules.csv")
+
+
+def load_csv_rules(path: str) -> List[SimpleNamespace]:
+    """Правила из CSV в виде объектов с полями модели UnitConversionRule"""
+    with open(path, newline="", encoding="utf-8") as f:
+        return [
+            SimpleNamespace(
+                id=index,
+                analyte_code=row["analyte_code"] or None,
+                source_unit=row["source_unit"],
+                target_unit=row["target_unit"],
+                factor=Decimal(row["factor"]) if row["factor"] else None,
+                molar_mass=Decimal(row["molar_mass"]) if row["molar_mass"] else None,
+                lab_name=row["lab_name"] or None,
+            )
+            for index, row in enumerate(csv.DictReader(f), start=1)
+        ]
+
+
+def measure(fn: Callable[[], Any], rows: int, repeat: int) -> Dict[str, float]:
+    """Лучшее время из repeat прогонов и память одного прогона под tracemalloc"""
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    best = min(timings)
+    
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    fn()
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    diff = after.compare_to(before, "filename")
+    
+    return {
+        "rows_per_sec": round(rows / best, 1) if best else 0.0,
+        "best_s": round(best, 6),
+        "mean_s": round(sum(timings) / len(timings), 6),
+        "peak_kib": round(peak / 1024, 1),
+        "allocated_blocks_per_row": round(sum(max(stat.count_diff, 0) for stat in diff) / rows, 3),
+    }
+
+
+def isolated_stages(rows: List[Dict], service: NormalizationService) -> Dict[str, Callable[[], Any]]:
+    values = [service._extract_numeric_value(row["raw_value"]) for row in rows]
+    ranges = [
+        service._parse_reference_range(row["raw_reference_range"], row["raw_unit"])
+        for row in rows
+    ]
+    numeric = [
+        (value, row) for value, row in zip(values, rows) if value is not None
+    ]
+    with_ranges = [
+        (value, ref_min, ref_max)
+        for value, (ref_min, ref_max) in zip(values, ranges) if value is not None
+    ]
+    
+    def parse_values():
+        for row in rows:
+            service._extract_numeric_value(row["raw_value"])
+    
+    def parse_ranges():
+        for row in rows:
+            service._parse_reference_range(row["raw_reference_range"], row["raw_unit"])
+    
+    def convert_units():
+        for value, row in numeric:
+            if row["raw_unit"]:
+                unit_conversion_engine.convert(value, row["raw_unit"], row["analyte_code"], row["lab_name"])
+    
+    def flags():
+        for value, ref_min, ref_max in with_ranges:
+            service._calculate_flags(value, ref_min, ref_max)
+            service._is_suspect_value(value, ref_min, ref_max)
+            range_position(value, ref_min, ref_max)
+            relative_deviation(value, ref_min, ref_max)
+    
+    def pipeline():
+        for row in rows:
+            value = service._extract_numeric_value(row["raw_value"])
+            if value is None:
+                continue
+            if row["raw_unit"]:
+                converted = unit_conversion_engine.convert(value, row["raw_unit"], row["analyte_code"], row["lab_name"])
+                if converted is not None:
+                    value = converted[1]
+            ref_min, ref_max = service._parse_reference_range(row["raw_reference_range"], row["raw_unit"])
+            service._calculate_flags(value, ref_min, ref_max)
+            service._is_suspect_value(value, ref_min, ref_max)
+            relative_deviation(value, ref_min, ref_max)
+    
+    return {
+        "parse_value": parse_values,
+        "parse_reference_range": parse_ranges,
+        "unit_conversion": convert_units,
+        "flags_and_deviation": flags,
+        "pipeline": pipeline,
+    }
+
+
+def run_e2e(rows: List[Dict], per_document: int) -> Dict[str, Any]:
+    """normalize_result с поиском аналитов и пересчет дельт на локальном PostgreSQL"""
+    from sqlalchemy import event
+    from app.db.database import SessionLocal, get_engine
+    from app.models import Document, Result
+    from app.services.delta_service import recalculate_document_deltas
+    
+    queries = {"count": 0}
+    
+    def count_query(*args):
+        queries["count"] += 1
+    
+    db = SessionLocal()
+    engine = get_engine()
+    event.listen(engine, "before_cursor_execute", count_query)
+    try:
+        service = NormalizationService(db)
+        documents = []
+        for start in range(0, len(rows), per_document):
+            chunk = rows[start:start + per_document]
+            document = Document(
+                user_id=1,
+                filename="benchmark.pdf",
+                file_path="benchmark/benchmark.pdf",
+                status="completed",
+                lab_name=chunk[0]["lab_name"]
+            )
+            db.add(document)
+            db.flush()
+            results = [
+                Result(
+                    document_id=document.id,
+                    source_label=row["source_label"],
+                    raw_value=row["raw_value"],
+                    raw_unit=row["raw_unit"],
+                    raw_reference_range=row["raw_reference_range"],
+                    normalized=False
+                )
+                for row in chunk
+            ]
+            db.add_all(results)
+            db.flush()
+            documents.append((document, results))
+        
+        queries["count"] = 0
+        started = time.perf_counter()
+        normalized = 0
+        for document, results in documents:
+            for result in results:
+                normalized += service.normalize_result(result)
+        db.flush()
+        normalize_elapsed = time.perf_counter() - started
+        normalize_queries = queries["count"]
+        
+        queries["count"] = 0
+        started = time.perf_counter()
+        for document, _ in documents:
+            recalculate_document_deltas(db, document.id)
+        delta_elapsed = time.perf_counter() - started
+        
+        return {
+            "normalize_result": {
+                "rows_per_sec": round(len(rows) / normalize_elapsed, 1) if normalize_elapsed else 0.0,
+                "best_s": round(normalize_elapsed, 6),
+                "normalized": normalized,
+                "queries_per_row": round(normalize_queries / len(rows), 3),
+            },
+            "document_deltas": {
+                "rows_per_sec": round(len(rows) / delta_elapsed, 1) if delta_elapsed else 0.0,
+                "best_s": round(delta_elapsed, 6),
+                "queries_per_document": round(queries["count"] / len(documents), 3),
+            },
+        }
+    finally:
+        event.remove(engine, "before_cursor_execute", count_query)
+        db.rollback()
+        db.close()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(report: Dict[str, Any], baseline_path: str, threshold: float) -> bool:
+    """Печатает изменение пропускной способности; False, если есть регрессия больше threshold %"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    
+    ok = True
+    print(f"\n📊 Сравнение с {baseline_path} ({baseline.get('commit', 'unknown')}):")
+    for name, stats in report["stages"].items():
+        old = baseline.get("stages", {}).get(name)
+        if not old or not old.get("rows_per_sec"):
+            continue
+        change = (stats["rows_per_sec"] - old["rows_per_sec"]) / old["rows_per_sec"] * 100
+        marker = "✅"
+        if change < -threshold:
+            marker = "❌"
+            ok = False
+        print(f"   {marker} {name:<24} {old['rows_per_sec']:>12} → {stats['rows_per_sec']:>12} rows/s ({change:+.1f}%)")
+    return ok
+
+
+def main(args) -> int:
+    rows = generate_rows(args.rows, seed=args.seed)
+    unit_conversion_engine.use_rules(load_csv_rules(args.rules_csv), version=0)
+    service = NormalizationService(None)
+    
+    report: Dict[str, Any] = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "corpus": corpus_summary(rows),
+        "stages": {},
+    }
+    
+    for name, fn in isolated_stages(rows, service).items():
+        stats = measure(fn, len(rows), args.repeat)
+        report["stages"][name] = stats
+        print(
+            f"⚡ {name:<24} {stats['rows_per_sec']:>12} rows/s  "
+            f"peak {stats['peak_kib']:>8} KiB  "
+            f"{stats['allocated_blocks_per_row']:>6} blocks/row"
+        )
+    
+    if args.e2e:
+        e2e_rows = rows[:args.e2e_rows]
+        for name, stats in run_e2e(e2e_rows, args.per_document).items():
+            report["stages"][f"e2e_{name}"] = stats
+            print(f"🐘 {name:<24} {stats['rows_per_sec']:>12} rows/s  {stats}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"💾 Результаты сохранены в {args.output}")
+    
+    if args.compare and not compare(report, args.compare, args.threshold):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Бенчмарк нормализации результатов LabTrack")
+    parser.add_argument("--rows", type=int, default=20000, help="Размер синтетического корпуса")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="Прогонов на этап (берется лучший)")
+    parser.add_argument("--rules-csv", default=RULES_CSV, help="Правила единиц для изолированных этапов")
+    parser.add_argument("--e2e", action="store_true", help="Прогон против PostgreSQL из DATABASE_URL")
+    parser.add_argument("--e2e-rows", type=int, default=2000)
+    parser.add_argument("--per-document", type=int, default=40, help="Результатов в одном документе (e2e)")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    parser.add_argument("--compare", help="JSON предыдущего прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=10.0, help="Допустимое падение rows/s, %%")
+    args = parser.parse_args()
+    
+    print(f"🚀 Бенчмарк нормализации: {args.rows} строк, seed={args.seed}...")
+    sys.exit(main(args))
\ No newline at end of file
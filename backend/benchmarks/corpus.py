@@ -0,0 +1,114 @@
+"""
+Генератор синтетических строк результатов для бенчмарков нормализации.
+
+Строки похожи на то, что возвращает LLM из реальных бланков: русские и
+английские названия, разные единицы, десятичная запятая, значения вида
+"< 0,5" и нечисловые ответы, референсы в нескольких форматах.
+"""
+import random
+from typing import Dict, List, Optional
+
+# code -> названия, единицы (единица, множитель относительно базовой), референс в базовой единице
+ANALYTES: Dict[str, Dict] = {
+    "glucose": {
+        "labels": ["Глюкоза", "Глюкоза (сыворотка)", "Glucose", "GLU", "Глюкоза крови"],
+        "units": [("ммоль/л", 1.0), ("mmol/L", 1.0), ("mg/dL", 18.0)],
+        "range": (3.9, 5.5),
+    },
+    "hemoglobin": {
+        "labels": ["Гемоглобин", "Hemoglobin", "HGB", "Hb"],
+        "units": [("г/л", 1.0), ("g/L", 1.0), ("g/dL", 0.1)],
+        "range": (120.0, 160.0),
+    },
+    "cholesterol": {
+        "labels": ["Холестерин общий", "Холестерин", "Cholesterol", "CHOL"],
+        "units": [("ммоль/л", 1.0), ("mg/dL", 38.67)],
+        "range": (3.0, 5.2),
+    },
+    "creatinine": {
+        "labels": ["Креатинин", "Creatinine", "CREA"],
+        "units": [("мкмоль/л", 1.0), ("mg/dL", 0.0113)],
+        "range": (53.0, 115.0),
+    },
+    "urea": {
+        "labels": ["Мочевина", "Urea", "BUN"],
+        "units": [("ммоль/л", 1.0)],
+        "range": (2.8, 7.2),
+    },
+    "alt": {
+        "labels": ["АЛТ", "АЛТ (Аланинаминотрансфераза)", "ALT", "ALAT"],
+        "units": [("Ед/л", 1.0), ("U/L", 1.0), ("ед/л", 1.0)],
+        "range": (0.0, 41.0),
+    },
+}
+
+LABS = ["Инвитро", "Гемотест", "KDL", "Хеликс", None]
+
+NON_NUMERIC_VALUES = ["отрицательно", "не обнаружено", "negative", "следы"]
+
+
+def _format_number(value: float, rng: random.Random) -> str:
+    text = f"{value:.{rng.choice([0, 1, 2, 3])}f}"
+    return text.replace(".", ",") if rng.random() < 0.5 else text
+
+
+def _raw_value(low: float, high: float, scale: float, rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.03:
+        return rng.choice(NON_NUMERIC_VALUES)
+    
+    width = max(high - low, 1.0)
+    # Примерно треть значений за пределами референса
+    value = rng.uniform(low - width * 0.5, high + width * 0.7) * scale
+    value = max(value, 0.0)
+    if roll < 0.06:
+        return f"< {_format_number(value, rng)}"
+    if roll < 0.08:
+        return f">{_format_number(value, rng)}"
+    return _format_number(value, rng)
+
+
+def _raw_range(low: float, high: float, scale: float, rng: random.Random) -> Optional[str]:
+    low, high = low * scale, high * scale
+    fmt = rng.random()
+    if fmt < 0.1:
+        return None
+    if fmt < 0.55:
+        return f"{_format_number(low, rng)} - {_format_number(high, rng)}"
+    if fmt < 0.75:
+        return f"{_format_number(low, rng)}–{_format_number(high, rng)}"
+    if fmt < 0.85:
+        return f"< {_format_number(high, rng)}"
+    if fmt < 0.92:
+        return f"до {_format_number(high, rng)}"
+    return f"не более {_format_number(high, rng)}"
+
+
+def generate_rows(count: int, seed: int = 42) -> List[Dict[str, Optional[str]]]:
+    """Генерирует count строк результатов; при одинаковом seed корпус одинаковый"""
+    rng = random.Random(seed)
+    codes = list(ANALYTES)
+    rows = []
+    for _ in range(count):
+        code = rng.choice(codes)
+        spec = ANALYTES[code]
+        unit, scale = rng.choice(spec["units"])
+        low, high = spec["range"]
+        rows.append({
+            "analyte_code": code,
+            "source_label": rng.choice(spec["labels"]),
+            "raw_value": _raw_value(low, high, scale, rng),
+            "raw_unit": unit if rng.random() > 0.05 else None,
+            "raw_reference_range": _raw_range(low, high, scale, rng),
+            "lab_name": rng.choice(LABS),
+        })
+    return rows
+
+
+def corpus_summary(rows: List[Dict[str, Optional[str]]]) -> Dict[str, int]:
+    return {
+        "rows": len(rows),
+        "decimal_comma": sum(1 for row in rows if "," in (row["raw_value"] or "")),
+        "without_unit": sum(1 for row in rows if not row["raw_unit"]),
+        "without_range": sum(1 for row in rows if not row["raw_reference_range"]),
+    }
\ No newline at end of file
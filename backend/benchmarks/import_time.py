@@ -0,0 +1,96 @@
+"""
+Время импорта приложения API (холодный старт контейнера).
+
+Запускает `python -X importtime -c "import app.main"` в отдельном
+процессе, суммирует время импорта и печатает самые дорогие модули.
+Падает, если при старте API импортированы тяжелые модули, которые
+должны подгружаться лениво (Celery, openai, boto3/botocore, pint), или если
+превышен бюджет --budget-ms.
+
+Пример:
+    python benchmarks/import_time.py --budget-ms 1500
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Модули, которые API не должен импортировать при старте
+LAZY_MODULES = [
+    "celery", "openai", "boto3", "botocore", "aiobotocore", "pint",
+    "app.core.tasks", "app.services.llm_service"
+]
+
+
+def measure(module: str) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """Общее время импорта (мкс) и список (модуль, self, cumulative)"""
+    env = {**os.environ, "PYTHONPATH": BACKEND_DIR}
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        print(completed.stderr[-2000:])
+        raise SystemExit(f"❌ Не удалось импортировать {module}")
+    
+    entries = []
+    total = 0
+    for line in completed.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cumulative_us)))
+        if depth == 0:
+            total += int(cumulative_us)
+    return total, entries
+
+
+def lazy_violations(entries) -> List[str]:
+    imported = {name for name, _, _ in entries}
+    return [
+        module for module in LAZY_MODULES
+        if any(name == module or name.startswith(module + ".") for name in imported)
+    ]
+
+
+def best_of(module: str, runs: int):
+    results = [measure(module) for _ in range(runs)]
+    return min(results, key=lambda item: item[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Время импорта приложения API")
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--runs", type=int, default=3, help="Число прогонов, берется лучший")
+    parser.add_argument("--top", type=int, default=15, help="Сколько самых дорогих модулей показать")
+    parser.add_argument("--budget-ms", type=float, help="Бюджет суммарного времени импорта, мс")
+    args = parser.parse_args()
+    
+    print(f"🚀 Импорт {args.module} ({args.runs} прогона)...")
+    total, entries = best_of(args.module, args.runs)
+    
+    by_package: Dict[str, int] = {}
+    for name, self_us, _ in entries:
+        package = name.split(".")[0]
+        by_package[package] = by_package.get(package, 0) + self_us
+    
+    print(f"⏱️  Суммарное время импорта: {total / 1000:.1f} мс, модулей: {len(entries)}")
+    print("📦 Пакеты (собственное время модулей):")
+    for package, self_us in sorted(by_package.items(), key=lambda item: -item[1])[:args.top]:
+        print(f"   {package:<32} {self_us / 1000:>8.1f} мс")
+    
+    failed = False
+    violations = lazy_violations(entries)
+    for module in violations:
+        print(f"❌ {module} импортируется при старте API, ожидается ленивый импорт")
+        failed = True
+    if args.budget_ms is not None and total / 1000 > args.budget_ms:
+        print(f"❌ Бюджет {args.budget_ms:.0f} мс превышен")
+        failed = True
+    if not failed:
+        print("✅ Импорт укладывается в ограничения")
+    sys.exit(1 if failed else 0)
\ No newline at end of file
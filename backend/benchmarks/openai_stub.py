@@ -0,0 +1,111 @@
+"""
+Заглушка OpenAI-совместимого API для нагрузочных тестов пайплайна.
+
+Отвечает на POST /v1/chat/completions синтетическим извлечением
+(аналиты из corpus.py) с настраиваемой задержкой и долей ошибок,
+чтобы гонять upload -> extract -> normalize без обращений к OpenAI.
+
+Пример:
+    python benchmarks/openai_stub.py --port 8080 --latency-ms 1500 --jitter-ms 500 --failure-rate 0.02
+    OPENAI_BASE_URL=http://localhost:8080/v1 celery -A app.core.celery worker
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import os
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from corpus import generate_rows
+
+app = FastAPI(title="OpenAI stub")
+config = argparse.Namespace(latency_ms=1000, jitter_ms=0, failure_rate=0.0, rate_limit_share=0.5, analytes=20, seed=42)
+counters = {"requests": 0, "failures": 0, "in_flight": 0, "max_in_flight": 0}
+_seeds = itertools.count()
+
+
+def _completion(model: str) -> dict:
+    rows = generate_rows(config.analytes, seed=config.seed + next(_seeds))
+    content = {
+        "lab_name": rows[0]["lab_name"] or "Инвитро",
+        "report_date": "2024-05-17",
+        "report_type": "Биохимический анализ крови",
+        "analytes": [
+            {
+                "name": row["source_label"],
+                "value": row["raw_value"],
+                "unit": row["raw_unit"],
+                "reference_range": row["raw_reference_range"],
+            }
+            for row in rows
+        ],
+    }
+    return {
+        "id": f"chatcmpl-stub-{counters['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": json.dumps(content, ensure_ascii=False)},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": 1500, "completion_tokens": 40 * config.analytes, "total_tokens": 1500 + 40 * config.analytes},
+    }
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    counters["requests"] += 1
+    counters["in_flight"] += 1
+    counters["max_in_flight"] = max(counters["max_in_flight"], counters["in_flight"])
+    try:
+        delay = max(0.0, config.latency_ms + random.uniform(-config.jitter_ms, config.jitter_ms)) / 1000
+        await asyncio.sleep(delay)
+        
+        if random.random() < config.failure_rate:
+            counters["failures"] += 1
+            if random.random() < config.rate_limit_share:
+                return JSONResponse(
+                    status_code=429,
+                    content={"error": {"message": "Rate limit reached (stub)", "type": "rate_limit_error"}}
+                )
+            return JSONResponse(
+                status_code=500,
+                content={"error": {"message": "Internal error (stub)", "type": "server_error"}}
+            )
+        
+        return _completion(body.get("model", "gpt-4o"))
+    finally:
+        counters["in_flight"] -= 1
+
+
+@app.get("/stats")
+async def stats():
+    return {**counters, "config": vars(config)}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Заглушка OpenAI API для нагрузочных тестов")
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=1000, help="Средняя задержка ответа")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Разброс задержки (равномерный)")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Доля ответов с ошибкой")
+    parser.add_argument("--rate-limit-share", type=float, default=0.5, help="Доля 429 среди ошибок (остальные - 500)")
+    parser.add_argument("--analytes", type=int, default=20, help="Показателей в одном ответе")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    
+    config = args
+    print(f"🤖 OpenAI stub на {args.host}:{args.port}: {args.latency_ms}±{args.jitter_ms} ms, ошибки {args.failure_rate:.0%}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
\ No newline at end of file
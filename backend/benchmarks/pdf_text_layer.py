@@ -0,0 +1,97 @@
+"""
+Сравнение текстового слоя PDF и vision на реальных отчетах.
+
+Для каждого PDF показывает время локального разбора (pdfplumber), число
+страниц-сканов и выбранный способ извлечения, а также объем запроса:
+символы текстового слоя против base64 страниц, отрисованных в PNG для
+vision. С --llm оба пути вызываются через LLMExtractionService
+(OPENAI_BASE_URL может указывать на benchmarks/openai_stub.py) и
+сравниваются токены, время ответа и число извлеченных показателей.
+
+Пример:
+    python benchmarks/pdf_text_layer.py reports/*.pdf
+    python benchmarks/pdf_text_layer.py reports/*.pdf --llm
+"""
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.services.llm_service import LLMExtractionService
+from app.services.pdf_text import extract_text_layer, render_pages
+
+
+class MeasuredExtractionService(LLMExtractionService):
+    """Суммирует токены вызовов LLM"""
+    
+    total_tokens = 0
+    
+    def _create_completion(self, **kwargs):
+        response = super()._create_completion(**kwargs)
+        if response.usage is not None:
+            self.total_tokens += response.usage.total_tokens
+        return response
+
+
+async def measure(service: MeasuredExtractionService, calls):
+    """Последовательные вызовы (метод, аргументы): время, токены, показатели"""
+    service.total_tokens = 0
+    analytes = 0
+    started = time.perf_counter()
+    for extract, args in calls:
+        extracted = await extract(*args)
+        analytes += len(extracted.analytes) if extracted else 0
+    return time.perf_counter() - started, service.total_tokens, analytes
+
+
+async def compare_llm(service: MeasuredExtractionService, text: str, page_images):
+    text_result = await measure(service, [(service._extract_from_text, (text,))])
+    vision_result = await measure(
+        service, [(service._extract_from_image, (image, "image/png")) for image in page_images]
+    )
+    for name, (elapsed, tokens, analytes) in (("text_layer", text_result), ("vision", vision_result)):
+        print(f"   {name:<11} {elapsed:6.2f} с, {tokens:6d} токенов, показателей: {analytes}")
+
+
+def main(args) -> int:
+    service = MeasuredExtractionService() if args.llm else None
+    for path in args.files:
+        with open(path, "rb") as f:
+            content = f.read()
+        
+        started = time.perf_counter()
+        layer = extract_text_layer(content)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if layer is None:
+            print(f"❌ {os.path.basename(path)}: PDF не читается")
+            continue
+        
+        if layer.fully_digital:
+            method = "text_layer"
+        elif layer.has_text:
+            method = "text_layer+vision"
+        else:
+            method = "vision"
+        text = layer.text()
+        print(
+            f"📄 {os.path.basename(path)}: {layer.page_count} стр., сканов {len(layer.scanned_pages)}, "
+            f"разбор {elapsed_ms:.0f} мс -> {method}"
+        )
+        page_images = render_pages(content, list(range(layer.page_count)))
+        vision_bytes = sum(len(base64.b64encode(image)) for image in page_images)
+        print(f"   текст {len(text)} символов, vision {vision_bytes} байт base64 ({len(page_images)} PNG)")
+        if service and layer.has_text:
+            asyncio.run(compare_llm(service, text, page_images))
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Текстовый слой PDF против vision")
+    parser.add_argument("files", nargs="+", help="PDF-файлы отчетов")
+    parser.add_argument("--llm", action="store_true", help="Сравнить вызовы LLM по обоим путям")
+    sys.exit(main(parser.parse_args()))
\ No newline at end of file
@@ -0,0 +1,247 @@
+"""
+Нагрузочный тест пайплайна upload -> extract -> normalize.
+
+Загружает синтетические отчеты в /api/v1/documents/upload с заданной
+конкурентностью и по SSE-потоку документа ждет конца пайплайна: этап
+normalized (все результаты нормализованы, запущен расчет дельт) или
+статус failed. Статус completed выставляется сразу после извлечения,
+время до него отчитывается отдельно.
+Параллельно снимает временной ряд: длина очереди Celery в Redis,
+соединения с БД (пулы API и pg_stat_activity), загрузка воркеров.
+
+Окружение: API и воркеры с OPENAI_BASE_URL на benchmarks/openai_stub.py
+и S3_ENDPOINT на MinIO (или moto_server), см. docker-compose.loadtest.yml.
+
+Пример:
+    python benchmarks/pipeline_load_test.py --documents 500 --concurrency 20 --output pipeline.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+import httpx
+import redis
+from sqlalchemy import create_engine, text
+
+from corpus import generate_rows
+
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def render_report(index: int, rows_per_report: int, seed: int) -> bytes:
+    """Текстовый отчет: извлечение идет через текстовую модель, как у CSV/TXT загрузок"""
+    rows = generate_rows(rows_per_report, seed=seed + index)
+    lines = ["Показатель;Результат;Единицы;Референс"]
+    for row in rows:
+        lines.append(";".join([
+            row["source_label"], row["raw_value"], row["raw_unit"] or "", row["raw_reference_range"] or ""
+        ]))
+    return "\n".join(lines).encode("utf-8")
+
+
+class Sampler:
+    """Периодически снимает метрики очереди, БД и воркеров"""
+    
+    def __init__(self, args):
+        self.args = args
+        self.samples: List[Dict[str, Any]] = []
+        self.redis = redis.Redis.from_url(args.redis_url)
+        self.db_engine = create_engine(args.database_url, pool_size=1) if args.database_url else None
+        self.celery = None
+        if args.celery_inspect:
+            from app.core.celery import celery_app
+            self.celery = celery_app
+    
+    def _queue_depth(self) -> Optional[int]:
+        try:
+            return sum(self.redis.llen(queue) for queue in self.args.queues)
+        except redis.RedisError:
+            return None
+    
+    def _db_connections(self) -> Optional[int]:
+        if not self.db_engine:
+            return None
+        with self.db_engine.connect() as connection:
+            return connection.execute(text(
+                "SELECT count(*) FROM pg_stat_activity WHERE datname = current_database()"
+            )).scalar()
+    
+    def _worker_utilisation(self) -> Optional[Dict[str, float]]:
+        if not self.celery:
+            return None
+        inspect = self.celery.control.inspect(timeout=1.0)
+        active = inspect.active() or {}
+        stats = inspect.stats() or {}
+        busy = sum(len(tasks) for tasks in active.values())
+        capacity = sum(worker.get("pool", {}).get("max-concurrency", 0) for worker in stats.values())
+        return {
+            "busy": busy,
+            "capacity": capacity,
+            "utilisation": round(busy / capacity, 3) if capacity else 0.0,
+        }
+    
+    async def _api_pool(self, client: httpx.AsyncClient) -> Optional[Dict[str, Any]]:
+        try:
+            pools = (await client.get("/health/db-pool")).json()["pools"]
+            return {name: pool.get("in_use") for name, pool in pools.items()}
+        except (httpx.HTTPError, ValueError, KeyError):
+            return None
+    
+    async def run(self, client: httpx.AsyncClient, started: float, stop: asyncio.Event):
+        while not stop.is_set():
+            sample = {
+                "t": round(time.perf_counter() - started, 2),
+                "queue_depth": await asyncio.to_thread(self._queue_depth),
+                "db_connections": await asyncio.to_thread(self._db_connections),
+                "api_pool_in_use": await self._api_pool(client),
+                "workers": await asyncio.to_thread(self._worker_utilisation),
+            }
+            self.samples.append(sample)
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=self.args.sample_interval)
+            except asyncio.TimeoutError:
+                pass
+
+
+async def wait_for_pipeline(client: httpx.AsyncClient, document_id: int, timings: Dict[str, float]) -> str:
+    """Читает SSE-поток документа до normalized или failed; время извлечения - в timings"""
+    async with client.stream("GET", f"/api/v1/documents/{document_id}/events", timeout=None) as response:
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            event = json.loads(line[len("data:"):])
+            if event.get("status") == "completed" and "extracted" not in timings:
+                timings["extracted"] = time.perf_counter()
+            if event.get("status") == "failed":
+                return "failed"
+            if event.get("stage") == "normalized":
+                return "normalized"
+    return "disconnected"
+
+
+async def process_one(client: httpx.AsyncClient, index: int, args) -> Dict[str, Any]:
+    """Загружает один отчет и ждет конца обработки, включая нормализацию"""
+    content = render_report(index, args.rows_per_report, args.seed)
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            "/api/v1/documents/upload",
+            files={"file": (f"loadtest_{index}.txt", content, "text/plain")},
+        )
+        response.raise_for_status()
+    except httpx.HTTPError as e:
+        return {"index": index, "status": "upload_failed", "error": str(e)}
+    
+    uploaded = time.perf_counter()
+    document_id = response.json()["id"]
+    timings: Dict[str, float] = {}
+    try:
+        status = await asyncio.wait_for(wait_for_pipeline(client, document_id, timings), args.timeout)
+    except asyncio.TimeoutError:
+        status = "timeout"
+    except (httpx.HTTPError, ValueError):
+        status = "stream_failed"
+    
+    finished = time.perf_counter()
+    outcome = {
+        "index": index,
+        "document_id": document_id,
+        "status": status,
+        "upload_ms": round((uploaded - started) * 1000, 1),
+        "time_to_normalized_ms": round((finished - started) * 1000, 1),
+    }
+    if "extracted" in timings:
+        outcome["time_to_extracted_ms"] = round((timings["extracted"] - started) * 1000, 1)
+    return outcome
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=args.concurrency * 2)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=60.0, limits=limits) as client:
+        sampler = Sampler(args)
+        stop = asyncio.Event()
+        started = time.perf_counter()
+        sampler_task = asyncio.create_task(sampler.run(client, started, stop))
+        
+        semaphore = asyncio.Semaphore(args.concurrency)
+        
+        async def limited(index: int):
+            async with semaphore:
+                return await process_one(client, index, args)
+        
+        outcomes = await asyncio.gather(*[limited(i) for i in range(args.documents)])
+        elapsed = time.perf_counter() - started
+        stop.set()
+        await sampler_task
+    
+    completed = [o["time_to_normalized_ms"] for o in outcomes if o["status"] == "normalized"]
+    extracted = [o["time_to_extracted_ms"] for o in outcomes if "time_to_extracted_ms" in o]
+    uploads = [o["upload_ms"] for o in outcomes if "upload_ms" in o]
+    by_status: Dict[str, int] = {}
+    for outcome in outcomes:
+        by_status[outcome["status"]] = by_status.get(outcome["status"], 0) + 1
+    
+    queue_depths = [s["queue_depth"] for s in sampler.samples if s["queue_depth"] is not None]
+    db_connections = [s["db_connections"] for s in sampler.samples if s["db_connections"] is not None]
+    utilisation = [s["workers"]["utilisation"] for s in sampler.samples if s["workers"]]
+    
+    summary = {
+        "documents": args.documents,
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "documents_per_min": round(len(completed) / elapsed * 60, 1) if elapsed else 0.0,
+        "statuses": by_status,
+        "upload_p50_ms": round(percentile(uploads, 50), 1),
+        "upload_p95_ms": round(percentile(uploads, 95), 1),
+        "time_to_extracted_p50_ms": round(percentile(extracted, 50), 1),
+        "time_to_extracted_p95_ms": round(percentile(extracted, 95), 1),
+        "time_to_normalized_p50_ms": round(percentile(completed, 50), 1),
+        "time_to_normalized_p95_ms": round(percentile(completed, 95), 1),
+        "time_to_normalized_p99_ms": round(percentile(completed, 99), 1),
+        "queue_depth_max": max(queue_depths) if queue_depths else None,
+        "db_connections_max": max(db_connections) if db_connections else None,
+        "worker_utilisation_avg": round(sum(utilisation) / len(utilisation), 3) if utilisation else None,
+    }
+    
+    print("\n📊 Итоги:")
+    for key, value in summary.items():
+        print(f"   {key}: {value}")
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"summary": summary, "timeseries": sampler.samples, "documents": outcomes}, f, indent=2)
+        print(f"💾 Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест пайплайна обработки документов")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=10, help="Одновременных загрузок")
+    parser.add_argument("--rows-per-report", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--timeout", type=float, default=600.0, help="Ожидание обработки документа, сек")
+    parser.add_argument("--sample-interval", type=float, default=1.0)
+    parser.add_argument("--redis-url", default=os.getenv("REDIS_URL", "redis://localhost:6379"))
+    parser.add_argument("--queues", nargs="+", default=["celery"], help="Очереди Celery для замера глубины")
+    parser.add_argument("--database-url", default=os.getenv("DATABASE_URL"), help="Для подсчета соединений в pg_stat_activity")
+    parser.add_argument("--celery-inspect", action="store_true", help="Снимать загрузку воркеров через celery inspect")
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+    
+    print(f"🚀 Нагрузочный тест пайплайна: {args.documents} документов, конкурентность {args.concurrency}...")
+    asyncio.run(main(args))
\ No newline at end of file
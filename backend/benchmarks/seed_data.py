@@ -0,0 +1,215 @@
+"""
+Генератор объемных данных для бенчмарков API.
+
+Создает пользователей с историей анализов: на каждого пользователя
+--years лет по --reports-per-year отчетов, в каждом отчете --analytes
+показателей (недостающие аналиты создаются как bench_NNN). Значения
+идут случайным блужданием вокруг референса, уже нормализованы, дельты
+и счетчики user_stats пересчитываются после вставки.
+
+Пример:
+    python benchmarks/seed_data.py --users 1000 --years 10 --analytes 50
+    python benchmarks/seed_data.py --purge
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from typing import Dict, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import delete, func, insert, select, text, update
+from sqlalchemy.orm import Session
+
+from app.db.database import SessionLocal
+from app.models import Analyte, Document, Result, User, UserStats
+from app.services.delta_service import recalculate_deltas
+from app.services.reference_ranges import range_position, relative_deviation
+from app.services.stats_service import rebuild_user_stats
+
+SEED_EMAIL_DOMAIN = "seed.labtrack.local"
+SEED_PATH_PREFIX = "seed/"
+LABS = ["Инвитро", "Гемотест", "KDL", "Хеликс"]
+
+
+def ensure_analytes(db: Session, count: int, rng: random.Random) -> List[Analyte]:
+    """Берет count активных аналитов, недостающие создает"""
+    analytes = db.scalars(
+        select(Analyte).filter(Analyte.is_active == True).order_by(Analyte.id).limit(count)
+    ).all()
+    for index in range(len(analytes), count):
+        low = round(rng.uniform(0.5, 100), 1)
+        analyte = Analyte(
+            code=f"bench_{index:03d}",
+            name=f"Тестовый показатель {index}",
+            default_unit="ммоль/л",
+            unit_category="concentration",
+            reference_ranges={"normal": {"min": low, "max": round(low * rng.uniform(1.3, 2.5), 1)}},
+            is_active=True
+        )
+        db.add(analyte)
+        analytes.append(analyte)
+    db.commit()
+    return analytes
+
+
+def _bounds(analyte: Analyte) -> Dict[str, float]:
+    ranges = analyte.reference_ranges or {}
+    data = ranges.get("normal") or (next(iter(ranges.values())) if ranges else {})
+    low = float(data.get("min") or 0)
+    high = float(data.get("max") or max(low * 2, 10))
+    return {"min": low, "max": high}
+
+
+def seed_user(
+    db: Session,
+    user_id: int,
+    analytes: List[Analyte],
+    bounds: Dict[int, Dict[str, float]],
+    args,
+    rng: random.Random
+) -> int:
+    """Документы и результаты одного пользователя, возвращает число результатов"""
+    now = datetime.now(timezone.utc)
+    start = now - timedelta(days=365 * args.years)
+    reports = args.years * args.reports_per_year
+    step = (now - start) / max(reports, 1)
+    
+    documents = []
+    for index in range(reports):
+        report_date = start + step * index + timedelta(hours=rng.randint(0, 72))
+        documents.append({
+            "user_id": user_id,
+            "filename": f"report_{index}.pdf",
+            "file_path": f"{SEED_PATH_PREFIX}user_{user_id}/report_{index}.pdf",
+            "file_size": rng.randint(50_000, 2_000_000),
+            "mime_type": "application/pdf",
+            "status": "completed",
+            "lab_name": rng.choice(LABS),
+            "report_date": report_date,
+            "created_at": report_date + timedelta(days=rng.randint(0, 3)),
+        })
+    document_ids = db.execute(
+        insert(Document).returning(Document.id, sort_by_parameter_order=True), documents
+    ).scalars().all()
+    
+    # Случайное блуждание значения каждого аналита вокруг середины референса
+    levels = {
+        analyte.id: (bounds[analyte.id]["min"] + bounds[analyte.id]["max"]) / 2
+        for analyte in analytes
+    }
+    results = []
+    for document_id, document in zip(document_ids, documents):
+        for analyte in analytes:
+            low, high = bounds[analyte.id]["min"], bounds[analyte.id]["max"]
+            width = max(high - low, 0.1)
+            levels[analyte.id] = max(0.0, levels[analyte.id] + rng.gauss(0, width * 0.15))
+            value = Decimal(str(round(levels[analyte.id], 3)))
+            ref_min, ref_max = Decimal(str(low)), Decimal(str(high))
+            flag = "L" if value < ref_min else "H" if value > ref_max else "N"
+            results.append({
+                "document_id": document_id,
+                "analyte_id": analyte.id,
+                "source_label": analyte.name,
+                "raw_value": str(value).replace(".", ","),
+                "raw_unit": analyte.default_unit,
+                "raw_reference_range": f"{low} - {high}",
+                "numeric_value": value,
+                "normalized_unit": analyte.default_unit,
+                "normalized_reference_min": ref_min,
+                "normalized_reference_max": ref_max,
+                "is_numeric": True,
+                "is_out_of_range": flag != "N",
+                "flag": flag,
+                "is_suspect": False,
+                "range_position": range_position(value, ref_min, ref_max),
+                "relative_deviation": relative_deviation(value, ref_min, ref_max),
+                "normalized": True,
+                "created_at": document["created_at"],
+            })
+    
+    for offset in range(0, len(results), args.batch_size):
+        db.execute(insert(Result), results[offset:offset + args.batch_size])
+    return len(results)
+
+
+def seed(args):
+    rng = random.Random(args.seed)
+    db: Session = SessionLocal()
+    try:
+        analytes = ensure_analytes(db, args.analytes, rng)
+        bounds = {analyte.id: _bounds(analyte) for analyte in analytes}
+        print(f"🔬 Аналитов: {len(analytes)}")
+        
+        first_id = (db.scalar(select(func.max(User.id))) or 0) + 1
+        started = time.perf_counter()
+        total_results = 0
+        for offset in range(args.users):
+            user_id = first_id + offset
+            db.add(User(id=user_id, email=f"seed-{user_id}@{SEED_EMAIL_DOMAIN}", is_active=True))
+            db.flush()
+            total_results += seed_user(db, user_id, analytes, bounds, args, rng)
+            if not args.skip_deltas:
+                recalculate_deltas(db, user_id)
+            db.commit()
+            rebuild_user_stats(db, user_id)
+            
+            if (offset + 1) % 10 == 0 or offset + 1 == args.users:
+                elapsed = time.perf_counter() - started
+                print(f"   👤 {offset + 1}/{args.users} пользователей, {total_results} результатов ({total_results / elapsed:.0f}/с)")
+        
+        # id пользователей заданы явно - сдвигаем последовательность
+        db.execute(text("SELECT setval(pg_get_serial_sequence('users', 'id'), (SELECT max(id) FROM users))"))
+        db.commit()
+        print(f"✅ Создано пользователей: {args.users} (id {first_id}-{first_id + args.users - 1}), результатов: {total_results}")
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при генерации данных: {e}")
+        raise
+    finally:
+        db.close()
+
+
+def purge():
+    """Удаляет все сгенерированные данные"""
+    db: Session = SessionLocal()
+    try:
+        seed_documents = select(Document.id).filter(Document.file_path.like(f"{SEED_PATH_PREFIX}%"))
+        seed_users = select(User.id).filter(User.email.like(f"%@{SEED_EMAIL_DOMAIN}"))
+        db.execute(
+            update(Result)
+            .filter(Result.previous_result_id.in_(select(Result.id).filter(Result.document_id.in_(seed_documents))))
+            .values(previous_result_id=None)
+        )
+        results = db.execute(delete(Result).filter(Result.document_id.in_(seed_documents))).rowcount
+        documents = db.execute(delete(Document).filter(Document.id.in_(seed_documents))).rowcount
+        db.execute(delete(UserStats).filter(UserStats.user_id.in_(seed_users)))
+        users = db.execute(delete(User).filter(User.id.in_(seed_users))).rowcount
+        db.commit()
+        print(f"🗑️ Удалено пользователей: {users}, документов: {documents}, результатов: {results}")
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Генерация объемных данных для бенчмарков LabTrack")
+    parser.add_argument("--users", type=int, default=100)
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--reports-per-year", type=int, default=4)
+    parser.add_argument("--analytes", type=int, default=50, help="Показателей в каждом отчете")
+    parser.add_argument("--batch-size", type=int, default=5000, help="Строк результатов в одном INSERT")
+    parser.add_argument("--skip-deltas", action="store_true", help="Не пересчитывать цепочки дельт")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--purge", action="store_true", help="Удалить ранее сгенерированные данные")
+    args = parser.parse_args()
+    
+    if args.purge:
+        print("🚀 Удаление сгенерированных данных...")
+        purge()
+    else:
+        print(f"🚀 Генерация: {args.users} пользователей × {args.years} лет × {args.analytes} аналитов...")
+        seed(args)
\ No newline at end of file
@@ -0,0 +1,104 @@
+"""
+Проверка async-бэкендов хранилища на локальном S3 (MinIO из docker-compose
+или moto_server).
+
+Для каждого бэкенда параллельно выполняются put/get/stream/head/delete,
+а отдельная корутина измеряет задержку event loop. Проверка падает, если
+данные не совпали или loop был заблокирован дольше --max-lag-ms: это
+значит, что сетевой вызов S3 выполнялся в потоке event loop.
+
+Пример:
+    docker compose up -d minio
+    python benchmarks/storage_check.py --objects 50 --size-kb 512
+    S3_ENDPOINT=http://localhost:5000 python benchmarks/storage_check.py  # moto_server -p 5000
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
+
+from app.core.clients import ensure_bucket
+from app.services.storage import AioS3Storage, ThreadPoolStorage
+from app.core.config import settings
+
+
+async def monitor_loop_lag(stop: asyncio.Event, interval: float = 0.005) -> float:
+    """Максимальная задержка пробуждения корутины, мс"""
+    max_lag = 0.0
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        max_lag = max(max_lag, (time.perf_counter() - started - interval) * 1000)
+    return max_lag
+
+
+async def roundtrip(storage, key: str, payload: bytes, chunk_size: int):
+    await storage.put(key, payload, "application/octet-stream")
+    assert await storage.get(key) == payload, f"get: данные {key} не совпали"
+    streamed = b"".join([chunk async for chunk in storage.stream(key, chunk_size)])
+    assert streamed == payload, f"stream: данные {key} не совпали"
+    assert (await storage.head(key))["ContentLength"] == len(payload)
+    await storage.delete(key)
+
+
+async def check_backend(storage, args) -> bool:
+    payload = os.urandom(args.size_kb * 1024)
+    prefix = f"storage-check/{uuid.uuid4().hex}"
+    stop = asyncio.Event()
+    lag_task = asyncio.create_task(monitor_loop_lag(stop))
+    
+    started = time.perf_counter()
+    semaphore = asyncio.Semaphore(args.concurrency)
+    
+    async def one(index: int):
+        async with semaphore:
+            await roundtrip(storage, f"{prefix}/{index}", payload, args.chunk_kb * 1024)
+    
+    try:
+        await asyncio.gather(*(one(i) for i in range(args.objects)))
+    finally:
+        stop.set()
+        max_lag = await lag_task
+        await storage.close()
+    
+    elapsed = time.perf_counter() - started
+    ok = max_lag <= args.max_lag_ms
+    print(
+        f"{'✅' if ok else '❌'} {storage.name}: {args.objects} объектов за {elapsed:.2f} с, "
+        f"максимальная задержка event loop {max_lag:.1f} мс"
+    )
+    return ok
+
+
+async def main(args) -> int:
+    ensure_bucket()
+    backends = []
+    if args.backend in ("all", "threadpool"):
+        backends.append(ThreadPoolStorage(max_workers=settings.s3_max_pool_connections))
+    if args.backend in ("all", "aiobotocore"):
+        try:
+            backends.append(AioS3Storage())
+        except ImportError:
+            print("⚠️  aiobotocore не установлен, бэкенд пропущен")
+    
+    results = [await check_backend(storage, args) for storage in backends]
+    return 0 if results and all(results) else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Проверка async-бэкендов S3 на локальном хранилище")
+    parser.add_argument("--backend", choices=["all", "threadpool", "aiobotocore"], default="all")
+    parser.add_argument("--objects", type=int, default=20)
+    parser.add_argument("--size-kb", type=int, default=256)
+    parser.add_argument("--chunk-kb", type=int, default=64)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--max-lag-ms", type=float, default=50.0, help="Допустимая блокировка event loop")
+    args = parser.parse_args()
+    
+    print(f"🚀 Проверка хранилища {settings.s3_endpoint}/{settings.s3_bucket}...")
+    sys.exit(asyncio.run(main(args)))
\ No newline at end of file
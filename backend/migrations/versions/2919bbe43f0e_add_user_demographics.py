@@ -0,0 +1,26 @@
+"""Add user demographics
+
+Revision ID: 2919bbe43f0e
+Revises: 68cf1418d920
+Create Date: 2026-10-19 13:02:48.119604+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2919bbe43f0e'
+down_revision = '68cf1418d920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('sex', sa.String(), nullable=True))
+    op.add_column('users', sa.Column('birth_date', sa.Date(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('users', 'birth_date')
+    op.drop_column('users', 'sex')
\ No newline at end of file
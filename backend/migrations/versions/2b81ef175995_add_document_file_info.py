@@ -0,0 +1,24 @@
+"""Add document file info
+
+Revision ID: 2b81ef175995
+Revises: 8c68248f76b9
+Create Date: 2026-10-19 17:24:08.503117+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b81ef175995'
+down_revision = '8c68248f76b9'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('file_info', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'file_info')
\ No newline at end of file
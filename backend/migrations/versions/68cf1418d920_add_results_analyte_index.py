@@ -0,0 +1,23 @@
+"""Add results analyte index
+
+Revision ID: 68cf1418d920
+Revises: c40389c55641
+Create Date: 2026-10-19 12:21:05.774130+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '68cf1418d920'
+down_revision = 'c40389c55641'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_results_analyte_id'), 'results', ['analyte_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_results_analyte_id'), table_name='results')
\ No newline at end of file
@@ -0,0 +1,26 @@
+"""Add document batch id
+
+Revision ID: 8c68248f76b9
+Revises: d650e0cfbac4
+Create Date: 2026-10-19 16:02:41.218934+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c68248f76b9'
+down_revision = 'd650e0cfbac4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('batch_id', sa.String(length=32), nullable=True))
+    op.create_index(op.f('ix_documents_batch_id'), 'documents', ['batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_documents_batch_id'), table_name='documents')
+    op.drop_column('documents', 'batch_id')
\ No newline at end of file
@@ -0,0 +1,24 @@
+"""Add document extraction method
+
+Revision ID: 9abd3b63824a
+Revises: 2b81ef175995
+Create Date: 2026-10-19 18:11:52.640285+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9abd3b63824a'
+down_revision = '2b81ef175995'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('documents', sa.Column('extraction_method', sa.String(length=32), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('documents', 'extraction_method')
\ No newline at end of file
@@ -0,0 +1,45 @@
+"""Add user stats counters
+
+Revision ID: c40389c55641
+Revises: fe86ddaf5bab
+Create Date: 2026-10-19 11:04:17.502913+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c40389c55641'
+down_revision = 'fe86ddaf5bab'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table('user_stats',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_documents', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('processed_documents', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('pending_documents', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('total_results', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+    
+    # Счетчики существующих пользователей: дальше строки только обновляются на изменение
+    op.execute("""
+        INSERT INTO user_stats (user_id, total_documents, processed_documents, pending_documents, total_results)
+        SELECT users.id,
+               (SELECT COUNT(*) FROM documents WHERE documents.user_id = users.id),
+               (SELECT COUNT(*) FROM documents WHERE documents.user_id = users.id AND documents.status = 'completed'),
+               (SELECT COUNT(*) FROM documents WHERE documents.user_id = users.id AND documents.status = 'pending'),
+               (SELECT COUNT(*) FROM results JOIN documents ON documents.id = results.document_id
+                WHERE documents.user_id = users.id)
+        FROM users
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('user_stats')
\ No newline at end of file
@@ -0,0 +1,55 @@
+"""Add unit conversion rules
+
+Revision ID: d650e0cfbac4
+Revises: fe3035cd792d
+Create Date: 2026-10-19 14:36:12.640588+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd650e0cfbac4'
+down_revision = 'fe3035cd792d'
+branch_labels = None
+depends_on = None
+
+
+# Правила, которые раньше были зашиты в NormalizationService
+INITIAL_RULES = [
+    {'analyte_code': 'glucose', 'source_unit': 'mg/dl', 'target_unit': 'mmol/l', 'factor': 0.0555},
+    {'analyte_code': 'cholesterol', 'source_unit': 'mg/dl', 'target_unit': 'mmol/l', 'factor': 0.02586},
+    {'analyte_code': 'creatinine', 'source_unit': 'mg/dl', 'target_unit': 'μmol/l', 'factor': 88.4},
+    {'analyte_code': None, 'source_unit': 'г/л', 'target_unit': 'g/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'мг/л', 'target_unit': 'mg/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'ммоль/л', 'target_unit': 'mmol/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'мкмоль/л', 'target_unit': 'μmol/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'мкг/л', 'target_unit': 'μg/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'ед/л', 'target_unit': 'U/l', 'factor': 1},
+    {'analyte_code': None, 'source_unit': 'мед/л', 'target_unit': 'mU/l', 'factor': 1},
+]
+
+
+def upgrade() -> None:
+    rules = op.create_table('unit_conversion_rules',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('analyte_code', sa.String(), nullable=True),
+    sa.Column('source_unit', sa.String(), nullable=False),
+    sa.Column('target_unit', sa.String(), nullable=False),
+    sa.Column('factor', sa.Numeric(precision=18, scale=9), nullable=True),
+    sa.Column('molar_mass', sa.Numeric(precision=12, scale=4), nullable=True),
+    sa.Column('lab_name', sa.String(), nullable=True),
+    sa.Column('is_active', sa.Boolean(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_unit_conversion_rules_id'), 'unit_conversion_rules', ['id'], unique=False)
+    op.create_index(op.f('ix_unit_conversion_rules_analyte_code'), 'unit_conversion_rules', ['analyte_code'], unique=False)
+    op.bulk_insert(rules, [{**rule, 'molar_mass': None, 'lab_name': None, 'is_active': True} for rule in INITIAL_RULES])
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_unit_conversion_rules_analyte_code'), table_name='unit_conversion_rules')
+    op.drop_index(op.f('ix_unit_conversion_rules_id'), table_name='unit_conversion_rules')
+    op.drop_table('unit_conversion_rules')
\ No newline at end of file
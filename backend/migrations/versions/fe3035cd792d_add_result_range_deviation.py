@@ -0,0 +1,60 @@
+"""Add result range position and relative deviation
+
+Revision ID: fe3035cd792d
+Revises: 2919bbe43f0e
+Create Date: 2026-10-19 13:47:31.905377+00:00
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'fe3035cd792d'
+down_revision = '2919bbe43f0e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('results', sa.Column('range_position', sa.Numeric(precision=12, scale=4), nullable=True))
+    op.add_column('results', sa.Column('relative_deviation', sa.Numeric(precision=12, scale=4), nullable=True))
+    
+    # Заполняем для уже нормализованных результатов (та же формула и ограничение, что в reference_ranges)
+    op.execute("""
+        UPDATE results SET
+            range_position = GREATEST(LEAST(CASE
+                WHEN normalized_reference_max > normalized_reference_min
+                THEN ROUND((numeric_value - normalized_reference_min)
+                           / (normalized_reference_max - normalized_reference_min), 4)
+            END, 99999999.9999), -99999999.9999),
+            relative_deviation = GREATEST(LEAST(CASE
+                WHEN normalized_reference_min IS NULL AND normalized_reference_max IS NULL THEN NULL
+                WHEN numeric_value > normalized_reference_max AND normalized_reference_max <> 0
+                THEN ROUND((numeric_value - normalized_reference_max) / ABS(normalized_reference_max), 4)
+                WHEN numeric_value < normalized_reference_min AND normalized_reference_min <> 0
+                THEN ROUND((numeric_value - normalized_reference_min) / ABS(normalized_reference_min), 4)
+                WHEN numeric_value > normalized_reference_max OR numeric_value < normalized_reference_min
+                THEN CASE
+                    WHEN normalized_reference_max > normalized_reference_min
+                    THEN ROUND((numeric_value - CASE WHEN numeric_value > normalized_reference_max
+                                                     THEN normalized_reference_max
+                                                     ELSE normalized_reference_min END)
+                               / (normalized_reference_max - normalized_reference_min), 4)
+                END
+                ELSE 0
+            END, 99999999.9999), -99999999.9999)
+        WHERE is_numeric AND numeric_value IS NOT NULL
+    """)
+    
+    op.create_index(
+        'ix_results_document_id_abs_relative_deviation', 'results',
+        ['document_id', sa.text('abs(relative_deviation) DESC NULLS LAST')],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_results_document_id_abs_relative_deviation', table_name='results')
+    op.drop_column('results', 'relative_deviation')
+    op.drop_column('results', 'range_position')
\ No newline at end of file
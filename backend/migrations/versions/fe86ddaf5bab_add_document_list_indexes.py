@@ -0,0 +1,25 @@
+"""Add document list indexes
+
+Revision ID: fe86ddaf5bab
+Revises: 1abeb8405bd4
+Create Date: 2026-10-19 09:12:40.318205+00:00
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'fe86ddaf5bab'
+down_revision = '1abeb8405bd4'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(op.f('ix_results_document_id'), 'results', ['document_id'], unique=False)
+    op.create_index('ix_documents_user_id_created_at', 'documents', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_documents_user_id_created_at', table_name='documents')
+    op.drop_index(op.f('ix_results_document_id'), table_name='results')
@@ -6,7 +6,7 @@ import os
 sys.path.append(os.path.dirname(os.path.dirname(__file__)))
 
 from sqlalchemy.orm import Session
-from app.db.database import SessionLocal, engine
+from app.db.database import SessionLocal
 from app.models import User, Analyte
 
 def init_database():
@@ -0,0 +1,111 @@
+"""
+Нагрузочный тест API LabTrack: пропускная способность и хвостовые задержки
+при заданной конкурентности.
+
+Пример:
+    python scripts/load_test.py --base-url http://localhost:8000 --concurrency 10 50 200 --requests 2000
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+import httpx
+
+DEFAULT_ENDPOINTS = [
+    "/api/v1/results/",
+    "/api/v1/results/summary",
+    "/api/v1/results/trends/summary",
+    "/api/v1/documents/",
+    "/api/v1/analytes/",
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run_level(
+    client: httpx.AsyncClient,
+    endpoints: List[str],
+    concurrency: int,
+    total_requests: int
+) -> Dict[str, float]:
+    """Выполняет total_requests запросов с заданной конкурентностью"""
+    latencies: List[float] = []
+    errors = 0
+    counter = iter(range(total_requests))
+    
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            endpoint = endpoints[i % len(endpoints)]
+            started = time.perf_counter()
+            try:
+                response = await client.get(endpoint)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+    
+    started = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    elapsed = time.perf_counter() - started
+    
+    return {
+        "concurrency": concurrency,
+        "requests": total_requests,
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(total_requests / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "mean_ms": round(statistics.mean(latencies), 2) if latencies else 0.0,
+    }
+
+
+async def main(args):
+    limits = httpx.Limits(max_connections=max(args.concurrency), max_keepalive_connections=max(args.concurrency))
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        # Прогрев: соединения, пулы БД, кэши
+        await run_level(client, args.endpoints, min(args.concurrency), len(args.endpoints) * 5)
+        
+        report = []
+        for concurrency in args.concurrency:
+            stats = await run_level(client, args.endpoints, concurrency, args.requests)
+            report.append(stats)
+            print(
+                f"👥 {concurrency:>4}  "
+                f"⚡ {stats['rps']:>8} rps  "
+                f"p50 {stats['p50_ms']:>8} ms  "
+                f"p95 {stats['p95_ms']:>8} ms  "
+                f"p99 {stats['p99_ms']:>8} ms  "
+                f"❌ {stats['errors']}"
+            )
+    
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({"base_url": args.base_url, "endpoints": args.endpoints, "levels": report}, f, indent=2)
+        print(f"💾 Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный тест API LabTrack")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--requests", type=int, default=2000, help="Запросов на каждый уровень конкурентности")
+    parser.add_argument("--endpoints", nargs="+", default=DEFAULT_ENDPOINTS)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Путь к JSON-файлу с результатами")
+    args = parser.parse_args()
+    
+    print(f"🚀 Нагрузочный тест {args.base_url}...")
+    asyncio.run(main(args))
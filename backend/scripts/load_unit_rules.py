@@ -0,0 +1,97 @@
+"""
+Загрузка правил приведения единиц из CSV в unit_conversion_rules.
+
+Колонки: analyte_code, source_unit, target_unit, factor, molar_mass, lab_name.
+Пустой analyte_code - синоним единицы для любого аналита. Существующие правила
+с тем же ключом (analyte_code, source_unit, lab_name) обновляются. После загрузки
+увеличивается версия кэша правил - воркеры перечитают их без перезапуска.
+
+Пример:
+    python scripts/load_unit_rules.py scripts/unit_conversion_rules.csv
+"""
+import argparse
+import csv
+import sys
+import os
+from decimal import Decimal
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy.orm import Session
+from app.db.database import SessionLocal
+from app.core.cache import unit_rules_cache
+from app.models import UnitConversionRule
+
+
+def _optional(value):
+    value = (value or "").strip()
+    return value or None
+
+
+def _rule_key(analyte_code, source_unit, lab_name):
+    return (analyte_code, source_unit.strip().lower(), lab_name.lower() if lab_name else None)
+
+
+def load_rules(path: str, replace: bool = False):
+    db: Session = SessionLocal()
+    
+    try:
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = list(csv.DictReader(f))
+        
+        if replace:
+            db.query(UnitConversionRule).delete()
+            existing = {}
+        else:
+            existing = {
+                _rule_key(rule.analyte_code, rule.source_unit, rule.lab_name): rule
+                for rule in db.query(UnitConversionRule).all()
+            }
+        
+        created_count = 0
+        updated_count = 0
+        new_rules = []
+        for row in rows:
+            factor = _optional(row.get("factor"))
+            molar_mass = _optional(row.get("molar_mass"))
+            values = {
+                "analyte_code": _optional(row.get("analyte_code")),
+                "source_unit": row["source_unit"].strip().lower(),
+                "target_unit": row["target_unit"].strip(),
+                "factor": Decimal(factor) if factor else None,
+                "molar_mass": Decimal(molar_mass) if molar_mass else None,
+                "lab_name": _optional(row.get("lab_name")),
+                "is_active": True,
+            }
+            
+            rule = existing.get(_rule_key(values["analyte_code"], values["source_unit"], values["lab_name"]))
+            if rule:
+                for key, value in values.items():
+                    setattr(rule, key, value)
+                updated_count += 1
+            else:
+                new_rules.append(values)
+                created_count += 1
+        
+        if new_rules:
+            db.bulk_insert_mappings(UnitConversionRule, new_rules)
+        db.commit()
+        unit_rules_cache.invalidate_sync()
+        
+        print(f"✅ Создано правил: {created_count}, обновлено: {updated_count}")
+    
+    except Exception as e:
+        db.rollback()
+        print(f"❌ Ошибка при загрузке правил: {e}")
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Загрузка правил приведения единиц из CSV")
+    parser.add_argument("csv_path")
+    parser.add_argument("--replace", action="store_true", help="Удалить существующие правила перед загрузкой")
+    args = parser.parse_args()
+    
+    print(f"🚀 Загрузка правил из {args.csv_path}...")
+    load_rules(args.csv_path, replace=args.replace)
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Разбивка времени обработки документа по этапам из файла трасс.
+
+Читает JSON-строки файлового экспортера (OTEL_EXPORTER=file) и суммирует
+длительность спанов по имени: загрузка, S3, LLM, SQL, нормализация.
+С --document-id берутся все трассы, где встречается спан с
+labtrack.document_id (upload, process_document и задачи нормализации).
+
+Пример:
+    python scripts/trace_breakdown.py --file traces.jsonl --document-id 42
+"""
+import argparse
+import json
+import statistics
+from collections import defaultdict
+from datetime import datetime
+
+
+def _parse_time(value: str) -> datetime:
+    # Формат SDK: 2026-10-19T10:00:00.123456Z
+    return datetime.fromisoformat(value.replace("Z", "+00:00"))
+
+
+def load_spans(path: str):
+    spans = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            span = json.loads(line)
+            start, end = _parse_time(span["start_time"]), _parse_time(span["end_time"])
+            spans.append({
+                "name": span["name"],
+                "trace_id": span["context"]["trace_id"],
+                "service": span.get("resource", {}).get("attributes", {}).get("service.name", ""),
+                "attributes": span.get("attributes") or {},
+                "start": start,
+                "duration_ms": (end - start).total_seconds() * 1000,
+            })
+    return spans
+
+
+def document_spans(spans, document_id: int):
+    """Спаны всех трасс, относящихся к документу"""
+    trace_ids = {
+        span["trace_id"] for span in spans
+        if span["attributes"].get("labtrack.document_id") == document_id
+    }
+    return [span for span in spans if span["trace_id"] in trace_ids]
+
+
+def breakdown(spans):
+    stages = defaultdict(list)
+    first_seen = {}
+    for span in sorted(spans, key=lambda s: s["start"]):
+        key = (span["service"], span["name"])
+        stages[key].append(span["duration_ms"])
+        first_seen.setdefault(key, span["start"])
+    
+    rows = []
+    for key in sorted(stages, key=lambda k: first_seen[k]):
+        durations = stages[key]
+        rows.append({
+            "service": key[0],
+            "name": key[1],
+            "count": len(durations),
+            "total_ms": sum(durations),
+            "p50_ms": statistics.median(durations),
+            "max_ms": max(durations),
+        })
+    return rows
+
+
+def print_breakdown(rows):
+    print(f"{'сервис':<18} {'спан':<44} {'кол-во':>7} {'всего, мс':>11} {'p50, мс':>9} {'макс, мс':>9}")
+    for row in rows:
+        print(
+            f"{row['service'][:18]:<18} {row['name'][:44]:<44} {row['count']:>7} "
+            f"{row['total_ms']:>11.1f} {row['p50_ms']:>9.1f} {row['max_ms']:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Разбивка времени по этапам из файла трасс OpenTelemetry")
+    parser.add_argument("--file", default="traces.jsonl", help="Файл экспортера (OTEL_FILE_PATH)")
+    parser.add_argument("--document-id", type=int, help="Только трассы указанного документа")
+    args = parser.parse_args()
+    
+    spans = load_spans(args.file)
+    if args.document_id is not None:
+        spans = document_spans(spans, args.document_id)
+        if not spans:
+            print(f"❌ Спаны документа {args.document_id} не найдены в {args.file}")
+            raise SystemExit(1)
+        print(f"📄 Документ {args.document_id}: {len({s['trace_id'] for s in spans})} трасс, {len(spans)} спанов")
+    else:
+        print(f"📊 {len(spans)} спанов из {args.file}")
+    
+    print_breakdown(breakdown(spans))
\ No newline at end of file
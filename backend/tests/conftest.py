@@ -0,0 +1,11 @@
+"""
+Общие настройки тестов: запуск из backend/ (python -m pytest tests).
+
+Тесты с БД (test_delta_service.py) используют DATABASE_URL с применёнными
+миграциями (alembic upgrade head) и пропускаются, если PostgreSQL недоступен.
+"""
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(BACKEND_DIR)
\ No newline at end of file
@@ -0,0 +1,116 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.analyte import Analyte
+from app.models.document import Document
+from app.models.result import Result
+from app.models.user import User
+from app.services.delta_service import recalculate_deltas, recalculate_document_deltas
+
+
+@pytest.fixture
+def db():
+    """Сессия в транзакции, которая откатывается после теста"""
+    engine = create_engine(settings.database_url)
+    try:
+        connection = engine.connect()
+    except OperationalError:
+        engine.dispose()
+        pytest.skip("PostgreSQL недоступен (DATABASE_URL)")
+    transaction = connection.begin()
+    session = Session(bind=connection, join_transaction_mode="create_savepoint")
+    try:
+        yield session
+    finally:
+        session.close()
+        transaction.rollback()
+        connection.close()
+        engine.dispose()
+
+
+@pytest.fixture
+def history(db):
+    """Три отчета пользователя; во втором гемоглобин указан дважды"""
+    user = User(email="delta-test@labtrack.local")
+    analyte = Analyte(code="TEST_HGB", name="Гемоглобин (тест)")
+    db.add_all([user, analyte])
+    db.flush()
+    
+    start = datetime(2026, 1, 1)
+    documents = [
+        Document(user_id=user.id, filename=f"report-{day}.pdf", file_path="-", status="completed",
+                 report_date=start + timedelta(days=day))
+        for day in range(3)
+    ]
+    db.add_all(documents)
+    db.flush()
+    
+    def result(document, value):
+        return Result(
+            document_id=document.id, analyte_id=analyte.id, source_label="Hb", raw_value=value,
+            numeric_value=Decimal(value), is_numeric=True, normalized=True
+        )
+    
+    results = [
+        result(documents[0], "100"),
+        result(documents[1], "110"),
+        result(documents[1], "120"),
+        result(documents[2], "90"),
+    ]
+    db.add_all(results)
+    db.flush()
+    return user, documents, results
+
+
+def _chain(db, results):
+    for result in results:
+        db.refresh(result)
+    return [(result.previous_result_id, result.delta_value, result.delta_percent) for result in results]
+
+
+def test_deltas_follow_observation_order(db, history):
+    user, documents, (first, second_a, second_b, third) = history
+    
+    recalculate_deltas(db, user.id)
+    
+    assert _chain(db, [first, second_a, second_b, third]) == [
+        (None, None, None),
+        # Результаты одного документа не ссылаются друг на друга
+        (first.id, Decimal("10"), Decimal("10")),
+        (first.id, Decimal("20"), Decimal("20")),
+        (second_b.id, Decimal("-30"), Decimal("-25")),
+    ]
+
+
+def test_backdated_document_is_inserted_into_chain(db, history):
+    user, documents, (first, second_a, second_b, third) = history
+    recalculate_deltas(db, user.id)
+    
+    documents[2].report_date = datetime(2025, 12, 1)
+    db.flush()
+    recalculate_document_deltas(db, documents[2].id)
+    
+    assert _chain(db, [third, first]) == [
+        (None, None, None),
+        (third.id, Decimal("10"), Decimal("11.111")),
+    ]
+
+
+def test_results_dropped_from_chain_are_cleared(db, history):
+    user, documents, (first, second_a, second_b, third) = history
+    recalculate_deltas(db, user.id)
+    
+    third.is_numeric = False
+    second_b.analyte_id = None
+    db.flush()
+    recalculate_document_deltas(db, documents[2].id)
+    
+    assert _chain(db, [second_b, third]) == [(None, None, None), (None, None, None)]
+    # Повторный пересчет ничего не меняет
+    assert recalculate_deltas(db, user.id) == 0
\ No newline at end of file
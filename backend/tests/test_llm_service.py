@@ -0,0 +1,33 @@
+from app.services.llm_service import ExtractedAnalyte, ExtractedDocument, LLMExtractionService
+
+
+def _analyte(name: str) -> ExtractedAnalyte:
+    return ExtractedAnalyte(name=name, value="1")
+
+
+def test_merge_extractions_takes_first_metadata():
+    merged = LLMExtractionService._merge_extractions([
+        ExtractedDocument(report_date="2026-01-10", analytes=[_analyte("Глюкоза")], additional_comments="стр. 1"),
+        None,
+        ExtractedDocument(lab_name="Инвитро", report_date="2026-01-11", analytes=[_analyte("Гемоглобин")]),
+        ExtractedDocument(lab_name="Гемотест", report_type="ОАК", additional_comments="стр. 3"),
+    ])
+    
+    assert merged.lab_name == "Инвитро"
+    assert merged.report_date == "2026-01-10"
+    assert merged.report_type == "ОАК"
+    assert [analyte.name for analyte in merged.analytes] == ["Глюкоза", "Гемоглобин"]
+    assert merged.additional_comments == "стр. 1\nстр. 3"
+
+
+def test_merge_extractions_without_parts():
+    assert LLMExtractionService._merge_extractions([]) is None
+    assert LLMExtractionService._merge_extractions([None, None]) is None
+
+
+def test_merge_extractions_does_not_share_analyte_lists():
+    part = ExtractedDocument(analytes=[_analyte("Глюкоза")])
+    merged = LLMExtractionService._merge_extractions([part, ExtractedDocument(analytes=[_analyte("Гемоглобин")])])
+    
+    assert len(part.analytes) == 1
+    assert merged.additional_comments is None
\ No newline at end of file
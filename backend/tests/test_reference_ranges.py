@@ -0,0 +1,127 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.analyte import Analyte
+from app.services import reference_ranges
+from app.services.reference_ranges import (
+    DEVIATION_LIMIT,
+    ReferenceRangeResolver,
+    compile_reference_ranges,
+    range_position,
+    relative_deviation,
+)
+
+HEMOGLOBIN_RANGES = {
+    "male": {"min": 130, "max": 170},
+    "female": {"min": 120, "max": 150},
+    "ranges": [
+        {"sex": "female", "age_min": 0, "age_max": 18, "min": 110, "max": 140},
+        {"lab": "Инвитро", "method": "HPLC", "min": 125, "max": 165},
+    ],
+}
+
+
+@pytest.fixture
+def resolver(monkeypatch):
+    # Версия справочника фиксирована - Redis не нужен
+    monkeypatch.setattr(reference_ranges.analyte_cache, "get_version_sync", lambda: 1)
+    return ReferenceRangeResolver()
+
+
+def _analyte(reference_ranges_data) -> Analyte:
+    return Analyte(id=1, code="HGB", name="Гемоглобин", reference_ranges=reference_ranges_data)
+
+
+def test_compile_orders_intervals_by_specificity():
+    intervals = compile_reference_ranges(HEMOGLOBIN_RANGES)
+    
+    specificity = [interval.specificity for interval in intervals]
+    assert specificity == sorted(specificity, reverse=True)
+    assert intervals[0].min_value == Decimal("110")
+    assert {interval.sex for interval in intervals} == {"male", "female", None}
+
+
+def test_compile_legacy_formats():
+    assert compile_reference_ranges(None) == ()
+    (normal,) = compile_reference_ranges({"normal": {"min": "3.5", "max": "5.1"}})
+    assert (normal.min_value, normal.max_value, normal.sex) == (Decimal("3.5"), Decimal("5.1"), None)
+    
+    # Неизвестная группа используется только как единственный вариант
+    (fallback,) = compile_reference_ranges({"adult": {"min": 1, "max": 2}})
+    assert fallback.max_value == Decimal("2")
+    assert len(compile_reference_ranges({"adult": {"min": 1}, "normal": {"min": 3}})) == 1
+
+
+def test_resolve_by_sex_and_age(resolver):
+    analyte = _analyte(HEMOGLOBIN_RANGES)
+    
+    assert resolver.resolve(analyte, sex="male", age=40) == (Decimal("130"), Decimal("170"))
+    assert resolver.resolve(analyte, sex="female", age=40) == (Decimal("120"), Decimal("150"))
+    assert resolver.resolve(analyte, sex="female", age=12) == (Decimal("110"), Decimal("140"))
+
+
+def test_resolve_lab_and_method_override(resolver):
+    analyte = _analyte(HEMOGLOBIN_RANGES)
+    
+    assert resolver.resolve(analyte, sex="male", lab="инвитро", method="hplc") == (Decimal("125"), Decimal("165"))
+    assert resolver.resolve(analyte, sex="male", lab="Инвитро") == (Decimal("130"), Decimal("170"))
+
+
+def test_resolve_unknown_sex_uses_covering_interval(resolver):
+    analyte = _analyte({"male": {"min": 130, "max": 170}, "female": {"min": 120, "max": 150}})
+    
+    assert resolver.resolve(analyte) == (Decimal("120"), Decimal("170"))
+
+
+def test_resolve_without_ranges(resolver):
+    assert resolver.resolve(_analyte(None), sex="male") == (None, None)
+
+
+def test_resolver_recompiles_after_invalidate(resolver):
+    analyte = _analyte({"normal": {"min": 1, "max": 2}})
+    assert resolver.resolve(analyte) == (Decimal("1"), Decimal("2"))
+    
+    analyte.reference_ranges = {"normal": {"min": 3, "max": 4}}
+    assert resolver.resolve(analyte) == (Decimal("1"), Decimal("2"))
+    resolver.invalidate([analyte.id])
+    assert resolver.resolve(analyte) == (Decimal("3"), Decimal("4"))
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("120", Decimal("0")),
+    ("150", Decimal("1")),
+    ("135", Decimal("0.5")),
+    ("165", Decimal("1.5")),
+])
+def test_range_position(value, expected):
+    assert range_position(Decimal(value), Decimal("120"), Decimal("150")) == expected
+
+
+def test_range_position_requires_both_bounds():
+    assert range_position(Decimal("1"), None, Decimal("2")) is None
+    assert range_position(Decimal("1"), Decimal("2"), Decimal("2")) is None
+
+
+@pytest.mark.parametrize("value, ref_min, ref_max, expected", [
+    ("135", "120", "150", Decimal("0")),
+    ("187.5", "120", "150", Decimal("0.25")),
+    ("108", "120", "150", Decimal("-0.1")),
+    ("12", None, "10", Decimal("0.2")),
+    ("5", "10", None, Decimal("-0.5")),
+    # Нулевая граница: отклонение в ширине интервала
+    ("-1", "0", "4", Decimal("-0.25")),
+])
+def test_relative_deviation(value, ref_min, ref_max, expected):
+    to_decimal = lambda bound: Decimal(bound) if bound is not None else None
+    assert relative_deviation(Decimal(value), to_decimal(ref_min), to_decimal(ref_max)) == expected
+
+
+def test_relative_deviation_without_bounds():
+    assert relative_deviation(Decimal("1"), None, None) is None
+    assert relative_deviation(Decimal("-1"), Decimal("0"), None) is None
+
+
+def test_deviation_is_clamped_to_column_precision():
+    assert relative_deviation(Decimal("1e12"), None, Decimal("0.0001")) == DEVIATION_LIMIT
+    assert range_position(Decimal("-1e12"), Decimal("0"), Decimal("0.0001")) == -DEVIATION_LIMIT
\ No newline at end of file
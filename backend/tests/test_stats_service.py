@@ -0,0 +1,16 @@
+import pytest
+
+from app.services.stats_service import status_change_deltas
+
+
+@pytest.mark.parametrize("old_status, new_status, expected", [
+    (None, "pending", {"pending_documents": 1}),
+    ("pending", "processing", {"pending_documents": -1}),
+    ("processing", "completed", {"processed_documents": 1}),
+    ("pending", "completed", {"pending_documents": -1, "processed_documents": 1}),
+    ("completed", "pending", {"processed_documents": -1, "pending_documents": 1}),
+    ("processing", "failed", {}),
+    ("completed", "completed", {}),
+])
+def test_status_change_deltas(old_status, new_status, expected):
+    assert status_change_deltas(old_status, new_status) == expected
\ No newline at end of file
@@ -0,0 +1,44 @@
+from decimal import Decimal
+
+import pytest
+
+from app.models.analyte import UnitConversionRule
+from app.services.unit_conversion import UnitConversionEngine
+
+
+@pytest.fixture
+def engine():
+    engine = UnitConversionEngine()
+    engine.use_rules([
+        UnitConversionRule(id=1, analyte_code="GLU", source_unit="mg/dl", target_unit="mmol/L", molar_mass=Decimal("180.16")),
+        UnitConversionRule(id=2, analyte_code="HGB", source_unit="g/dl", target_unit="g/L", factor=Decimal("10")),
+        UnitConversionRule(id=3, analyte_code="HGB", source_unit="g/dl", target_unit="g/L", factor=Decimal("10.5"), lab_name="Гемотест"),
+        UnitConversionRule(id=4, analyte_code=None, source_unit="ммоль/л", target_unit="mmol/L"),
+        UnitConversionRule(id=5, analyte_code="BAD", source_unit="parsec", target_unit="mmol/L", molar_mass=Decimal("1")),
+    ], version=1)
+    return engine
+
+
+def test_convert_by_factor(engine):
+    assert engine.convert(Decimal("14.2"), "g/dL", "HGB") == ("g/L", Decimal("142.0"))
+
+
+def test_convert_by_molar_mass(engine):
+    unit, value = engine.convert(Decimal("90"), "mg/dL", "GLU")
+    assert unit == "mmol/L"
+    assert value.quantize(Decimal("0.01")) == Decimal("5.00")
+
+
+def test_lab_specific_rule_wins(engine):
+    assert engine.convert(Decimal("10"), "g/dl", "HGB", "гемотест") == ("g/L", Decimal("105.0"))
+    assert engine.convert(Decimal("10"), "g/dl", "HGB", "Инвитро") == ("g/L", Decimal("100"))
+
+
+def test_unit_synonym_for_any_analyte(engine):
+    assert engine.convert(Decimal("5.5"), " Ммоль/л ", "GLU") == ("mmol/L", Decimal("5.5"))
+
+
+def test_unknown_conversion(engine):
+    assert engine.convert(Decimal("1"), "mg/dL", "HGB") is None
+    # Правило с несовместимыми единицами пропускается при компиляции
+    assert engine.convert(Decimal("1"), "parsec", "BAD") is None
\ No newline at end of file
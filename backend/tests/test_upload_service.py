@@ -0,0 +1,132 @@
+import base64
+import hashlib
+import json
+
+import pytest
+
+from app.services import upload_service
+from app.services.file_inspection import FileInspection
+from app.services.upload_service import UploadError, complete_upload
+
+CONTENT = b"%PDF-1.4 test"
+UPLOAD_ID = "upload-1"
+TICKET_KEY = f"labtrack:upload:{UPLOAD_ID}"
+
+
+class FakeRedis:
+    def __init__(self, data):
+        self.data = dict(data)
+    
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        self.data[key] = value
+        return True
+    
+    async def get(self, key):
+        return self.data.get(key)
+    
+    async def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeStorage:
+    def __init__(self, head):
+        self._head = head
+    
+    async def head(self, key):
+        return self._head
+
+
+class FakeFileService:
+    def __init__(self, head):
+        self.storage = FakeStorage(head)
+        self.deleted = []
+    
+    async def delete_file(self, file_path):
+        self.deleted.append(file_path)
+        return True
+    
+    async def inspect_stored(self, file_path, declared_mime, filename, size):
+        return FileInspection(declared_mime=declared_mime, detected_mime="application/pdf", route="text", size=size)
+
+
+def _ticket(**overrides):
+    ticket = {
+        "user_id": 1,
+        "file_key": "documents/1/report.pdf",
+        "filename": "report.pdf",
+        "content_type": "application/pdf",
+        "size": len(CONTENT),
+        "md5": base64.b64encode(hashlib.md5(CONTENT).digest()).decode(),
+    }
+    ticket.update(overrides)
+    return ticket
+
+
+def _head(**overrides):
+    head = {
+        "ContentLength": len(CONTENT),
+        "ContentType": "application/pdf",
+        "ETag": f'"{hashlib.md5(CONTENT).hexdigest()}"',
+    }
+    head.update(overrides)
+    return head
+
+
+@pytest.fixture
+def upload(monkeypatch):
+    """Подменяет Redis и хранилище: возвращает функцию подготовки загрузки"""
+    def prepare(ticket, head):
+        redis = FakeRedis({TICKET_KEY: json.dumps(ticket)})
+        file_service = FakeFileService(head)
+        monkeypatch.setattr(upload_service, "_redis", lambda: redis)
+        monkeypatch.setattr(upload_service, "FileService", lambda: file_service)
+        return redis, file_service
+    return prepare
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_accepts_matching_object(upload):
+    redis, file_service = upload(_ticket(), _head(ContentType="application/pdf; charset=binary"))
+    
+    ticket = await complete_upload(1, UPLOAD_ID)
+    
+    assert ticket["file_key"] == "documents/1/report.pdf"
+    assert file_service.deleted == []
+    assert redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_rejects_size_mismatch(upload):
+    redis, file_service = upload(_ticket(), _head(ContentLength=len(CONTENT) + 1))
+    
+    with pytest.raises(UploadError, match="размер"):
+        await complete_upload(1, UPLOAD_ID)
+    
+    # Объект удален, тикет и блокировка сняты
+    assert file_service.deleted == ["documents/1/report.pdf"]
+    assert redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_rejects_content_type_mismatch(upload):
+    redis, file_service = upload(_ticket(), _head(ContentType="text/html"))
+    
+    with pytest.raises(UploadError, match="тип"):
+        await complete_upload(1, UPLOAD_ID)
+    
+    assert file_service.deleted == ["documents/1/report.pdf"]
+    assert redis.data == {}
+
+
+@pytest.mark.asyncio
+async def test_complete_upload_rejects_foreign_ticket(upload):
+    redis, file_service = upload(_ticket(user_id=2), _head())
+    
+    with pytest.raises(UploadError):
+        await complete_upload(1, UPLOAD_ID)
+    
+    # Чужой тикет не трогаем
+    assert file_service.deleted == []
+    assert list(redis.data) == [TICKET_KEY]
\ No newline at end of file
@@ -178,7 +178,7 @@ const DocumentsPage: React.FC = () => {
   });
 
   const uploadMutation = useMutation({
-    mutationFn: ({ file }: { file: File }) => documentsApi.upload(file),
+    mutationFn: ({ file }: { file: File }) => documentsApi.uploadDirect(file),
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: ['documents'] });
     },
@@ -1,5 +1,6 @@
 import axios from 'axios';
-import { Document, Result, Analyte, TrendsData } from '../types/api';
+import { Document, Result, Analyte, TrendsData, DocumentStatusEvent, DocumentUploadTicket,
+  DocumentBatch, DocumentBatchStatus, DocumentRawExtraction } from '../types/api';
 
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000';
 
@@ -89,6 +90,50 @@ export const documentsApi = {
     return response.data;
   },
 
+  // Прямая загрузка в S3: файл не проходит через API
+  uploadDirect: async (file: File, labName?: string, reportDate?: string): Promise<Document> => {
+    const ticketResponse = await apiClient.post<DocumentUploadTicket>('/api/v1/documents/upload-url', {
+      filename: file.name,
+      content_type: file.type || 'application/octet-stream',
+      size: file.size,
+    });
+    const ticket = ticketResponse.data;
+
+    const formData = new FormData();
+    Object.entries(ticket.fields).forEach(([key, value]) => formData.append(key, value));
+    formData.append('file', file); // Файл должен быть последним полем формы
+    const storageResponse = await fetch(ticket.url, { method: 'POST', body: formData });
+    if (!storageResponse.ok) {
+      throw new Error('Не удалось загрузить файл в хранилище');
+    }
+
+    const response = await apiClient.post<Document>('/api/v1/documents/upload-complete', {
+      upload_id: ticket.upload_id,
+      lab_name: labName,
+      report_date: reportDate,
+    });
+    return response.data;
+  },
+
+  // Пакетная загрузка: несколько файлов и/или ZIP-архивы
+  uploadBatch: async (files: File[], labName?: string): Promise<DocumentBatch> => {
+    const formData = new FormData();
+    files.forEach((file) => formData.append('files', file));
+    if (labName) formData.append('lab_name', labName);
+
+    const response = await apiClient.post<DocumentBatch>('/api/v1/documents/batch', formData, {
+      headers: {
+        'Content-Type': 'multipart/form-data',
+      },
+    });
+    return response.data;
+  },
+
+  getBatchStatus: async (batchId: string): Promise<DocumentBatchStatus> => {
+    const response = await apiClient.get<DocumentBatchStatus>(`/api/v1/documents/batches/${batchId}`);
+    return response.data;
+  },
+
   getAll: async (params?: {
     skip?: number;
     limit?: number;
@@ -103,6 +148,11 @@ export const documentsApi = {
     return response.data;
   },
 
+  getRawExtraction: async (id: number): Promise<DocumentRawExtraction> => {
+    const response = await apiClient.get<DocumentRawExtraction>(`/api/v1/documents/${id}/raw-extraction`);
+    return response.data;
+  },
+
   delete: async (id: number): Promise<void> => {
     await apiClient.delete(`/api/v1/documents/${id}`);
   },
@@ -110,6 +160,19 @@ export const documentsApi = {
   reprocess: async (id: number): Promise<void> => {
     await apiClient.post(`/api/v1/documents/${id}/reprocess`);
   },
+
+  // Подписка на события обработки документа (SSE) вместо polling
+  subscribeToStatus: (id: number, onEvent: (event: DocumentStatusEvent) => void): (() => void) => {
+    const source = new EventSource(`${API_BASE_URL}/api/v1/documents/${id}/events`);
+    source.addEventListener('status', (message) => {
+      const event: DocumentStatusEvent = JSON.parse((message as MessageEvent).data);
+      onEvent(event);
+      if (event.status === 'failed' || event.stage === 'normalized') {
+        source.close();
+      }
+    });
+    return () => source.close();
+  },
 };
 
 export const resultsApi = {
@@ -5,16 +5,87 @@ export interface Document {
   file_path: string;
   file_size?: number;
   mime_type?: string;
+  batch_id?: string;
+  file_info?: FileInfo;
+  extraction_method?: 'text_layer' | 'vision' | 'text_layer+vision' | 'text' | 'spreadsheet';
   status: 'pending' | 'processing' | 'completed' | 'failed';
   error_message?: string;
   lab_name?: string;
   report_date?: string;
-  raw_extracted_data?: any;
   created_at: string;
   updated_at?: string;
   results?: Result[];
 }
 
+export interface FileInfo {
+  declared_mime?: string;
+  detected_mime: string;
+  route?: 'vision' | 'text' | 'spreadsheet';
+  size: number;
+  page_count?: number;
+  width?: number;
+  height?: number;
+  error?: string;
+  extraction_method?: string;
+  scanned_pages?: number[];
+}
+
+export interface ExtractedAnalyte {
+  name: string;
+  value: string;
+  unit?: string;
+  reference_range?: string;
+  flag?: string;
+  comments?: string;
+}
+
+// GET /api/v1/documents/{id}/raw-extraction
+export interface DocumentRawExtraction {
+  id: number;
+  raw_extracted_data?: {
+    lab_name?: string;
+    patient_id?: string;
+    report_date?: string;
+    report_type?: string;
+    analytes: ExtractedAnalyte[];
+    additional_comments?: string;
+  };
+}
+
+export interface DocumentUploadTicket {
+  upload_id: string;
+  url: string;
+  fields: Record<string, string>;
+  expires_in: number;
+}
+
+export interface DocumentBatch {
+  batch_id: string;
+  documents: Document[];
+  skipped: { filename: string; reason: string }[];
+}
+
+export interface DocumentBatchStatus {
+  batch_id: string;
+  total: number;
+  pending: number;
+  processing: number;
+  completed: number;
+  normalized: number;
+  failed: number;
+  progress: number;
+}
+
+export interface DocumentStatusEvent {
+  document_id: number;
+  status: Document['status'];
+  stage: string;
+  timestamp?: string;
+  results_count?: number;
+  normalized_count?: number;
+  error?: string;
+}
+
 export interface Result {
   id: number;
   document_id: number;
@@ -31,6 +102,8 @@ export interface Result {
   is_out_of_range?: boolean;
   flag?: string;
   is_suspect: boolean;
+  range_position?: number;
+  relative_deviation?: number;
   normalized: boolean;
   previous_result_id?: number;
   delta_value?: number;